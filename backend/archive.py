@@ -0,0 +1,315 @@
+import itertools
+import os
+import shutil
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote
+
+from backend.shards import sensor_db_paths
+
+
+ARCHIVE_COLUMNS = ('id', 'temperature', 'energy', 'person', 'datetime', 'ts')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The sensor_data archive needs pyarrow, install it with 'pip install pyarrow'") from e
+    return pyarrow
+
+
+def _month(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m')
+
+
+def _statistics(path: str, column: str):
+    """(min, max) of column over a Parquet file's row group statistics, None where they are missing."""
+    metadata = _require_pyarrow().parquet.ParquetFile(path).metadata
+    position = metadata.schema.names.index(column)
+    lows, highs = [], []
+    for group in range(metadata.num_row_groups):
+        statistics = metadata.row_group(group).column(position).statistics
+        if statistics is None or not statistics.has_min_max:
+            return None, None
+        lows.append(statistics.min)
+        highs.append(statistics.max)
+    return min(lows, default=None), max(highs, default=None)
+
+
+def default_archive_dir(db_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), 'archive')
+
+
+def open_archive(db_path: str, archive_dir: str = None):
+    """Returns the SensorArchive next to db_path (or at archive_dir), or None if nothing was archived yet."""
+    root = archive_dir or default_archive_dir(db_path)
+    return SensorArchive(root) if os.path.isdir(root) else None
+
+
+def iter_sensor_rows(db_path: str, columns, households=None, chunk_size: int = 100000, until_ids: dict = None,
+                     archive_dir: str = None):
+    """
+    Yields lists of (household, *columns) tuples from sensor_data (every shard
+    file, see backend.shards), followed by the same columns from the Parquet
+    archive when one exists next to db_path (or at archive_dir). until_ids
+    ({file path: id}) limits the files it names to rows with id <= that id.
+    """
+    if households is not None:
+        households = list(households)
+    for path, names in sensor_db_paths(db_path, households).items():
+        query = f"SELECT household, {', '.join(columns)} FROM sensor_data"
+        conditions = []
+        params = []
+        if names is not None:
+            conditions.append(f"household IN ({', '.join('?' * len(names))})")
+            params.extend(names)
+        if until_ids is not None and path in until_ids:
+            conditions.append('id <= ?')
+            params.append(until_ids[path])
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+
+        conn = sqlite3.connect(path)
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    archive = open_archive(db_path, archive_dir)
+    if archive is not None:
+        yield from archive.iter_rows(columns, households, chunk_size)
+
+
+class SensorArchive:
+    """
+    Columnar Parquet tier for old sensor_data rows.
+
+    Rows are stored under root/household=<name>/month=<YYYY-MM>/part-*.parquet
+    (household names are URL-quoted), one zstd-compressed file per archive run
+    and partition. Reads prune partitions by household and month before
+    touching any file and only decode the requested columns.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _household_dir(self, household: str) -> str:
+        return os.path.join(self.root, f"household={quote(household, safe='')}")
+
+    def remove_household(self, household: str, up_to_id: int = None):
+        """
+        Deletes every archived partition of household, or with up_to_id only its rows
+        with id <= up_to_id, rewriting the files that also hold later rows.
+        """
+        if up_to_id is None:
+            shutil.rmtree(self._household_dir(household), ignore_errors=True)
+            return
+        pa = _require_pyarrow()
+        for path in self._files(household):
+            low, high = _statistics(path, 'id')
+            if low is not None and low > up_to_id:
+                continue
+            if high is not None and high <= up_to_id:
+                os.remove(path)
+                continue
+            table = pa.parquet.read_table(path)
+            directory, name = os.path.split(path)
+            temporary = os.path.join(directory, f".{name}.tmp")
+            pa.parquet.write_table(table.filter(pa.compute.greater(table.column('id'), up_to_id)), temporary,
+                                   compression='zstd')
+            os.replace(temporary, path)
+        for directory, _, files in sorted(os.walk(self._household_dir(household)), reverse=True):
+            if not files and not os.listdir(directory):
+                os.rmdir(directory)
+
+    def has_household(self, household: str) -> bool:
+        return os.path.isdir(self._household_dir(household))
+
+    def households(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(unquote(name[len('household='):]) for name in os.listdir(self.root)
+                      if name.startswith('household='))
+
+    def max_ts(self, household: str):
+        """Newest archived ts of household, or None, read from the Parquet statistics of its last month."""
+        files = self._files(household)
+        if not files:
+            return None
+        last = os.path.dirname(files[-1])
+        values = [_statistics(path, 'ts')[1] for path in files if os.path.dirname(path) == last]
+        return max([value for value in values if value is not None], default=None)
+
+    def _files(self, household: str, start: int = None, end: int = None, after: int = None):
+        directory = self._household_dir(household)
+        if not os.path.isdir(directory):
+            return []
+        lower = max([bound for bound in (start, after) if bound is not None], default=None)
+        first = _month(lower) if lower is not None else None
+        last = _month(end - 1) if end is not None else None
+        files = []
+        for name in sorted(os.listdir(directory)):
+            month = name[len('month='):]
+            if (first and month < first) or (last and month > last):
+                continue
+            partition = os.path.join(directory, name)
+            files.extend(os.path.join(partition, file) for file in sorted(os.listdir(partition))
+                         if file.endswith('.parquet'))
+        return files
+
+    def read_table(self, household: str, columns, start: int = None, end: int = None, after: int = None,
+                   max_groups: int = None, bucket: int = None):
+        """
+        Returns a pyarrow Table of the household's archived rows, sorted by ts, or None.
+
+        With max_groups (columns must include ts), month partitions are read oldest
+        first only until they hold more than max_groups distinct ts values, or
+        ts // bucket values with a bucket width, so a page near the cursor does not
+        decode the rest of the archive. The last group read may be incomplete.
+        """
+        if max_groups is None:
+            files = self._files(household, start, end, after)
+            return self._read_files(files, columns, start, end, after) if files else None
+
+        import numpy as np
+
+        tables = []
+        groups = 0
+        last = None
+        for table in self.iter_month_tables(household, columns, start, end, after):
+            if not table.num_rows:
+                continue
+            keys = table.column('ts').to_numpy()
+            if bucket is not None:
+                keys = keys // bucket
+            # A bucket can straddle two months; count it once
+            groups += len(np.unique(keys)) - int(keys[0] == last)
+            last = keys[-1]
+            tables.append(table)
+            # Stop only once a later group follows the page, so every group in it is complete
+            if groups > max_groups:
+                break
+        if not tables:
+            return None
+        return _require_pyarrow().concat_tables(tables)
+
+    def iter_month_tables(self, household: str, columns, start: int = None, end: int = None, after: int = None):
+        """Yields the household's archived rows one month partition at a time, each sorted by ts."""
+        for _, files in itertools.groupby(self._files(household, start, end, after), key=os.path.dirname):
+            yield self._read_files(list(files), columns, start, end, after)
+
+    def _read_files(self, files, columns, start: int = None, end: int = None, after: int = None):
+        pa = _require_pyarrow()
+        condition = None
+        for bound, operator in ((start, '__ge__'), (end, '__lt__'), (after, '__gt__')):
+            if bound is not None:
+                term = getattr(pa.dataset.field('ts'), operator)(bound)
+                condition = term if condition is None else condition & term
+        wanted = [column for column in columns if column != 'household']
+        table = pa.dataset.dataset(files, format='parquet').to_table(columns=wanted, filter=condition)
+        if 'ts' in wanted:
+            table = table.sort_by('ts')
+        return table
+
+    def read(self, household: str, columns, start: int = None, end: int = None, after: int = None,
+             max_groups: int = None, bucket: int = None):
+        """Same as read_table but returns a pandas DataFrame (with a household column if asked for)."""
+        table = self.read_table(household, columns, start, end, after, max_groups, bucket)
+        if table is None:
+            return None
+        df = table.to_pandas()
+        if 'household' in columns:
+            df['household'] = household
+        return df[list(columns)]
+
+    def iter_rows(self, columns, households=None, batch_size: int = 100000):
+        """Yields lists of (household, *columns) tuples over the archived rows of the given households."""
+        for household in (self.households() if households is None else households):
+            table = self.read_table(household, columns)
+            if table is None:
+                continue
+            for batch in table.to_batches(batch_size):
+                arrays = [batch.column(column).to_numpy(zero_copy_only=False) for column in columns]
+                yield [(household, *values) for values in zip(*arrays)]
+
+    def archive(self, conn, cutoff: int, batch_size: int = 100000, writer=None) -> dict:
+        """
+        Moves every sensor_data row with ts < cutoff into the archive.
+
+        Partition files are written under temporary names and only renamed into
+        place once complete; the rows are then deleted from SQLite in batches,
+        each one an operation on writer (the file's WriteQueue) when given.
+        Rows inserted while the archive runs are left alone.
+        """
+        pa = _require_pyarrow()
+        schema = pa.schema([
+            ('id', pa.int64()), ('temperature', pa.float64()), ('energy', pa.float64()),
+            ('person', pa.int64()), ('datetime', pa.string()), ('ts', pa.int64()),
+        ])
+        max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM sensor_data').fetchone()[0]
+        cursor = conn.execute(f'''
+            SELECT household, {', '.join(ARCHIVE_COLUMNS)} FROM sensor_data
+            WHERE ts < ? AND id <= ? ORDER BY household, ts
+        ''', (cutoff, max_id))
+
+        written = []
+        households = set()
+        parquet = None
+        partition = None
+        total = 0
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for key, group in itertools.groupby(rows, key=lambda row: (row[0], _month(row[-1]))):
+                    if key != partition:
+                        if parquet is not None:
+                            parquet.close()
+                        partition = key
+                        directory = os.path.join(self._household_dir(key[0]), f"month={key[1]}")
+                        os.makedirs(directory, exist_ok=True)
+                        path = os.path.join(directory, f".part-{uuid.uuid4().hex}.parquet.tmp")
+                        parquet = pa.parquet.ParquetWriter(path, schema, compression='zstd')
+                        written.append(path)
+                        households.add(key[0])
+                    columns = list(zip(*(row[1:] for row in group)))
+                    parquet.write_table(pa.Table.from_arrays(
+                        [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+                    ))
+                    total += len(columns[0])
+        finally:
+            if parquet is not None:
+                parquet.close()
+
+        for path in written:
+            directory, name = os.path.split(path)
+            os.replace(path, os.path.join(directory, name[1:-len('.tmp')]))
+
+        while True:
+            if writer is not None:
+                deleted = writer.execute(self._delete_archived, cutoff, max_id, batch_size)
+            else:
+                with conn:
+                    deleted = self._delete_archived(conn, cutoff, max_id, batch_size)
+            if deleted == 0:
+                break
+
+        return {'rows': total, 'files': len(written), 'households': len(households)}
+
+    @staticmethod
+    def _delete_archived(conn, cutoff: int, max_id: int, batch_size: int) -> int:
+        return conn.execute('''
+            DELETE FROM sensor_data WHERE id IN (
+                SELECT id FROM sensor_data WHERE ts < ? AND id <= ? LIMIT ?
+            )
+        ''', (cutoff, max_id, batch_size)).rowcount
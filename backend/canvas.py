@@ -0,0 +1,39 @@
+import numpy as np
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+from matplotlib.figure import Figure
+
+from backend.plots import downsample
+
+
+class RegressionCanvas(FigureCanvasQTAgg):
+    """
+    Qt widget showing a regression plot. The figure, axes and artists are created
+    once and updated in place for every household instead of building new figures.
+    """
+
+    def __init__(self, parent=None, max_points: int = 5000):
+        figure = Figure(figsize=(5, 4))
+        super().__init__(figure)
+        self.setParent(parent)
+        self.max_points = max_points
+        self.axes = figure.add_subplot()
+        self._points = self.axes.scatter([], [], s=8, alpha=0.6)
+        self._line, = self.axes.plot([], [], color='red')
+
+    def update_plot(self, x, y, coef: float, intercept: float, xlabel='temperature', ylabel='energy', title=None):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        shown_x, shown_y = downsample(x, y, self.max_points)
+        self._points.set_offsets(np.column_stack([shown_x, shown_y]))
+        if len(x):
+            line_x = np.array([x.min(), x.max()])
+            self._line.set_data(line_x, intercept + coef * line_x)
+        else:
+            self._line.set_data([], [])
+        self.axes.set_xlabel(xlabel)
+        self.axes.set_ylabel(ylabel)
+        self.axes.set_title(title or 'Linear Regression Analysis')
+        self.axes.relim()
+        self.axes.update_datalim(np.column_stack([shown_x, shown_y]))
+        self.axes.autoscale_view()
+        self.draw_idle()
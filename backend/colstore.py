@@ -0,0 +1,193 @@
+import os
+import shutil
+import sqlite3
+import threading
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from backend.archive import open_archive
+from backend.schema import SENSOR_COLUMNS, to_epoch
+from backend.shards import sensor_db_paths
+
+
+# Fixed-width columns kept per household; NULL readings are stored as NaN.
+STORE_COLUMNS = {
+    'ts': np.dtype('<i8'),
+    'temperature': np.dtype('<f8'),
+    'energy': np.dtype('<f8'),
+    'person': np.dtype('<f8'),
+}
+
+
+class ColumnStore:
+    """
+    Append-only binary column files per household, read through numpy.memmap.
+
+    Each household directory holds one raw little-endian file per column in
+    STORE_COLUMNS. Reads map the files and return views into them, so loading
+    a multi-year history allocates nothing per reading. Readings are expected
+    to arrive in time order; if one arrives out of order the household is
+    flagged and time-window reads fall back to a (copying) mask.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._household_position = SENSOR_COLUMNS.index('household')
+
+    def _directory(self, household: str) -> str:
+        return os.path.join(self.root, quote(household, safe=''))
+
+    def _path(self, household: str, column: str) -> str:
+        return os.path.join(self._directory(household), f'{column}.bin')
+
+    def remove(self, household: str):
+        with self._lock:
+            shutil.rmtree(self._directory(household), ignore_errors=True)
+
+    def households(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(unquote(name) for name in os.listdir(self.root))
+
+    def length(self, household: str) -> int:
+        # A torn append leaves columns of different lengths; only full rows count
+        lengths = []
+        for column, dtype in STORE_COLUMNS.items():
+            path = self._path(household, column)
+            lengths.append(os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0)
+        return min(lengths)
+
+    def is_sorted(self, household: str) -> bool:
+        return not os.path.exists(os.path.join(self._directory(household), 'UNSORTED'))
+
+    def append(self, household: str, columns: dict):
+        """Appends equally long arrays for every column in STORE_COLUMNS."""
+        arrays = {column: np.ascontiguousarray(columns[column], dtype=dtype) for column, dtype in STORE_COLUMNS.items()}
+        if not len(arrays['ts']):
+            return
+        with self._lock:
+            directory = self._directory(household)
+            os.makedirs(directory, exist_ok=True)
+            length = self.length(household)
+            if length:
+                last = np.memmap(self._path(household, 'ts'), dtype=STORE_COLUMNS['ts'], mode='r', shape=(length,))[-1]
+                if arrays['ts'][0] < last:
+                    open(os.path.join(directory, 'UNSORTED'), 'w').close()
+            if np.any(np.diff(arrays['ts']) < 0):
+                open(os.path.join(directory, 'UNSORTED'), 'w').close()
+            for column, values in arrays.items():
+                path = self._path(household, column)
+                with open(path, 'ab') as column_file:
+                    # Drop the tail of a previously torn append before writing
+                    column_file.truncate(length * STORE_COLUMNS[column].itemsize)
+                    column_file.write(values.tobytes())
+
+    def add_readings(self, rows):
+        """Ingest listener: appends LoggerModel.insert_readings tuples to their households."""
+        households = {}
+        for row in rows:
+            households.setdefault(row[self._household_position], []).append(row)
+        for household, readings in households.items():
+            temperature, energy, person, date_time, _ = zip(*readings)
+            self.append(household, {
+                'ts': [to_epoch(value) for value in date_time],
+                'temperature': np.array(temperature, dtype=float),
+                'energy': np.array(energy, dtype=float),
+                'person': np.array(person, dtype=float),
+            })
+
+    def attach(self, model):
+        """Subscribes to a LoggerModel so every inserted chunk is appended."""
+        model.add_ingest_listener(self.add_readings)
+
+    def read(self, household: str, columns=('ts', 'temperature', 'energy', 'person'), start: int = None,
+             end: int = None) -> dict:
+        """
+        Returns {column: array} for the household, optionally limited to start <= ts < end.
+
+        Arrays are read-only memmap views whenever the household's readings are in time order.
+        """
+        length = self.length(household)
+        if length == 0:
+            return {column: np.empty(0, dtype=STORE_COLUMNS[column]) for column in columns}
+        views = {
+            column: np.memmap(self._path(household, column), dtype=STORE_COLUMNS[column], mode='r', shape=(length,))
+            for column in set(columns) | {'ts'}
+        }
+        if start is None and end is None:
+            return {column: views[column] for column in columns}
+
+        ts = views['ts']
+        if self.is_sorted(household):
+            low = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+            high = length if end is None else int(np.searchsorted(ts, end, side='left'))
+            return {column: views[column][low:high] for column in columns}
+        keep = np.ones(length, dtype=bool)
+        if start is not None:
+            keep &= ts >= start
+        if end is not None:
+            keep &= ts < end
+        return {column: views[column][keep] for column in columns}
+
+    def sum_by_bucket(self, household: str, column: str, bucket: int, start: int = None, end: int = None):
+        """Returns (bucket_starts, sums) of column per bucket-second window, using np.add.reduceat."""
+        arrays = self.read(household, ('ts', column), start, end)
+        ts, values = arrays['ts'], arrays[column]
+        if not len(ts):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        if not self.is_sorted(household):
+            order = np.argsort(ts, kind='stable')
+            ts, values = ts[order], values[order]
+        keys = (ts // bucket) * bucket
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        return keys[starts], np.add.reduceat(np.nan_to_num(values), starts)
+
+    def rebuild(self, db_path: str, household: str = None, chunk_size: int = 100000, archive_dir: str = None):
+        """
+        Rewrites the store from the archive (next to db_path, or at archive_dir) and
+        sensor_data, for one household or all of them.
+        """
+        archive = open_archive(db_path, archive_dir)
+        if household is None:
+            households = set(archive.households() if archive is not None else [])
+            for db_file in sensor_db_paths(db_path):
+                conn = sqlite3.connect(db_file)
+                try:
+                    households.update(row[0] for row in conn.execute('SELECT DISTINCT household FROM sensor_data'))
+                finally:
+                    conn.close()
+        else:
+            households = {household}
+
+        columns = list(STORE_COLUMNS)
+        for db_file, names in sensor_db_paths(db_path, sorted(households)).items():
+            conn = sqlite3.connect(db_file)
+            try:
+                for name in names:
+                    with self._lock:
+                        for column in columns:
+                            path = self._path(name, column)
+                            if os.path.exists(path):
+                                os.remove(path)
+                        unsorted = os.path.join(self._directory(name), 'UNSORTED')
+                        if os.path.exists(unsorted):
+                            os.remove(unsorted)
+
+                    archived = archive.read_table(name, columns) if archive is not None else None
+                    if archived is not None:
+                        self.append(name, {column: archived.column(column).to_numpy(zero_copy_only=False)
+                                           for column in columns})
+                    cursor = conn.execute(
+                        f"SELECT {', '.join(columns)} FROM sensor_data WHERE household = ? AND ts IS NOT NULL ORDER BY ts",
+                        (name,)
+                    )
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        values = np.array(rows, dtype=float)
+                        self.append(name, {column: values[:, position] for position, column in enumerate(columns)})
+            finally:
+                conn.close()
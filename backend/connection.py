@@ -0,0 +1,251 @@
+import queue
+import sqlite3
+import threading
+import weakref
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+
+
+DEFAULT_PRAGMAS = {
+    # Only takes effect on a new, empty file, so it goes before journal_mode;
+    # existing files switch with schema.enable_incremental_vacuum
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+# Pragmas that write to the file, skipped by read-only pools.
+WRITING_PRAGMAS = ('auto_vacuum', 'journal_mode')
+
+
+class ConnectionPool:
+    """
+    Keeps one long-lived sqlite3 connection per thread for a database file.
+
+    Connections are opened lazily the first time a thread asks for one and are
+    configured once with the pool's pragmas, so repeated model calls reuse the
+    same page cache instead of paying a fresh connect every time. A thread's
+    connection is closed when the thread exits (or calls release()), so short-lived
+    worker threads do not leave connections behind. With an Instrumentation,
+    connections time and count every statement they run. With read_only the
+    file is opened with mode=ro and left in whatever journal mode it has.
+    """
+
+    def __init__(self, db_path: str, pragmas: dict = None, instrumentation=None, read_only: bool = False):
+        self.db_path = db_path
+        self.instrumentation = instrumentation
+        self.read_only = read_only
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        self.pragmas.update(pragmas or {})
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Opens a new connection with the pool's pragmas that is not tracked by the pool."""
+        target, options = self.db_path, {}
+        if self.read_only:
+            target, options = f"{Path(self.db_path).resolve().as_uri()}?mode=ro", {'uri': True}
+        if self.instrumentation is None:
+            conn = sqlite3.connect(target, check_same_thread=False, **options)
+        else:
+            from backend.instrumentation import InstrumentedConnection
+
+            conn = sqlite3.connect(target, check_same_thread=False, factory=InstrumentedConnection, **options)
+            conn.instrumentation = self.instrumentation
+        for name, value in self.pragmas.items():
+            if not (self.read_only and name in WRITING_PRAGMAS):
+                conn.execute(f'PRAGMA {name}={value}')
+        return conn
+
+    def get(self):
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            conn = self.connect()
+            holder = self._local.holder = _ThreadConnection(conn)
+            # Thread-local storage is dropped when the thread exits, which closes the connection
+            weakref.finalize(holder, self._discard, conn)
+            with self._lock:
+                self._connections.append(conn)
+        return holder.conn
+
+    def release(self):
+        """Closes the calling thread's connection, if it has one."""
+        self._local.__dict__.pop('holder', None)
+
+    def _discard(self, conn):
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        conn = self.get()
+        with conn:
+            yield conn
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+class _ThreadConnection:
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+class WriteQueue:
+    """
+    Serialises database writes through one thread that owns the only write connection.
+
+    Operations are callables taking the connection as first argument. The writer
+    drains whatever is queued (up to max_batch operations) into a single
+    transaction, each operation inside its own savepoint so one failure does not
+    undo the others. Callers get a Future that resolves once the transaction has
+    committed. Readers keep using the pool's WAL connections.
+
+    Parameters:
+    - pool: ConnectionPool whose pragmas the write connection uses.
+    - max_batch: int, the most operations grouped into one transaction.
+    """
+
+    _STOP = object()
+
+    def __init__(self, pool: ConnectionPool, max_batch: int = 256):
+        self.pool = pool
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, operation, *args, **kwargs) -> Future:
+        return self._enqueue(Future(), operation, args, kwargs)
+
+    def submit_alone(self, operation, *args, **kwargs) -> Future:
+        """
+        Like submit, but operation runs between transactions on the write connection in
+        autocommit mode, for statements such as PRAGMA incremental_vacuum(N) that sqlite3
+        only runs to completion through executescript, which commits first.
+        """
+        return self._enqueue(Future(), operation, args, kwargs, alone=True)
+
+    def submit_then(self, callback, operation, *args, **kwargs) -> Future:
+        """
+        Like submit, but callback(result) runs on the writer thread once the operation's
+        transaction has committed, before the writer starts its next transaction. The
+        returned Future resolves after callback has run.
+        """
+        committed = Future()
+        future = Future()
+
+        def finish(done):
+            if done.exception() is not None:
+                future.set_exception(done.exception())
+                return
+            try:
+                callback(done.result())
+            finally:
+                future.set_result(done.result())
+
+        committed.add_done_callback(finish)
+        self._enqueue(committed, operation, args, kwargs)
+        return future
+
+    def _enqueue(self, future, operation, args, kwargs, alone: bool = False) -> Future:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+            self._queue.put((operation, args, kwargs, future, alone))
+        return future
+
+    def execute(self, operation, *args, **kwargs):
+        """Runs operation on the writer and waits for its committed result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("WriteQueue.execute called from the writer thread")
+        return self.submit(operation, *args, **kwargs).result()
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(self._STOP)
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        conn = self.pool.connect()
+        conn.isolation_level = None
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = self._STOP in batch
+                pending = []
+                for item in batch:
+                    if item is self._STOP:
+                        continue
+                    if not item[-1]:
+                        pending.append(item)
+                        continue
+                    # Operations that must run alone go between the transactions, in queue order
+                    self._apply(conn, pending)
+                    pending = []
+                    self._apply_alone(conn, item)
+                self._apply(conn, pending)
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _apply(self, conn, batch):
+        if not batch:
+            return
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for operation, args, kwargs, future, _ in batch:
+                conn.execute('SAVEPOINT operation')
+                try:
+                    results.append((future, operation(conn, *args, **kwargs), None))
+                    conn.execute('RELEASE operation')
+                except Exception as error:
+                    conn.execute('ROLLBACK TO operation')
+                    conn.execute('RELEASE operation')
+                    results.append((future, None, error))
+            conn.execute('COMMIT')
+        except Exception as error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for operation, args, kwargs, future, _ in batch:
+                future.set_exception(error)
+            return
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def _apply_alone(self, conn, item):
+        operation, args, kwargs, future, _ = item
+        try:
+            result = operation(conn, *args, **kwargs)
+        except Exception as error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            future.set_exception(error)
+            return
+        future.set_result(result)
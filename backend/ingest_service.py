@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+
+from backend.schema import SENSOR_COLUMNS, to_epoch
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_reading(line: str):
+    """
+    Parses one reading, either a JSON object with the sensor_data columns or a
+    CSV line "temperature,energy,person,dd/mm/YYYY HH:MM,household".
+
+    Raises ValueError for a datetime that is not in that format, so a bad
+    reading is rejected here instead of failing the batch it would be written in.
+    """
+    line = line.strip()
+    if line.startswith('{'):
+        record = json.loads(line)
+        values = [record[column] for column in SENSOR_COLUMNS]
+    else:
+        values = line.split(',', len(SENSOR_COLUMNS) - 1)
+        if len(values) != len(SENSOR_COLUMNS):
+            raise ValueError(f"Expected {len(SENSOR_COLUMNS)} fields, got {len(values)}")
+    temperature, energy, person, date_time, household = values
+    date_time = str(date_time)
+    to_epoch(date_time)
+    return float(temperature), float(energy), int(person), date_time, str(household).strip()
+
+
+class IngestService:
+    """
+    Asyncio TCP service that accepts newline-delimited readings and logs them in batches.
+
+    Readings are buffered in memory and flushed through LoggerModel.insert_readings
+    when batch_size readings are waiting or flush_interval seconds have passed.
+    Flushes go through the model's WriteQueue, so there is a single writer
+    connection. Once max_pending readings are buffered, connections stop being
+    read until the writer catches up, pushing backpressure back to the meters
+    through TCP flow control. A batch the model fails to write is logged and
+    counted in the metrics and the service carries on with the next one.
+
+    Parameters:
+    - model: LoggerModel to write into.
+    - host, port: address to listen on; port 0 picks a free one (see port after start()).
+    - batch_size: int, readings per transaction.
+    - flush_interval: float, seconds a reading may wait before a partial batch is flushed.
+    - max_pending: int, buffered readings at which readers are paused.
+    """
+
+    def __init__(self, model, host: str = '127.0.0.1', port: int = 8765, batch_size: int = 5000,
+                 flush_interval: float = 0.5, max_pending: int = 100000):
+        self.model = model
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._buffer = []
+        self._clients = {}
+        self._server = None
+        self._writer_task = None
+        self._closing = False
+        self._ready = None
+        self._space = None
+
+        self._started = None
+        self._received = 0
+        self._written = 0
+        self._batches = 0
+        self._rejected = 0
+        self._failed = 0
+        self._failed_batches = 0
+        self._backpressure_waits = 0
+        self._last_flush_seconds = 0.0
+        self._samples = deque(maxlen=64)
+
+    async def start(self):
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._started = time.perf_counter()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._writer_task = asyncio.create_task(self._write_loop())
+
+    async def stop(self):
+        """
+        Stops accepting connections, closes the open ones once what they already
+        sent is read, and flushes everything still buffered.
+        """
+        self._server.close()
+        # Handlers finish while the write loop still runs, so none is left waiting
+        # for buffer space and nothing is buffered after the final flush
+        for writer in list(self._clients.values()):
+            writer.close()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        await self._server.wait_closed()
+        self._closing = True
+        self._ready.set()
+        await self._writer_task
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_connection(self, reader, writer):
+        self._clients[asyncio.current_task()] = writer
+        pending = b''
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()
+                await self._enqueue_lines(lines)
+            if pending:
+                await self._enqueue_lines([pending])
+        except ConnectionError:
+            pass
+        finally:
+            del self._clients[asyncio.current_task()]
+            writer.close()
+
+    async def _enqueue_lines(self, lines):
+        rows = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                rows.append(parse_reading(line.decode()))
+            except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+                self._rejected += 1
+        if rows:
+            await self._enqueue(rows)
+
+    async def _enqueue(self, rows):
+        while len(self._buffer) >= self.max_pending:
+            self._backpressure_waits += 1
+            self._space.clear()
+            await self._space.wait()
+        self._buffer.extend(rows)
+        self._received += len(rows)
+        if len(self._buffer) >= self.batch_size:
+            self._ready.set()
+
+    async def _write_loop(self):
+        while not self._closing or self._buffer:
+            if len(self._buffer) < self.batch_size and not self._closing:
+                try:
+                    await asyncio.wait_for(self._ready.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._ready.clear()
+            if not self._buffer:
+                continue
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            self._space.set()
+            start = time.perf_counter()
+            try:
+                await asyncio.wrap_future(self.model.log_readings(batch))
+            except Exception:
+                logger.exception("Failed to write a batch of %d readings", len(batch))
+                self._failed += len(batch)
+                self._failed_batches += 1
+                continue
+            now = time.perf_counter()
+            self._last_flush_seconds = now - start
+            self._written += len(batch)
+            self._batches += 1
+            self._samples.append((now, self._written))
+
+    def metrics(self) -> dict:
+        """Snapshot of counters, queue depth and ingest rates (readings/sec)."""
+        now = time.perf_counter()
+        elapsed = now - self._started if self._started else 0.0
+        recent_rate = 0.0
+        if len(self._samples) > 1:
+            (first_time, first_count), (last_time, last_count) = self._samples[0], self._samples[-1]
+            if last_time > first_time:
+                recent_rate = (last_count - first_count) / (last_time - first_time)
+        return {
+            'received': self._received,
+            'written': self._written,
+            'rejected': self._rejected,
+            'failed': self._failed,
+            'failed_batches': self._failed_batches,
+            'batches': self._batches,
+            'queue_depth': len(self._buffer),
+            'backpressure_waits': self._backpressure_waits,
+            'last_flush_seconds': self._last_flush_seconds,
+            'ingest_rate': self._written / elapsed if elapsed else 0.0,
+            'recent_ingest_rate': recent_rate,
+        }
@@ -0,0 +1,296 @@
+import bisect
+import functools
+import inspect
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+logger = logging.getLogger(__name__)
+
+# Statements EXPLAIN QUERY PLAN accepts; DDL, PRAGMA and transaction control have no plan
+EXPLAINABLE = re.compile(r'\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b', re.IGNORECASE)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def normalize_sql(sql: str) -> str:
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def _row_bytes(row) -> int:
+    return sum(len(value) if isinstance(value, (str, bytes)) else 8 for value in row)
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed bucket bounds, in the Prometheus layout."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+
+class Instrumentation:
+    """
+    Collects per-method and per-SQL-statement latencies for a LoggerModel.
+
+    Statements are keyed by their whitespace-normalised text and also track rows
+    and (approximate payload) bytes returned. Timing covers execute plus every
+    fetch, so a pd.read_sql_query shows its full read cost. Statements slower
+    than slow_query_seconds are logged with their EXPLAIN QUERY PLAN (empty for
+    statements other than queries and DML) and kept in the last slow_log_size
+    entries of the slow log.
+
+    Parameters:
+    - slow_query_seconds: float, threshold for the slow-query log, None to disable.
+    - slow_log_size: int, slow queries kept for snapshot().
+    """
+
+    def __init__(self, slow_query_seconds: float = 0.1, slow_log_size: int = 100):
+        self.slow_query_seconds = slow_query_seconds
+        self._lock = threading.Lock()
+        self._methods = {}
+        self._queries = {}
+        self._slow = deque(maxlen=slow_log_size)
+
+    def record_method(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self._methods.get(name)
+            if histogram is None:
+                histogram = self._methods[name] = Histogram()
+            histogram.observe(seconds)
+
+    def record_query(self, conn, sql: str, parameters, seconds: float, rows: int, size: int):
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self._queries.get(key)
+            if stats is None:
+                stats = self._queries[key] = {'latency': Histogram(), 'rows': 0, 'bytes': 0}
+            stats['latency'].observe(seconds)
+            stats['rows'] += rows
+            stats['bytes'] += size
+        if self.slow_query_seconds is not None and seconds >= self.slow_query_seconds:
+            plan = self._explain(conn, sql, parameters)
+            logger.warning("Slow query (%.3fs, %d rows): %s\n%s", seconds, rows, key, '\n'.join(plan))
+            with self._lock:
+                self._slow.append({'sql': key, 'seconds': seconds, 'rows': rows, 'plan': plan, 'time': time.time()})
+
+    def _explain(self, conn, sql: str, parameters):
+        if not EXPLAINABLE.match(sql):
+            return []
+        try:
+            cursor = sqlite3.Cursor(conn)
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parameters)
+            return [detail for _, _, _, detail in cursor.fetchall()]
+        except sqlite3.Error as e:
+            return [f"(plan unavailable: {e})"]
+
+    def wrap_methods(self, obj, prefix: str = None):
+        """Replaces obj's methods (public and _private, not dunder) with timed versions on the instance."""
+        prefix = prefix or type(obj).__name__
+        for name, method in inspect.getmembers(obj, callable):
+            if name.startswith('__') or not inspect.isroutine(method):
+                continue
+            setattr(obj, name, self._timed(f'{prefix}.{name}', method))
+
+    def _timed(self, name: str, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record_method(name, time.perf_counter() - start)
+        return timed
+
+    def snapshot(self) -> dict:
+        """Returns {'methods': {name: summary}, 'queries': {sql: summary + rows/bytes}, 'slow_queries': [...]}."""
+        with self._lock:
+            return {
+                'methods': {name: histogram.summary() for name, histogram in self._methods.items()},
+                'queries': {sql: {**stats['latency'].summary(), 'rows': stats['rows'], 'bytes': stats['bytes']}
+                            for sql, stats in self._queries.items()},
+                'slow_queries': list(self._slow),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+            self._queries.clear()
+            self._slow.clear()
+
+    def prometheus(self, namespace: str = 'energy_logger') -> str:
+        """Renders the histograms and counters in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines.extend(_histogram_lines(f'{namespace}_method_seconds', "LoggerModel method latency.",
+                                          'method', self._methods))
+            lines.extend(_histogram_lines(f'{namespace}_query_seconds', "SQL statement latency, execute and fetch.",
+                                          'query', {sql: stats['latency'] for sql, stats in self._queries.items()}))
+            for metric, help_text in (('rows', "Rows returned per SQL statement."),
+                                      ('bytes', "Approximate bytes returned per SQL statement.")):
+                name = f'{namespace}_query_{metric}_total'
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for sql, stats in self._queries.items():
+                    lines.append(f'{name}{{query="{_escape(sql)}"}} {stats[metric]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _histogram_lines(name: str, help_text: str, label: str, histograms: dict):
+    yield f'# HELP {name} {help_text}'
+    yield f'# TYPE {name} histogram'
+    for key, histogram in histograms.items():
+        labels = f'{label}="{_escape(key)}"'
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}'
+        yield f'{name}_sum{{{labels}}} {histogram.sum}'
+        yield f'{name}_count{{{labels}}} {histogram.count}'
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's execute + fetch time, rows and bytes when it is exhausted or reused."""
+
+    def __init__(self, conn):
+        super().__init__(conn)
+        self._statement = None
+
+    def _begin(self, sql, parameters):
+        self._finish()
+        self._statement = [sql, parameters, 0.0, 0, 0]
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            sql, parameters, seconds, rows, size = statement
+            self.connection.instrumentation.record_query(self.connection, sql, parameters, seconds, rows, size)
+
+    def _timed(self, function, *args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            if self._statement is not None:
+                self._statement[2] += time.perf_counter() - start
+
+    def _count(self, rows):
+        if self._statement is not None:
+            self._statement[3] += len(rows)
+            self._statement[4] += sum(_row_bytes(row) for row in rows)
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        self._timed(super().execute, sql, parameters)
+        if self.description is None:
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        self._begin(sql, seq_of_parameters[0] if seq_of_parameters else ())
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._finish()
+        return self
+
+    def executescript(self, script):
+        self._begin(script, ())
+        self._timed(super().executescript, script)
+        self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._count((row,))
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        self._count(rows)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._count(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors (including those pandas opens) feed an Instrumentation."""
+
+    instrumentation = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
@@ -1,61 +1,264 @@
+import json
+import logging
 import sqlite3
-import pandas as pd
+import threading
+import time
 import numpy as np
-import matplotlib.pyplot as plt
 
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
+from backend.archive import iter_sensor_rows, open_archive
+from backend.connection import ConnectionPool, WriteQueue
+from backend.schema import SENSOR_COLUMNS
+from backend.shards import lookup_shard, sensor_db_path
+
+
+logger = logging.getLogger(__name__)
+
+
+def _watermark(conn, household: str, archive=None) -> str:
+    # Newest id and ts of the household's live rows, read from the (household, ts)
+    # index alone, plus the newest archived ts; any insert, whichever path wrote
+    # it, moves the id, and archiving moves the archived ts
+    max_id, max_ts = conn.execute('SELECT MAX(id), MAX(ts) FROM sensor_data WHERE household = ?',
+                                  (household,)).fetchone()
+    archived = archive.max_ts(household) if archive is not None else None
+    return ':'.join('' if value is None else str(value) for value in (max_id, max_ts, archived))
+
+
+def column_store_values(column_store, household: str, feature_columns, target_column):
+    """Stacks a household's feature and target memmap columns into one (rows, k + 1) array."""
+    arrays = column_store.read(household, [*feature_columns, target_column])
+    return np.column_stack([arrays[column] for column in [*feature_columns, target_column]])
+
+
+def _with_archive(db_path: str, df, household: str, columns, archive_dir: str = None):
+    import pandas as pd
+
+    archive = open_archive(db_path, archive_dir)
+    archived = archive.read(household, columns) if archive is not None else None
+    if archived is None or archived.empty:
+        return df
+    return pd.concat([archived, df], ignore_index=True)
 
 
 class ProcessLinearRegression:
     
-    def __init__(self, household: str):
+    def __init__(self, household: str, db_path: str = 'exdata/records.db', archive_dir: str = None):
         self.household = household
+        self.db_path = db_path
+        self.archive_dir = archive_dir
         
     
     
     def _get_data(self):
-        with sqlite3.connect(self.db_path) as conn:
+        import pandas as pd
+
+        with sqlite3.connect(sensor_db_path(self.db_path, self.household)) as conn:
             cursor = conn.cursor()
             query = f"SELECT * FROM sensor_data WHERE household = ?;"
             df = pd.read_sql_query(query, conn, params=(self.household, ))
             conn.commit()
     
-            return df
+            return _with_archive(self.db_path, df, self.household, list(df.columns), self.archive_dir)
         
         
     def get_x_and_y(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from sklearn.linear_model import LinearRegression
+        from sklearn.model_selection import train_test_split
+
         raw_data = self._get_data()
-        x = raw_data['temperature']
+        x = raw_data[['temperature']]
         y = raw_data['energy']
         
-        from sklearn.model_selection import train_test_split
-        
         x_train, x_test, y_train, y_test = train_test_split(x, y, test_size = 0.4)
 
-        from sklearn.linear_model import LinearRegression
-
         model = LinearRegression()
 
         model.fit(x_train, y_train)
 
-        print(model.coef_)
+        logger.debug("%s: coefficients %s, intercept %s", self.household,
+                     dict(zip(x.columns, model.coef_)), model.intercept_)
 
-        print(model.intercept_)
+        predictions = model.predict(x_test)
 
-        pd.DataFrame(model.coef_, x.columns, columns = ['Coeff'])
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure)
+        axes = self.figure.add_subplot()
+        axes.scatter(y_test, predictions)
+        axes.set_xlabel("Temperature")
+        axes.set_ylabel("Energy")
+        axes.set_title("Linear Regression - Temperature vs Energy")
+        return self.figure
 
-        predictions = model.predict(x_test)
 
-        plt.scatter(y_test, predictions)
-        plt.xlabel("Temperature")
-        plt.ylabel("Energy")
-        plt.title("Linear Regression - Temperature vs Energy")
+class RegressionCache:
+    """
+    Fitted regression results stored in the regression_cache table.
+
+    Entries are keyed by household, features, target, test_size and random_state
+    and remember the household's data watermark (newest live id and ts, newest
+    archived ts) when they were fitted; an entry whose watermark no longer matches
+    is treated as a miss. Purging a household drops its entries. Only the
+    max_entries most recently used entries are kept. Every write goes through
+    writer, the catalog's WriteQueue (see LoggerModel.regression_cache), or one of
+    the cache's own when it is used without a LoggerModel; last-used updates do
+    not wait for it.
+    """
+
+    def __init__(self, db_path: str = 'exdata/records.db', max_entries: int = 512, writer=None,
+                 archive_dir: str = None):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.archive_dir = archive_dir
+        self._pool = None
+        if writer is None:
+            self._pool = ConnectionPool(db_path)
+            writer = WriteQueue(self._pool)
+        self.writer = writer
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._shard_conns = {}
+        self._lock = threading.Lock()
+
+    def _key(self, household, feature_columns, target_column, test_size, random_state):
+        return (household, json.dumps(list(feature_columns)), target_column, float(test_size), json.dumps(random_state))
+
+    def _sensor_conn(self, household: str):
+        path = lookup_shard(self._conn, self.db_path, household)
+        if path is None:
+            return self._conn
+        conn = self._shard_conns.get(path)
+        if conn is None:
+            conn = self._shard_conns[path] = sqlite3.connect(path, check_same_thread=False)
+        return conn
+
+    def watermark(self, household: str) -> str:
+        with self._lock:
+            return _watermark(self._sensor_conn(household), household, open_archive(self.db_path, self.archive_dir))
+
+    def _write(self, operation, *args, wait: bool = True):
+        return self.writer.execute(operation, *args) if wait else self.writer.submit(operation, *args)
+
+    def get(self, household, feature_columns, target_column, test_size, random_state, watermark: str):
+        key = self._key(household, feature_columns, target_column, test_size, random_state)
+        with self._lock:
+            row = self._conn.execute('''
+                SELECT watermark, result FROM regression_cache
+                WHERE household = ? AND features = ? AND target = ? AND test_size = ? AND random_state = ?
+            ''', key).fetchone()
+        if row is None or row[0] != watermark:
+            return None
+        self._write(self._touch, key, time.time(), wait=False)
+        return json.loads(row[1])
+
+    @staticmethod
+    def _touch(conn, key, used):
+        conn.execute('''
+            UPDATE regression_cache SET last_used = ?
+            WHERE household = ? AND features = ? AND target = ? AND test_size = ? AND random_state = ?
+        ''', (used, *key))
+
+    def put(self, household, feature_columns, target_column, test_size, random_state, watermark: str, result: dict):
+        key = self._key(household, feature_columns, target_column, test_size, random_state)
+        self._write(self._store, key, watermark, json.dumps(result), time.time(), self.max_entries)
+
+    @staticmethod
+    def _store(conn, key, watermark, result, used, max_entries):
+        conn.execute('''
+            INSERT OR REPLACE INTO regression_cache
+                (household, features, target, test_size, random_state, watermark, result, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (*key, watermark, result, used))
+        conn.execute('''
+            DELETE FROM regression_cache WHERE rowid IN (
+                SELECT rowid FROM regression_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        ''', (max_entries,))
+
+    def clear(self, household: str = None):
+        self._write(self._clear, household)
+
+    @staticmethod
+    def _clear(conn, household):
+        if household is None:
+            conn.execute('DELETE FROM regression_cache')
+        else:
+            conn.execute('DELETE FROM regression_cache WHERE household = ?', (household,))
+
+    def close(self):
+        if self._pool is not None:
+            self.writer.close()
+            self._pool.close()
+        for conn in self._shard_conns.values():
+            conn.close()
+        self._conn.close()
 
 
 class DisplayLinearRegression:
 
-    def display_linear_regression(self, dataset, feature_columns, target_column, test_size, random_state):
+    def __init__(self, db_path: str = 'exdata/records.db', cache: RegressionCache = None, archive_dir: str = None,
+                 model=None):
+        # With a LoggerModel, the default cache writes through the model's WriteQueue
+        self.model = model
+        self.db_path = model.db_path if model is not None else db_path
+        self.cache = cache
+        self.archive_dir = model.archive.root if model is not None and archive_dir is None else archive_dir
+
+    def fit_household(self, household, feature_columns, target_column, test_size, random_state):
+        """
+        Fits the regression for one household's sensor_data rows and scores it on a test split.
+
+        Results come from the cache while no new rows have been logged for the
+        household since they were fitted.
+
+        Returns:
+        - dict with coef, intercept, r2_test, mse_test, train_rows, test_rows and watermark.
+        """
+        import pandas as pd
+        from sklearn.linear_model import LinearRegression
+        from sklearn.model_selection import train_test_split
+
+        if self.cache is None:
+            self.cache = (self.model.regression_cache() if self.model is not None
+                          else RegressionCache(self.db_path, archive_dir=self.archive_dir))
+        cache = self.cache
+        watermark = cache.watermark(household)
+        result = cache.get(household, feature_columns, target_column, test_size, random_state, watermark)
+        if result is not None:
+            return result
+
+        columns = ', '.join([*feature_columns, target_column])
+        with sqlite3.connect(sensor_db_path(self.db_path, household)) as conn:
+            # One read transaction, so the rows fitted are the ones the stored watermark describes
+            conn.execute('BEGIN')
+            watermark = _watermark(conn, household, open_archive(self.db_path, self.archive_dir))
+            dataset = pd.read_sql_query(f"SELECT {columns} FROM sensor_data WHERE household = ?;",
+                                        conn, params=(household,))
+        conn.close()
+        dataset = _with_archive(self.db_path, dataset, household, [*feature_columns, target_column],
+                                self.archive_dir).dropna()
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            dataset[feature_columns], dataset[target_column], test_size=test_size, random_state=random_state
+        )
+        lr = LinearRegression()
+        lr.fit(X_train, y_train)
+        Y_pred = lr.predict(X_test)
+
+        result = {
+            'coef': [float(value) for value in lr.coef_],
+            'intercept': float(lr.intercept_),
+            'r2_test': float(lr.score(X_test, y_test)) if len(y_test) > 1 else None,
+            'mse_test': float(np.mean((np.asarray(y_test) - Y_pred) ** 2)),
+            'train_rows': len(y_train),
+            'test_rows': len(y_test),
+            'watermark': watermark,
+        }
+        cache.put(household, feature_columns, target_column, test_size, random_state, watermark, result)
+        return result
+
+    def display_linear_regression(self, dataset, feature_columns, target_column, test_size, random_state,
+                                  output: str = None, max_points: int = 5000):
         """
         Performs linear regression on a given dataset with specified features and target.
 
@@ -65,10 +268,19 @@ class DisplayLinearRegression:
         - target_column: str, name of the column to use as target.
         - test_size: float, proportion of the dataset to include in the test split.
         - random_state: int, seed used by the random number generator for reproducibility.
+        - output: optional file path; when given the plot is rendered off-screen to it instead of shown.
+        - max_points: int, test points drawn at most; larger test sets are downsampled.
 
         Returns:
         - Plots the actual vs predicted values along with the regression line.
         """
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from sklearn.linear_model import LinearRegression
+        from sklearn.model_selection import train_test_split
+
+        from backend.plots import sample_indices
+
         # Select features and target from the dataset
         X = dataset[feature_columns]
         y = dataset[target_column]
@@ -85,13 +297,345 @@ class DisplayLinearRegression:
         lr = LinearRegression()
         lr.fit(X_train, y_train)
 
-        # Predict using the test set
-        Y_pred = lr.predict(X_test)
+        # Plot the results, off-screen on a standalone Figure when writing a file
+        if output is None:
+            import matplotlib.pyplot as plt
+
+            figure = plt.figure()
+        else:
+            figure = Figure()
+            FigureCanvasAgg(figure)
+        axes = figure.add_subplot()
+        shown = sample_indices(len(y_test), max_points)
+        axes.scatter(np.asarray(X_test)[shown], np.asarray(y_test)[shown])
+        if len(feature_columns) == 1 and len(X_test):
+            # A straight line only needs its two endpoints, not every test point
+            line_x = np.array([[X_test.min()], [X_test.max()]])
+            axes.plot(line_x[:, 0], lr.predict(line_x), color='red')
+        axes.set_xlabel(feature_columns[0] if len(feature_columns) == 1 else 'Features')
+        axes.set_ylabel(target_column)
+        axes.set_title('Linear Regression Analysis')
+        if output is None:
+            plt.show()
+        else:
+            figure.savefig(output)
+
+
+class RegressionStats:
+    """
+    Running sufficient statistics for an ordinary least squares fit with intercept.
+
+    Keeps n, X'X and X'y over the design matrix [1, features...] plus y'y, so
+    batches can be added (or merged from another RegressionStats) in any order
+    and the coefficients solved at any point without revisiting old rows.
+    """
+
+    def __init__(self, n_features: int):
+        size = n_features + 1
+        self.n_features = n_features
+        self.n = 0
+        self.xtx = np.zeros((size, size))
+        self.xty = np.zeros(size)
+        self.yty = 0.0
+
+    def update(self, X, y):
+        y = np.asarray(y, dtype=float)
+        X = np.asarray(X, dtype=float).reshape(len(y), self.n_features)
+        design = np.column_stack([np.ones(len(y)), X])
+        self.n += len(y)
+        self.xtx += design.T @ design
+        self.xty += design.T @ y
+        self.yty += y @ y
+
+    def merge(self, other: 'RegressionStats'):
+        self.n += other.n
+        self.xtx += other.xtx
+        self.xty += other.xty
+        self.yty += other.yty
+
+    def solve(self) -> dict:
+        if self.n == 0:
+            return None
+        beta = np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+        residual = self.yty - 2 * beta @ self.xty + beta @ self.xtx @ beta
+        total = self.yty - self.xty[0] ** 2 / self.n
+        return {
+            'coef': beta[1:],
+            'intercept': float(beta[0]),
+            'r2': float(1 - residual / total) if total > 0 else float('nan'),
+            'n': self.n,
+        }
+
+
+class IncrementalLinearRegression:
+    """
+    Per-household energy regression kept current from running sufficient statistics.
+
+    A household's statistics are built once from chunked SQL reads the first time
+    it is fitted and afterwards updated from newly logged rows (see attach), so
+    fit() is constant time and matches a batch least-squares fit on all rows.
+    When attached, a rebuild takes its cutoff on the household's shard writer:
+    rows committed before that point are read, rows logged after it are buffered
+    and applied once the read is done.
+
+    Parameters:
+    - db_path: path of the records database.
+    - feature_columns: list of str, sensor_data columns used as features.
+    - target_column: str, sensor_data column to predict.
+    - chunk_size: int, rows fetched per round trip while rebuilding.
+    - column_store: optional backend.colstore.ColumnStore to rebuild from instead of SQL.
+    - archive_dir: Parquet archive directory, defaults to 'archive' next to db_path.
+    """
+
+    def __init__(self, db_path: str = 'exdata/records.db', feature_columns=('temperature',),
+                 target_column: str = 'energy', chunk_size: int = 100000, column_store=None, archive_dir: str = None):
+        self.db_path = db_path
+        self.feature_columns = list(feature_columns)
+        self.target_column = target_column
+        self.chunk_size = chunk_size
+        self.column_store = column_store
+        self.archive_dir = archive_dir
+        self._model = None
+        self._stats = {}
+        self._pending = {}
+        self._rebuilding = set()
+        self._rebuilding_paths = set()
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._positions = [SENSOR_COLUMNS.index(column) for column in [*self.feature_columns, target_column]]
+        self._household_position = SENSOR_COLUMNS.index('household')
+
+    def attach(self, model):
+        """Subscribes to a LoggerModel so every committed chunk updates the statistics."""
+        self._model = model
+        model.add_ingest_listener(self.add_readings)
+
+    def add_readings(self, rows):
+        households = {}
+        for row in rows:
+            households.setdefault(row[self._household_position], []).append([row[i] for i in self._positions])
+        with self._lock:
+            for household, values in households.items():
+                values = np.array(values, dtype=float)
+                if self._is_rebuilding(household):
+                    self._pending.setdefault(household, []).append(values)
+                elif household in self._stats:
+                    self._update(self._stats[household], values)
+                # Households not loaded yet pick these rows up when first rebuilt
+
+    def _is_rebuilding(self, household: str) -> bool:
+        if household in self._rebuilding:
+            return True
+        return bool(self._rebuilding_paths) and self._model.shards.known_path(household) in self._rebuilding_paths
+
+    def _update(self, stats: RegressionStats, values):
+        values = values[~np.isnan(values).any(axis=1)]
+        if len(values):
+            stats.update(values[:, :-1], values[:, -1])
+
+    def rebuild(self, household: str = None):
+        """Recomputes statistics from sensor_data (or the column store) for one household, or for all of them."""
+        with self._rebuild_lock:
+            rebuilt = None
+            try:
+                cutoffs = self._begin_rebuild(household) if self._model is not None else {}
+                rebuilt = self._read_stats(household, cutoffs)
+            finally:
+                self._finish_rebuild(household, rebuilt)
+
+    def _finish_rebuild(self, household: str, rebuilt: dict):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._rebuilding.clear()
+            self._rebuilding_paths.clear()
+            if rebuilt is None:
+                # Rows logged meanwhile were buffered rather than applied; start over on the next fit
+                if household is None:
+                    self._stats = {}
+                else:
+                    self._stats.pop(household, None)
+                return
+            for name, batches in pending.items():
+                stats = rebuilt.setdefault(name, RegressionStats(len(self.feature_columns)))
+                for values in batches:
+                    self._update(stats, values)
+            if household is None:
+                self._stats = rebuilt
+            else:
+                self._stats.update(rebuilt)
+
+    def _begin_rebuild(self, household: str = None) -> dict:
+        # Runs on each shard's writer between transactions, so every row committed
+        # before it has already reached add_readings and every later row has a
+        # higher id (or, in the column store, a later position)
+        shards = self._model.shards
+
+        def mark(conn, path):
+            with self._lock:
+                if household is None:
+                    self._rebuilding_paths.add(path)
+                else:
+                    self._rebuilding.add(household)
+            if self.column_store is None:
+                return conn.execute('SELECT COALESCE(MAX(id), 0) FROM sensor_data').fetchone()[0]
+            names = [household] if household is not None else [
+                name for name in self.column_store.households() if shards.known_path(name) == path
+            ]
+            return {name: self.column_store.length(name) for name in names}
+
+        paths = shards.paths() if household is None else [shards.path_for(household)]
+        return {path: shards.writer_at(path).execute(mark, path) for path in paths}
+
+    def _read_stats(self, household: str, cutoffs: dict) -> dict:
+        rebuilt = {} if household is None else {household: RegressionStats(len(self.feature_columns))}
+        households = None if household is None else [household]
+        if self.column_store is not None:
+            if cutoffs:
+                lengths = {name: length for names in cutoffs.values() for name, length in names.items()}
+            else:
+                lengths = dict.fromkeys(self.column_store.households() if household is None else households)
+            for name, length in lengths.items():
+                stats = rebuilt.setdefault(name, RegressionStats(len(self.feature_columns)))
+                self._update(stats, column_store_values(self.column_store, name, self.feature_columns,
+                                                        self.target_column)[:length])
+        else:
+            for rows in iter_sensor_rows(self.db_path, [*self.feature_columns, self.target_column], households,
+                                         self.chunk_size, until_ids=cutoffs, archive_dir=self.archive_dir):
+                names = np.array([row[0] for row in rows], dtype=object)
+                values = np.array([row[1:] for row in rows], dtype=float)
+                for name in np.unique(names):
+                    stats = rebuilt.setdefault(name, RegressionStats(len(self.feature_columns)))
+                    self._update(stats, values[names == name])
+        if household is None and cutoffs:
+            # Files created after the cutoffs were taken were neither bounded nor
+            # buffered; their households are rebuilt on their next fit instead
+            rebuilt = {name: stats for name, stats in rebuilt.items()
+                       if self._model.shards.known_path(name) in cutoffs}
+        return rebuilt
+
+    def fit(self, household: str) -> dict:
+        """
+        Returns {'coef', 'intercept', 'r2', 'n'} for household, or None when it has no readings.
+        """
+        with self._lock:
+            stats = self._stats.get(household)
+        if stats is None:
+            self.rebuild(household)
+            with self._lock:
+                stats = self._stats[household]
+        with self._lock:
+            return stats.solve()
+
+
+class BatchLinearRegression:
+    """
+    Fits the energy regression for every household from a single pass over sensor_data.
+
+    Rows are streamed in chunks, factorized and sorted by household code, reduced with
+    np.add.reduceat into per-household X'X / X'y terms, then all households are
+    solved in one stacked np.linalg call.
+
+    Parameters:
+    - db_path: path of the records database.
+    - feature_columns: list of str, sensor_data columns used as features.
+    - target_column: str, sensor_data column to predict.
+    - chunk_size: int, rows fetched per round trip.
+    - column_store: optional backend.colstore.ColumnStore to read from instead of SQL.
+    - archive_dir: Parquet archive directory, defaults to 'archive' next to db_path.
+    """
+
+    def __init__(self, db_path: str = 'exdata/records.db', feature_columns=('temperature',),
+                 target_column: str = 'energy', chunk_size: int = 200000, column_store=None, archive_dir: str = None):
+        self.db_path = db_path
+        self.feature_columns = list(feature_columns)
+        self.target_column = target_column
+        self.chunk_size = chunk_size
+        self.column_store = column_store
+        self.archive_dir = archive_dir
+
+    def fit(self, households=None):
+        """
+        Returns one row per household with coef_<feature>, intercept, r2 and n columns.
+
+        households optionally restricts the fit to the given household names.
+        """
+        import pandas as pd
+
+        if self.column_store is not None:
+            return self._fit_column_store(households)
+
+        size = len(self.feature_columns) + 1
+        codes = {}
+        xtx = np.zeros((0, size, size))
+        xty = np.zeros((0, size))
+        yty = np.zeros(0)
+        counts = np.zeros(0, dtype=np.int64)
+
+        for rows in iter_sensor_rows(self.db_path, [*self.feature_columns, self.target_column], households,
+                                     self.chunk_size, archive_dir=self.archive_dir):
+            table = np.array(rows, dtype=object)
+            values = table[:, 1:].astype(float)
+            keep = ~np.isnan(values).any(axis=1)
+            if not keep.any():
+                continue
+            inverse, chunk_names = pd.factorize(table[keep, 0])
+            values = values[keep]
+
+            for name in chunk_names:
+                codes.setdefault(name, len(codes))
+            if len(codes) > len(counts):
+                grow = len(codes) - len(counts)
+                xtx = np.concatenate([xtx, np.zeros((grow, size, size))])
+                xty = np.concatenate([xty, np.zeros((grow, size))])
+                yty = np.concatenate([yty, np.zeros(grow)])
+                counts = np.concatenate([counts, np.zeros(grow, dtype=np.int64)])
+
+            order = np.argsort(inverse, kind='stable')
+            inverse = inverse[order]
+            values = values[order]
+            starts = np.flatnonzero(np.r_[True, inverse[1:] != inverse[:-1]])
+            targets = np.array([codes[chunk_names[code]] for code in inverse[starts]])
+
+            design = np.column_stack([np.ones(len(values)), values[:, :-1]])
+            y = values[:, -1]
+            xtx[targets] += np.add.reduceat(design[:, :, None] * design[:, None, :], starts)
+            xty[targets] += np.add.reduceat(design * y[:, None], starts)
+            yty[targets] += np.add.reduceat(y * y, starts)
+            counts[targets] += np.diff(np.r_[starts, len(y)])
+
+        try:
+            beta = np.linalg.solve(xtx, xty[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            beta = (np.linalg.pinv(xtx) @ xty[:, :, None])[:, :, 0]
+        residual = yty - 2 * np.einsum('hi,hi->h', beta, xty) + np.einsum('hi,hij,hj->h', beta, xtx, beta)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total = yty - xty[:, 0] ** 2 / counts
+            r2 = np.where(total > 0, 1 - residual / total, np.nan)
+
+        result = pd.DataFrame({'household': list(codes)})
+        for position, column in enumerate(self.feature_columns, start=1):
+            result[f'coef_{column}'] = beta[:, position]
+        result['intercept'] = beta[:, 0]
+        result['r2'] = r2
+        result['n'] = counts
+        return result.sort_values('household', ignore_index=True)
+
+    def _fit_column_store(self, households=None):
+        import pandas as pd
 
-        # Plot the results
-        plt.scatter(X_test, y_test)
-        plt.plot(X_test, Y_pred, color='red')
-        plt.xlabel(feature_columns[0] if len(feature_columns) == 1 else 'Features')
-        plt.ylabel(target_column)
-        plt.title('Linear Regression Analysis')
-        plt.show()
\ No newline at end of file
+        rows = []
+        for household in sorted(self.column_store.households() if households is None else households):
+            values = column_store_values(self.column_store, household, self.feature_columns, self.target_column)
+            values = values[~np.isnan(values).any(axis=1)]
+            stats = RegressionStats(len(self.feature_columns))
+            stats.update(values[:, :-1], values[:, -1])
+            fit = stats.solve()
+            if fit is None:
+                continue
+            row = {'household': household}
+            for position, column in enumerate(self.feature_columns):
+                row[f'coef_{column}'] = fit['coef'][position]
+            row.update({'intercept': fit['intercept'], 'r2': fit['r2'], 'n': fit['n']})
+            rows.append(row)
+        return pd.DataFrame(rows, columns=['household', *[f'coef_{column}' for column in self.feature_columns],
+                                           'intercept', 'r2', 'n'])
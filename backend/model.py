@@ -1,7 +1,19 @@
-import sqlite3
+import csv
+import glob
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import pandas as pd
-from PyQt5.QtCore import QAbstractTableModel, Qt
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from backend.archive import SensorArchive, default_archive_dir
+from backend.connection import ConnectionPool, WriteQueue
+from backend.purge import HouseholdPurger
+from backend.registry import HouseholdRegistry
+from backend.rollups import (ARCHIVED_COLUMNS, load_archived_readings, rebuild_rollups, summary_query,
+                             update_rollups)
+from backend.shards import ShardSet
+from backend.schema import (DATETIME_FORMAT, SENSOR_COLUMNS, VALUE_COLUMNS, enable_incremental_vacuum, from_epoch,
+                            migrate, to_epoch)
 
 
 class PandasModel(QAbstractTableModel):
@@ -9,6 +21,7 @@ class PandasModel(QAbstractTableModel):
     def __init__(self, data):
         QAbstractTableModel.__init__(self)
         self._data = data
+        self._columns = [data[column].to_numpy() for column in data.columns]
 
     def rowCount(self, parent=None):
         return self._data.shape[0]
@@ -19,7 +32,7 @@ class PandasModel(QAbstractTableModel):
     def data(self, index, role=Qt.DisplayRole):
         if index.isValid():
             if role == Qt.DisplayRole:
-                return str(self._data.iloc[index.row(), index.column()])
+                return str(self._columns[index.column()][index.row()])
         return None
 
     def headerData(self, col, orientation, role):
@@ -28,124 +41,571 @@ class PandasModel(QAbstractTableModel):
         return None
 
 
+class SensorTableModel(QAbstractTableModel):
+    """
+    Table model over a household's get_all_data rows that loads them from SQLite
+    a page at a time as the view scrolls (canFetchMore/fetchMore).
+
+    Only max_pages pages of column arrays are kept; evicted pages are reloaded
+    from their first datetime when scrolled back into view. Formatted cell
+    strings are cached for the visible window in an LRU of cache_size cells.
+    """
+
+    def __init__(self, logger_model, household: str, columns=None, page_size: int = 2000,
+                 max_pages: int = 20, cache_size: int = 20000):
+        QAbstractTableModel.__init__(self)
+        self._logger_model = logger_model
+        self._household = household
+        self._value_columns = list(columns or VALUE_COLUMNS)
+        self._headers = ['datetime', 'household', *self._value_columns]
+        self._page_size = page_size
+        self._max_pages = max_pages
+        self._cache_size = cache_size
+
+        self._pages = OrderedDict()
+        self._page_starts = []
+        self._cells = OrderedDict()
+        self._row_count = 0
+        self._exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        after = None
+        if self._page_starts:
+            last_page = self._page(len(self._page_starts) - 1)
+            after = last_page[0][-1]
+        page = self._load_page(after=after)
+        rows = len(page[0])
+        if rows < self._page_size:
+            self._exhausted = True
+        if rows == 0:
+            return
+
+        self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + rows - 1)
+        self._page_starts.append(page[0][0])
+        self._store_page(len(self._page_starts) - 1, page)
+        self._row_count += rows
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        key = (index.row(), index.column())
+        text = self._cells.get(key)
+        if text is not None:
+            self._cells.move_to_end(key)
+            return text
+
+        page_number, offset = divmod(index.row(), self._page_size)
+        text = str(self._page(page_number)[index.column()][offset])
+        self._cells[key] = text
+        if len(self._cells) > self._cache_size:
+            self._cells.popitem(last=False)
+        return text
+
+    def headerData(self, col, orientation, role):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[col]
+        return None
+
+    def _load_page(self, start=None, after=None):
+        df = self._logger_model.get_all_data(self._household, start=start, after=after,
+                                             limit=self._page_size, columns=self._value_columns)
+        return [df[column].to_numpy() for column in self._headers]
+
+    def _page(self, page_number: int):
+        page = self._pages.get(page_number)
+        if page is None:
+            page = self._load_page(start=self._page_starts[page_number])
+            self._store_page(page_number, page)
+        else:
+            self._pages.move_to_end(page_number)
+        return page
+
+    def _store_page(self, page_number: int, page):
+        self._pages[page_number] = page
+        if len(self._pages) > self._max_pages:
+            self._pages.popitem(last=False)
+
+
 class LoggerModel:
-    def __init__(self, db_path='exdata/records.db'):
+    def __init__(self, db_path='exdata/records.db', pragmas: dict = None, archive_dir: str = None,
+                 column_store_dir: str = None, instrumentation=None, sharded: bool = False, shard_count: int = None,
+                 read_only: bool = False):
+        # read_only opens existing files (e.g. a snapshot) without migrating them or
+        # changing their journal mode; any write then fails
         self.db_path = db_path
-        self._create_households_tables()
+        self.instrumentation = instrumentation
+        self.pool = ConnectionPool(db_path, pragmas, instrumentation, read_only)
+        self.writer = WriteQueue(self.pool)
+        self.shards = ShardSet(self.pool, self.writer, sharded, shard_count)
+        self.archive = SensorArchive(archive_dir or default_archive_dir(db_path))
+        self.registry = HouseholdRegistry(self.pool)
+        self.purger = HouseholdPurger(self)
+        self._ingest_listeners = []
+        self.column_store = None
+        if column_store_dir is not None:
+            from backend.colstore import ColumnStore
+
+            self.column_store = ColumnStore(column_store_dir)
+            self.column_store.attach(self)
+        if instrumentation is not None:
+            instrumentation.wrap_methods(self)
+        if not read_only:
+            self._create_households_tables()
+
+    def close(self):
+        self.purger.close()
+        self.shards.close()
+        self.writer.close()
+        self.pool.close()
 
     def _create_households_tables(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS households (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    household_name TEXT,
-                    current_person INTEGER
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS active_household (
-                    household_id INTEGER REFERENCES households(id),
-                    name TEXT
-                )
-            ''')
-            conn.commit()
+        migrate(self.pool.get())
 
     def register_household(self, household):
-        if self.get_household_by_name(household.get_name().upper()):
+        name = household.get_name().upper()
+        household_id = self.writer.execute(self._insert_household, name, household.get_num_person())
+        self.registry.added(household_id, name, household.get_num_person())
+
+    @staticmethod
+    def _insert_household(conn, name, current_person):
+        if conn.execute('SELECT 1 FROM households WHERE household_name = ?', (name,)).fetchone():
             raise ValueError("A household with the same name already exists")
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('INSERT INTO households (household_name, current_person) VALUES (?, ?)', (household.get_name().upper(), household.get_num_person()))
-            conn.commit()
-
-    def delete_household(self, household_id):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM households WHERE id = ?', (household_id,))
-            cursor.execute('DELETE FROM active_household WHERE household_id = ?', (household_id,))
-            conn.commit()
+        cursor = conn.execute('INSERT INTO households (household_name, current_person) VALUES (?, ?)', (name, current_person))
+        return cursor.lastrowid
+
+    def delete_household(self, household_id, progress=None):
+        """
+        Unregisters the household and purges its readings in the background.
+
+        Returns the purge Future (see HouseholdPurger.purge, which also describes
+        progress), or None if no such household is registered.
+        """
+        record = self.registry.get_by_id(household_id)
+        self.writer.execute(self._delete_household, household_id)
+        self.registry.removed(household_id)
+        if record is not None:
+            return self.purger.purge(record['name'], progress)
+
+    @staticmethod
+    def _delete_household(conn, household_id):
+        conn.execute('DELETE FROM households WHERE id = ?', (household_id,))
+        conn.execute('DELETE FROM active_household WHERE household_id = ?', (household_id,))
 
     def get_household_by_name(self, household_name):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM households WHERE household_name = ?', (household_name,))
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'id': result[0],
-                    'name': result[1],
-                }
-            return None
+        return self.registry.get_by_name(household_name)
 
     def get_registered_households(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM households')
-            results = cursor.fetchall()
+        return self.registry.get_all()
 
-            households = []
-            for result in results:
-                household = {
-                    'id': result[0],
-                    'name': result[1]
-                }
-                households.append(household)
+    def get_registered_household_id(self, household_name: str):
+        return self.registry.get_id(household_name)
 
-            return households
+    def get_active_household(self):
+        return self.registry.get_active()
 
-    def get_registered_household_id(self, household_name: str):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id FROM households WHERE household_name = ?', (household_name,))
-            result = cursor.fetchone()
+    def save_active_household(self, active_household: dict):
+        self.writer.execute(self._save_active_household, active_household['id'], active_household['name'])
+        self.registry.activated(active_household['id'], active_household['name'])
 
-            if result:
-                return result[0]
+    @staticmethod
+    def _save_active_household(conn, household_id, name):
+        conn.execute('DELETE FROM active_household')
+        conn.execute('''
+            INSERT INTO active_household (household_id, name)
+            VALUES (?, ?)
+        ''', (household_id, name))
 
-            return None
+    def insert_readings(self, conn, rows):
+        conn.executemany(
+            'INSERT INTO sensor_data (temperature, energy, person, datetime, household, ts) VALUES (?, ?, ?, ?, ?, ?)',
+            [(*row, to_epoch(row[3])) for row in rows]
+        )
+        # The transaction holds the write lock from the first insert on, so this
+        # call's rows have consecutive ids ending at last_insert_rowid(); folding
+        # only those keeps rows committed by other connections from counting twice
+        last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        update_rollups(conn, last_id - len(rows), last_id)
 
-    def get_active_household(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM active_household')
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'id': result[0],
-                    'name': result[1],
-                }
+    def log_readings(self, rows):
+        """
+        Queues rows (5-tuples in SENSOR_COLUMNS order) on the writer of each shard they belong to.
+
+        Returns a Future that resolves once the rows have committed and the ingest listeners have seen them.
+        """
+        return self.shards.write(rows, self.insert_readings, committed=self._notify_listeners)
+
+    def add_ingest_listener(self, listener):
+        """
+        Registers listener(rows) to be called with every chunk of logged readings once it has
+        committed. Calls for one shard come from its writer thread, in commit order.
+        """
+        self._ingest_listeners.append(listener)
+
+    def _notify_listeners(self, rows):
+        for listener in self._ingest_listeners:
+            listener(rows)
+
+    def remove_ingest_listener(self, listener):
+        self._ingest_listeners.remove(listener)
+
+    def rebuild_rollups(self, household: str = None):
+        """Recomputes the rollups from sensor_data and the archive, for one household or all of them."""
+        if household is not None:
+            rebuild_rollups(self.shards.pool_for(household).get(), household, archive=self.archive,
+                            writer=self.shards.writer_for(household))
+            return
+        # Archived households are folded into the shard that holds their live rows
+        archived = {}
+        for name in self.archive.households():
+            archived.setdefault(self.shards.path_for(name), []).append(name)
+        self.shards.fan_out(lambda pool: rebuild_rollups(pool.get(), archive=self.archive,
+                                                         archived_households=archived.get(pool.db_path, []),
+                                                         writer=self.shards.writer_at(pool.db_path)))
+
+    def enable_incremental_vacuum(self) -> list:
+        """
+        Switches the catalog and every shard file to incremental auto_vacuum, see
+        schema.enable_incremental_vacuum for the cost; returns the files switched.
+        """
+        switched = []
+        for pool in self.shards.pools():
+            conn = pool.connect()
+            conn.isolation_level = None
+            try:
+                if enable_incremental_vacuum(conn):
+                    switched.append(pool.db_path)
+            finally:
+                conn.close()
+        return switched
+
+    def get_summary(self, household: str, resolution: str = 'day', start=None, end=None):
+        """
+        Returns energy totals, mean temperature and mean person count per period.
+
+        resolution is one of hour, day, week, month or year. The query reads the
+        coarsest rollup table that answers it exactly and only falls back to raw
+        sensor_data, plus the archived rows in the window, when start/end do not
+        line up with any rollup's buckets.
+        """
+        import pandas as pd
+
+        start, end = to_epoch(start), to_epoch(end)
+        query, params, rollup = summary_query(resolution, start, end)
+        archived = None
+        if rollup is None and self.archive.has_household(household):
+            archived = self.archive.read_table(household, ARCHIVED_COLUMNS, start, end)
+            if archived is not None:
+                query, params, _ = summary_query(resolution, start, end, archived=True)
+        with self.shards.pool_for(household).connection() as conn:
+            if archived is None:
+                return pd.read_sql_query(query, conn, params=[household, *params])
+            load_archived_readings(conn, household, archived)
+            try:
+                return pd.read_sql_query(query, conn, params=[household, *params])
+            finally:
+                conn.execute('DELETE FROM temp.archived_readings')
+
+    def import_csv(self, path_or_glob: str, chunk_size: int = 50000, callback=None):
+        """
+        Bulk loads sensor_data CSV exports (id, temperature, energy, person, datetime, household).
+
+        Files are streamed in chunks of chunk_size rows and every chunk is inserted with a
+        single executemany on the writer of each shard it touches (see log_readings), one
+        chunk at a time, so other writes interleave between chunks instead of timing out
+        and ingest listeners see the chunks in commit order.
+        The CSV id column is ignored, sensor_data assigns its own ids.
+
+        Returns a list of per-file stats dicts (path, rows, seconds, rows_per_sec); callback,
+        if given, is called with each dict as soon as its file is done.
+        """
+        paths = sorted(glob.glob(path_or_glob))
+        if not paths:
+            raise FileNotFoundError(f"No CSV files match {path_or_glob}")
+
+        results = []
+        for path in paths:
+            start = time.perf_counter()
+            total = 0
+            for chunk in self._read_csv_chunks(path, chunk_size):
+                self.log_readings(chunk).result()
+                total += len(chunk)
+            elapsed = time.perf_counter() - start
+            stats = {
+                'path': path,
+                'rows': total,
+                'seconds': elapsed,
+                'rows_per_sec': total / elapsed if elapsed > 0 else 0.0,
+            }
+            results.append(stats)
+            if callback is not None:
+                callback(stats)
+
+        return results
+
+    def _read_csv_chunks(self, path: str, chunk_size: int):
+        with open(path, newline='') as csv_file:
+            reader = csv.reader(csv_file)
+            header = [column.strip().lower() for column in next(reader)]
+            missing = [column for column in SENSOR_COLUMNS if column not in header]
+            if missing:
+                raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+            temperature, energy, person, date_time, household = (header.index(column) for column in SENSOR_COLUMNS)
+
+            chunk = []
+            for line in reader:
+                if not line:
+                    continue
+                chunk.append((
+                    float(line[temperature]),
+                    float(line[energy]),
+                    int(line[person]),
+                    line[date_time],
+                    line[household],
+                ))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def _get_temp_and_energy_data(self, household: str, columns=None, start=None, end=None,
+                                  limit=None, offset=None, after=None):
+        import pandas as pd
+
+        selected = '*' if columns is None else ', '.join(self._check_columns(columns, (*SENSOR_COLUMNS, 'ts')))
+        where, params = self._time_window(household, start, end, after)
+
+        if limit is not None or offset:
+            # Page over distinct reading times so a page never splits one datetime's rows
+            page = f"SELECT DISTINCT ts FROM sensor_data WHERE {where} ORDER BY ts LIMIT ? OFFSET ?"
+            query = f"SELECT {selected} FROM sensor_data WHERE household = ? AND ts IN ({page}) ORDER BY ts;"
+            params = [household, *params, -1 if limit is None else limit, offset or 0]
+        else:
+            query = f"SELECT {selected} FROM sensor_data WHERE {where} ORDER BY ts;"
+
+        with self.shards.pool_for(household).connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def _time_window(self, household: str, start=None, end=None, after=None):
+        conditions = ['household = ?']
+        params = [household]
+        if start is not None:
+            conditions.append('ts >= ?')
+            params.append(to_epoch(start))
+        if end is not None:
+            conditions.append('ts < ?')
+            params.append(to_epoch(end))
+        if after is not None:
+            conditions.append('ts > ?')
+            params.append(to_epoch(after))
+        return ' AND '.join(conditions), params
+
+    def _check_columns(self, columns, allowed):
+        unknown = [column for column in columns if column not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown sensor_data columns: {', '.join(unknown)}")
+        return list(columns)
+
+    def get_all_data(self, household: str, start=None, end=None, limit: int = None, offset: int = None,
+                     after=None, columns=None, aggregate: str = 'sql', bucket: int = None):
+        """
+        Returns the household's readings summed per datetime, oldest first.
+
+        Parameters:
+        - start, end: optional window [start, end) as datetime, "dd/mm/YYYY HH:MM" string or epoch seconds.
+        - limit, offset: optional page over the distinct datetimes in the window.
+        - after: keyset cursor, only datetimes strictly after this one (usually the last row of the previous page).
+        - columns: subset of temperature, energy, person to fetch; defaults to all three.
+        - aggregate: 'sql' groups inside SQLite, 'pandas' fetches raw rows and groups them in pandas.
+        - bucket: optional bucket width in seconds (sql only), e.g. 86400 for daily sums.
+        """
+        columns = self._check_columns(columns or VALUE_COLUMNS, VALUE_COLUMNS)
+        if aggregate not in ('sql', 'pandas'):
+            raise ValueError(f"Unknown aggregate mode: {aggregate}")
+        if bucket is not None and aggregate != 'sql':
+            raise ValueError("bucket is only supported with aggregate='sql'")
+        if bucket is not None and after is not None:
+            # Resume at the bucket following the one the cursor points into
+            first = (to_epoch(after) // bucket + 1) * bucket
+            start = first if start is None else max(to_epoch(start), first)
+            after = None
+
+        window = None if limit is None else (offset or 0) + limit
+        archived = self._read_archive(household, ['datetime', 'ts', *columns], start, end, after, window, bucket)
+        if archived is not None:
+            return self._union_archive(archived, household, columns, start, end, limit, offset, after, aggregate, bucket)
+        if aggregate == 'sql':
+            return self._get_aggregated_data(household, columns, start, end, limit, offset, after, bucket)
+
+        df = self._get_temp_and_energy_data(household, ['datetime', 'household', *columns],
+                                            start, end, limit, offset, after)
+        return self._group_by_datetime(df, columns)
+
+    def _group_by_datetime(self, df, columns):
+        aggregations = {"household": "last"}
+        aggregations.update({column: "sum" for column in VALUE_COLUMNS if column in columns})
+        data = df.groupby(['datetime'], as_index=False, sort=False).agg(aggregations)
+        return data
+
+    def _read_archive(self, household: str, columns, start=None, end=None, after=None, window=None, bucket=None):
+        if not self.archive.has_household(household):
+            return None
+        # A page only needs the archive's first window groups after the cursor
+        archived = self.archive.read(household, columns, to_epoch(start), to_epoch(end), to_epoch(after),
+                                     max_groups=window, bucket=bucket)
+        if archived is None or archived.empty:
             return None
+        return archived
 
-    def save_active_household(self, active_household: dict):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM active_household')
-            cursor.execute('''
-                INSERT INTO active_household (household_id, name)
-                VALUES (?, ?)
-            ''', (active_household['id'], active_household['name']))
-
-            conn.commit()
-
-    def _get_temp_and_energy_data(self, household: str):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            query = f"SELECT * FROM sensor_data WHERE household = ?;"
-            df = pd.read_sql_query(query, conn, params=(household, ))
-            conn.commit()
-            
-            return df
-        
-    def get_all_data(self, household: str):
-        df = self._get_temp_and_energy_data(household)
-        data = df.groupby(['datetime'], as_index=False).agg(
-            {"household":"last", "temperature":"sum", "energy":"sum", "person":"sum"}
+    def _union_archive(self, archived, household: str, columns, start, end, limit, offset, after, aggregate, bucket):
+        import pandas as pd
+
+        # The live query only needs enough groups to fill the requested page
+        window = None if limit is None else (offset or 0) + limit
+        if aggregate == 'sql':
+            live = self._get_aggregated_data(household, columns, start, end, window, None, after, bucket,
+                                             with_ts=True)
+        else:
+            live = self._get_temp_and_energy_data(household, ['datetime', 'household', 'ts', *columns],
+                                                  start, end, window, None, after)
+
+        if bucket is not None:
+            archived['ts'] = (archived['ts'] // bucket) * bucket
+            archived['datetime'] = archived['ts'].map(from_epoch)
+        archived['household'] = household
+
+        # Live rows can predate archived ones (a backfill after archiving) and a
+        # datetime or bucket can straddle the archive cutoff, so merge on ts
+        sums = [column for column in VALUE_COLUMNS if column in columns]
+        aggregations = {'datetime': 'first', 'household': 'last'}
+        aggregations.update({column: 'sum' for column in sums})
+        merged = pd.concat([archived, live], ignore_index=True).sort_values('ts', kind='stable')
+        data = merged.groupby('ts', sort=True).agg(aggregations)[['datetime', 'household', *sums]]
+        end_row = None if limit is None else (offset or 0) + limit
+        return data.iloc[(offset or 0):end_row].reset_index(drop=True)
+
+    def _get_aggregated_data(self, household: str, columns, start=None, end=None, limit=None, offset=None,
+                             after=None, bucket=None, with_ts: bool = False):
+        import pandas as pd
+
+        if bucket is None:
+            key = 'ts'
+            label = 'datetime'
+        else:
+            key = f'(ts / {int(bucket)}) * {int(bucket)}'
+            label = f"strftime('%d/%m/%Y %H:%M', {key}, 'unixepoch')"
+
+        where, params = self._time_window(household, start, end, after)
+        sums = ', '.join(f'SUM({column}) AS {column}' for column in VALUE_COLUMNS if column in columns)
+        selected = f"{label} AS datetime, household, {sums}" + (f", {key} AS ts" if with_ts else '')
+        query = (
+            f"SELECT {selected} FROM sensor_data WHERE {where} "
+            f"GROUP BY household, {key} ORDER BY {key} LIMIT ? OFFSET ?;"
         )
-        return data
-    
+        params += [-1 if limit is None else limit, offset or 0]
+
+        with self.shards.pool_for(household).connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def archive_older_than(self, days: int, batch_size: int = 100000) -> dict:
+        """
+        Moves sensor_data rows older than days into the Parquet archive (see backend.archive).
+
+        get_all_data and the regression loaders keep returning archived rows;
+        the rollup tables keep their totals.
+        """
+        cutoff = to_epoch(datetime.now() - timedelta(days=days))
+        totals = {'rows': 0, 'files': 0, 'households': 0}
+        for pool in self.shards.pools():
+            writer = self.shards.writer_at(pool.db_path)
+            for key, value in self.archive.archive(pool.get(), cutoff, batch_size, writer).items():
+                totals[key] += value
+        return totals
+
+    def export(self, path: str, households=None, start=None, end=None, fmt: str = None,
+               compress: bool = None, chunk_size: int = 100000) -> dict:
+        """
+        Streams households' readings (all households by default), archived rows
+        included, to a CSV or Parquet file in chunks of chunk_size rows.
+
+        The CSV layout matches what import_csv reads. See backend.export.export_sensor_data
+        for the format and compression options and the returned stats.
+        """
+        from backend.export import export_sensor_data
+
+        if households is None:
+            households = sorted(self.get_logged_households())
+        return export_sensor_data(lambda household: self.shards.pool_for(household).get(), self.archive, path,
+                                  households, to_epoch(start), to_epoch(end),
+                                  fmt=fmt, compress=compress, chunk_size=chunk_size)
+
+    def regression_cache(self, max_entries: int = 512):
+        """Returns a RegressionCache over this database that writes through the catalog's WriteQueue."""
+        from backend.linear_regression import RegressionCache
+
+        return RegressionCache(self.db_path, max_entries, writer=self.writer, archive_dir=self.archive.root)
+
+    def snapshots(self, root: str = None, keep: int = 2):
+        """
+        Returns a SnapshotManager for point-in-time copies of this database, its
+        shards and its archive. Analytics, plots and exports pointed at its
+        db_path (or at a LoggerModel opened on it) never hold up ingestion here.
+        """
+        from backend.snapshot import SnapshotManager
+
+        return SnapshotManager(self.db_path, root, archive_dir=self.archive.root, keep=keep)
+
+    def get_logged_households(self) -> set:
+        """Names of every household with readings, in any shard or in the archive."""
+        def distinct(pool):
+            with pool.connection() as conn:
+                return {row[0] for row in conn.execute('SELECT DISTINCT household FROM sensor_data')}
+
+        return set(self.archive.households()).union(*self.shards.fan_out(distinct))
+
+    def get_reading_arrays(self, household: str, columns=('ts', 'temperature', 'energy', 'person'),
+                           start=None, end=None) -> dict:
+        """
+        Returns {column: numpy array} of the household's raw readings in time order.
+
+        With a column store configured these are memmap views and no rows are
+        copied; otherwise they are read from sensor_data.
+        """
+        import numpy as np
+
+        start, end = to_epoch(start), to_epoch(end)
+        if self.column_store is not None:
+            return self.column_store.read(household, columns, start, end)
+
+        where, params = self._time_window(household, start, end)
+        with self.shards.pool_for(household).connection() as conn:
+            rows = conn.execute(f"SELECT {', '.join(columns)} FROM sensor_data WHERE {where} ORDER BY ts;",
+                                params).fetchall()
+        values = np.array(rows, dtype=float).reshape(-1, len(columns))
+        return {column: values[:, position].astype(np.int64) if column == 'ts' else values[:, position]
+                for position, column in enumerate(columns)}
+
+    def get_recent_data(self, household: str, hours: int = 1):
+        import pandas as pd
+
+        since = to_epoch(datetime.now() - timedelta(hours=hours))
+        with self.shards.pool_for(household).connection() as conn:
+            query = "SELECT * FROM sensor_data WHERE household = ? AND ts >= ? ORDER BY ts;"
+            return pd.read_sql_query(query, conn, params=(household, since))
+
     def _get_time_one_hour_ago(self):
         one_hour_ago = datetime.now() - timedelta(hours=1)
-        formatted_result = one_hour_ago.strftime("%d/%m/%Y %H:%M")
-        return formatted_result
\ No newline at end of file
+        formatted_result = one_hour_ago.strftime(DATETIME_FORMAT)
+        return formatted_result
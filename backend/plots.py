@@ -0,0 +1,124 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from backend.archive import open_archive
+from backend.linear_regression import RegressionStats
+from backend.shards import connect_read_only, sensor_db_paths
+
+
+def sample_indices(count: int, max_points: int, seed: int = 0):
+    """Sorted indices of at most max_points of count items, picked with a fixed seed so plots are reproducible."""
+    if max_points is None or count <= max_points:
+        return np.arange(count)
+    return np.sort(np.random.default_rng(seed).choice(count, max_points, replace=False))
+
+
+def downsample(x, y, max_points: int, seed: int = 0):
+    """Returns at most max_points (x, y) pairs, see sample_indices."""
+    keep = sample_indices(len(x), max_points, seed)
+    return x[keep], y[keep]
+
+
+class RegressionPlotter:
+    """
+    Draws regression scatter plots with the object-oriented Figure API, so
+    nothing touches pyplot's global state or needs a display.
+
+    Parameters:
+    - max_points: int, scatter points drawn per plot; larger datasets are downsampled.
+    - figsize: tuple, figure size in inches.
+    - dpi: int, resolution of raster output.
+    """
+
+    def __init__(self, max_points: int = 5000, figsize=(6.4, 4.8), dpi: int = 100):
+        self.max_points = max_points
+        self.figsize = figsize
+        self.dpi = dpi
+        self._figure = None
+        self._axes = None
+
+    def draw(self, axes, x, y, coef: float, intercept: float, xlabel='temperature', ylabel='energy', title=None):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        shown_x, shown_y = downsample(x, y, self.max_points)
+        axes.scatter(shown_x, shown_y, s=8, alpha=0.6)
+        if len(x):
+            line_x = np.array([x.min(), x.max()])
+            axes.plot(line_x, intercept + coef * line_x, color='red')
+        axes.set_xlabel(xlabel)
+        axes.set_ylabel(ylabel)
+        axes.set_title(title or 'Linear Regression Analysis')
+
+    def render(self, path: str, x, y, coef: float, intercept: float, **labels):
+        """
+        Writes the plot to path; the format follows the extension (png, svg, pdf...).
+        One off-screen figure is reused across calls.
+        """
+        if self._figure is None:
+            self._figure = Figure(figsize=self.figsize, dpi=self.dpi)
+            FigureCanvasAgg(self._figure)
+            self._axes = self._figure.add_subplot()
+        else:
+            self._axes.clear()
+        self.draw(self._axes, x, y, coef, intercept, **labels)
+        self._figure.savefig(path)
+        return path
+
+
+def _render_shard(db_path, households, out_dir, fmt, feature_column, target_column, max_points, archive_dir=None):
+    plotter = RegressionPlotter(max_points)
+    archive = open_archive(db_path, archive_dir)
+    paths = []
+    for db_file, names in sensor_db_paths(db_path, households).items():
+        conn = connect_read_only(db_file)
+        try:
+            for household in names:
+                values = np.array(conn.execute(
+                    f"SELECT {feature_column}, {target_column} FROM sensor_data "
+                    f"WHERE household = ? AND {feature_column} IS NOT NULL AND {target_column} IS NOT NULL",
+                    (household,)
+                ).fetchall(), dtype=float).reshape(-1, 2)
+                archived = None if archive is None else archive.read_table(household, [feature_column, target_column])
+                if archived is not None:
+                    archived = np.column_stack([archived.column(column).to_numpy(zero_copy_only=False)
+                                                for column in (feature_column, target_column)]).astype(float)
+                    values = np.vstack([archived[~np.isnan(archived).any(axis=1)], values])
+                stats = RegressionStats(1)
+                stats.update(values[:, :1], values[:, 1])
+                fit = stats.solve() or {'coef': [np.nan], 'intercept': np.nan}
+                path = os.path.join(out_dir, f"{household.replace(os.sep, '_')}.{fmt}")
+                plotter.render(path, values[:, 0], values[:, 1], fit['coef'][0], fit['intercept'],
+                               xlabel=feature_column, ylabel=target_column, title=household)
+                paths.append(path)
+        finally:
+            conn.close()
+    return paths
+
+
+def render_households(db_path: str, households, out_dir: str, fmt: str = 'png', workers: int = None,
+                      feature_column: str = 'temperature', target_column: str = 'energy', max_points: int = 5000,
+                      archive_dir: str = None):
+    """
+    Renders one regression plot file per household, archived readings included,
+    into out_dir using worker processes.
+
+    Returns the written paths in household order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    households = sorted(set(households))
+    workers = workers or os.cpu_count() or 1
+    shard_count = max(1, min(len(households), workers * 4))
+    shards = [households[index::shard_count] for index in range(shard_count)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_render_shard, db_path, shard, out_dir, fmt, feature_column, target_column, max_points,
+                            archive_dir)
+            for shard in shards if shard
+        ]
+        paths = [path for future in futures for path in future.result()]
+    return sorted(paths)
@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from backend.rollups import rebuild_rollups
+
+
+class HouseholdPurger:
+    """
+    Deletes a removed household's readings on a background thread.
+
+    Rows are deleted chunk_size at a time, each chunk a separate operation on
+    the shard's WriteQueue, so live logging interleaves with the purge instead
+    of waiting behind one long delete. Only rows logged before the purge was
+    requested (id <= the newest id of its file at that point) are removed, so a
+    household registered again under the same name keeps its new readings.
+    Afterwards the archive drops the same rows, the rollups and column store are
+    rebuilt from whatever readings remain, cached regressions of the household
+    are dropped and the freed pages are returned to the file system with
+    incremental vacuum, vacuum_pages at a time. Files created before
+    auto_vacuum was enabled keep the freed pages for reuse until they are
+    switched once with LoggerModel.enable_incremental_vacuum.
+
+    Parameters:
+    - model: LoggerModel the households belong to.
+    - chunk_size: int, rows deleted per transaction.
+    - vacuum_pages: int, pages released per incremental_vacuum step.
+    """
+
+    def __init__(self, model, chunk_size: int = 5000, vacuum_pages: int = 2048):
+        self.model = model
+        self.chunk_size = chunk_size
+        self.vacuum_pages = vacuum_pages
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def purge(self, household: str, progress=None) -> Future:
+        """
+        Queues the purge of household's readings and returns a Future of its stats dict
+        (household, rows, freed_bytes, seconds).
+
+        progress, if given, is called from the purge thread with a dict holding
+        household, phase ('deleting', 'vacuuming' or 'done'), rows, total and freed_bytes.
+        """
+        with self.model.shards.pool_for(household).connection() as conn:
+            # The newest id ever assigned in the file also bounds the household's archived rows
+            up_to_id = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'sensor_data'"
+                                    ).fetchone()[0]
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='household-purge', daemon=True)
+                self._thread.start()
+            self._queue.put((household, up_to_id, progress, future))
+        return future
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            household, up_to_id, progress, future = job
+            try:
+                future.set_result(self._purge(household, up_to_id, progress))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _purge(self, household: str, up_to_id: int, progress) -> dict:
+        start = time.perf_counter()
+        pool = self.model.shards.pool_for(household)
+        writer = self.model.shards.writer_for(household)
+        status = {'household': household, 'phase': 'deleting', 'rows': 0, 'total': 0, 'freed_bytes': 0}
+
+        def report(**changes):
+            status.update(changes)
+            if progress is not None:
+                progress(dict(status))
+
+        with pool.connection() as conn:
+            total = conn.execute('SELECT COUNT(*) FROM sensor_data WHERE household = ? AND id <= ?',
+                                 (household, up_to_id)).fetchone()[0]
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        report(total=total)
+
+        deleted = 0
+        while deleted < total:
+            count = writer.execute(self._delete_chunk, household, up_to_id, self.chunk_size)
+            if not count:
+                break
+            deleted += count
+            report(rows=deleted)
+
+        self.model.archive.remove_household(household, up_to_id)
+        rebuild_rollups(pool.get(), household, archive=self.model.archive, writer=writer)
+        self.model.writer.execute(self._drop_cached_regressions, household)
+        if self.model.column_store is not None:
+            # On the writer, so no ingest listener appends to the store while it is rewritten
+            writer.execute(self._rebuild_column_store, household)
+
+        report(phase='vacuuming')
+        freed = 0
+        while True:
+            pages = writer.submit_alone(self._vacuum_step, self.vacuum_pages).result()
+            if not pages:
+                break
+            freed += pages * page_size
+            report(freed_bytes=freed)
+
+        report(phase='done')
+        return {'household': household, 'rows': deleted, 'freed_bytes': freed, 'seconds': time.perf_counter() - start}
+
+    @staticmethod
+    def _delete_chunk(conn, household, up_to_id, chunk_size):
+        return conn.execute('''
+            DELETE FROM sensor_data WHERE id IN (
+                SELECT id FROM sensor_data WHERE household = ? AND id <= ? LIMIT ?
+            )
+        ''', (household, up_to_id, chunk_size)).rowcount
+
+    @staticmethod
+    def _drop_cached_regressions(conn, household):
+        conn.execute('DELETE FROM regression_cache WHERE household = ?', (household,))
+
+    def _rebuild_column_store(self, conn, household):
+        store = self.model.column_store
+        store.remove(household)
+        if (self.model.archive.has_household(household)
+                or conn.execute('SELECT 1 FROM sensor_data WHERE household = ? LIMIT 1', (household,)).fetchone()):
+            store.rebuild(self.model.db_path, household, archive_dir=self.model.archive.root)
+
+    @staticmethod
+    def _vacuum_step(conn, pages):
+        before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        # execute steps the pragma once, which frees a single page; executescript
+        # runs it to completion, hence WriteQueue.submit_alone
+        conn.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+        return before - conn.execute('PRAGMA freelist_count').fetchone()[0]
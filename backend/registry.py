@@ -0,0 +1,103 @@
+import threading
+
+
+def _household_key(household_id):
+    try:
+        return int(household_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class HouseholdRegistry:
+    """
+    In-memory copy of the households and active_household tables.
+
+    Loaded from SQLite on first use and then kept current by LoggerModel's
+    register/delete/activate methods, so name/id lookups from the UI never
+    touch the database. Call invalidate() if another process edits the tables.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._lock = threading.RLock()
+        self._by_id = None
+        self._by_name = None
+        self._active = None
+
+    def _ensure_loaded(self):
+        if self._by_id is not None:
+            return
+        with self.pool.connection() as conn:
+            households = conn.execute('SELECT id, household_name, current_person FROM households ORDER BY id').fetchall()
+            active = conn.execute('SELECT household_id, name FROM active_household').fetchone()
+        self._by_id = {}
+        self._by_name = {}
+        for household_id, name, current_person in households:
+            self._store(household_id, name, current_person)
+        self._active = {'id': active[0], 'name': active[1]} if active else None
+
+    def _store(self, household_id, name, current_person):
+        self._by_id[household_id] = {'id': household_id, 'name': name, 'current_person': current_person}
+        # Like the SELECT it replaces, a duplicated name resolves to its first row
+        self._by_name.setdefault(name, household_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._by_id = None
+            self._by_name = None
+            self._active = None
+
+    def get_by_name(self, name: str):
+        with self._lock:
+            self._ensure_loaded()
+            household_id = self._by_name.get(name)
+            if household_id is None:
+                return None
+            return {'id': household_id, 'name': name}
+
+    def get_id(self, name: str):
+        with self._lock:
+            self._ensure_loaded()
+            return self._by_name.get(name)
+
+    def get_by_id(self, household_id):
+        with self._lock:
+            self._ensure_loaded()
+            record = self._by_id.get(_household_key(household_id))
+            return dict(record) if record else None
+
+    def get_all(self):
+        with self._lock:
+            self._ensure_loaded()
+            return [{'id': record['id'], 'name': record['name']} for record in self._by_id.values()]
+
+    def get_active(self):
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._active) if self._active else None
+
+    def added(self, household_id: int, name: str, current_person: int):
+        with self._lock:
+            if self._by_id is not None:
+                self._store(household_id, name, current_person)
+
+    def removed(self, household_id):
+        key = _household_key(household_id)
+        with self._lock:
+            if self._by_id is None:
+                return
+            record = self._by_id.pop(key, None)
+            if record and self._by_name.get(record['name']) == key:
+                del self._by_name[record['name']]
+                for other in self._by_id.values():
+                    if other['name'] == record['name']:
+                        self._by_name[other['name']] = other['id']
+                        break
+            if self._active and self._active['id'] == key:
+                self._active = None
+
+    def activated(self, household_id, name: str):
+        key = _household_key(household_id)
+        with self._lock:
+            if self._by_id is not None:
+                self._active = {'id': household_id if key is None else key, 'name': name}
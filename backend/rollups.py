@@ -0,0 +1,232 @@
+from datetime import datetime, timezone
+
+
+# SQL expressions mapping an epoch column to the start of its period.
+BUCKETS = {
+    'hour': "(({0}) / 3600) * 3600",
+    'day': "(({0}) / 86400) * 86400",
+    'week': "((({0}) - 345600) / 604800) * 604800 + 345600",
+    'month': "CAST(strftime('%s', {0}, 'unixepoch', 'start of month') AS INTEGER)",
+    'year': "CAST(strftime('%s', {0}, 'unixepoch', 'start of year') AS INTEGER)",
+}
+
+# Maintained rollups, coarsest first.
+ROLLUPS = ('month', 'day', 'hour')
+
+# For every resolution, the coarsest rollup whose buckets nest inside it.
+RESOLUTIONS = {
+    'year': 'month',
+    'month': 'month',
+    'week': 'day',
+    'day': 'day',
+    'hour': 'hour',
+}
+
+# Archive columns folded into the rollups by rebuild_rollups.
+ARCHIVED_COLUMNS = ('ts', 'energy', 'temperature', 'person')
+
+# sensor_data shaped like a rollup, used when no rollup lines up with a query.
+RAW_SOURCE = '''(
+    SELECT household, ts AS bucket, energy, temperature AS temperature_sum,
+           temperature IS NOT NULL AS temperature_count, person AS person_sum, 1 AS readings
+    FROM sensor_data
+)'''
+
+# The same over sensor_data plus the archived rows loaded by load_archived_readings.
+RAW_ARCHIVED_SOURCE = '''(
+    SELECT household, ts AS bucket, energy, temperature AS temperature_sum,
+           temperature IS NOT NULL AS temperature_count, person AS person_sum, 1 AS readings
+    FROM (
+        SELECT household, ts, energy, temperature, person FROM sensor_data
+        UNION ALL
+        SELECT household, ts, energy, temperature, person FROM temp.archived_readings
+    )
+)'''
+
+
+def rollup_table(name: str) -> str:
+    return f'sensor_rollup_{name}'
+
+
+def create_rollup_tables(conn):
+    for name in ROLLUPS:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {rollup_table(name)} (
+                household TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                energy REAL NOT NULL DEFAULT 0,
+                temperature_sum REAL NOT NULL DEFAULT 0,
+                temperature_count INTEGER NOT NULL DEFAULT 0,
+                person_sum REAL NOT NULL DEFAULT 0,
+                readings INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (household, bucket)
+            ) WITHOUT ROWID
+        ''')
+
+
+def _merge_into_rollups(conn, where: str, params, source: str = 'sensor_data'):
+    for name in ROLLUPS:
+        bucket = BUCKETS[name].format('ts')
+        conn.execute(f'''
+            INSERT INTO {rollup_table(name)}
+                (household, bucket, energy, temperature_sum, temperature_count, person_sum, readings)
+            SELECT household, {bucket}, TOTAL(energy), TOTAL(temperature), COUNT(temperature), TOTAL(person), COUNT(*)
+            FROM {source}
+            WHERE ts IS NOT NULL AND {where}
+            GROUP BY household, {bucket}
+            ON CONFLICT (household, bucket) DO UPDATE SET
+                energy = energy + excluded.energy,
+                temperature_sum = temperature_sum + excluded.temperature_sum,
+                temperature_count = temperature_count + excluded.temperature_count,
+                person_sum = person_sum + excluded.person_sum,
+                readings = readings + excluded.readings
+        ''', params)
+
+
+def update_rollups(conn, after_id: int, until_id: int = None):
+    """
+    Folds the sensor_data rows with after_id < id <= until_id into every rollup.
+
+    Meant to run in the same transaction as the insert that created those rows.
+    """
+    # Without NOT INDEXED the planner walks the whole household index for the
+    # GROUP BY order instead of seeking the rowid range
+    if until_id is None:
+        _merge_into_rollups(conn, 'id > ?', (after_id,), 'sensor_data NOT INDEXED')
+    else:
+        _merge_into_rollups(conn, 'id > ? AND id <= ?', (after_id, until_id), 'sensor_data NOT INDEXED')
+
+
+def recompute_household_rollups(conn, household: str):
+    """Replaces household's rollup rows with totals of its rows now in sensor_data, in the caller's transaction."""
+    for name in ROLLUPS:
+        conn.execute(f'DELETE FROM {rollup_table(name)} WHERE household = ?', (household,))
+    _merge_into_rollups(conn, 'household = ?', (household,))
+
+
+def load_archived_readings(conn, household: str, table):
+    """Replaces the rows of temp.archived_readings with a pyarrow table of household's archived ARCHIVED_COLUMNS."""
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS archived_readings (
+            household TEXT, ts INTEGER, energy REAL, temperature REAL, person REAL
+        )
+    ''')
+    conn.execute('DELETE FROM temp.archived_readings')
+    conn.executemany('INSERT INTO temp.archived_readings VALUES (?, ?, ?, ?, ?)',
+                     ((household, *values) for values in zip(*(table.column(column).to_pylist()
+                                                              for column in ARCHIVED_COLUMNS))))
+
+
+def fold_archived_into_rollups(conn, household: str, table):
+    """Adds a pyarrow table of household's archived ARCHIVED_COLUMNS to every rollup, in the caller's transaction."""
+    load_archived_readings(conn, household, table)
+    _merge_into_rollups(conn, 'household = ?', (household,), 'temp.archived_readings')
+    conn.execute('DELETE FROM temp.archived_readings')
+
+
+def _recompute_with_archive(conn, household: str, archive):
+    recompute_household_rollups(conn, household)
+    if archive is not None:
+        for table in archive.iter_month_tables(household, ARCHIVED_COLUMNS):
+            fold_archived_into_rollups(conn, household, table)
+
+
+def _clear_rollups(conn):
+    for name in ROLLUPS:
+        conn.execute(f'DELETE FROM {rollup_table(name)}')
+
+
+def rebuild_rollups(conn, household: str = None, batch_size: int = 500000, archive=None, archived_households=None,
+                    writer=None):
+    """
+    Recomputes the rollups from sensor_data, for one household or for everything.
+
+    Use after backfills or any write that bypassed LoggerModel.insert_readings.
+    A full rebuild commits after every id batch (and archived month) to keep
+    write locks short. With an archive (backend.archive.SensorArchive) the
+    archived readings of household, or of archived_households (default: every
+    archived household) in a full rebuild, are folded in month by month, so
+    archived months keep their totals. With writer (the file's WriteQueue) each
+    transaction runs as an operation on it; conn is then only read from.
+    """
+    def run(operation, *args):
+        if writer is not None:
+            return writer.execute(operation, *args)
+        with conn:
+            return operation(conn, *args)
+
+    if household is not None:
+        run(_recompute_with_archive, household, archive)
+        return
+
+    run(_clear_rollups)
+    high = conn.execute('SELECT COALESCE(MAX(id), 0) FROM sensor_data').fetchone()[0]
+    for start in range(0, high, batch_size):
+        run(update_rollups, start, start + batch_size)
+    if archive is None:
+        return
+    for name in archive.households() if archived_households is None else archived_households:
+        for table in archive.iter_month_tables(name, ARCHIVED_COLUMNS):
+            run(fold_archived_into_rollups, name, table)
+
+
+def _is_aligned(ts: int, rollup: str) -> bool:
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    if rollup == 'hour':
+        return moment.minute == 0 and moment.second == 0
+    if rollup == 'day':
+        return moment.hour == 0 and _is_aligned(ts, 'hour')
+    return moment.day == 1 and _is_aligned(ts, 'day')
+
+
+def choose_rollup(resolution: str, start: int = None, end: int = None) -> str:
+    """
+    Picks the coarsest rollup that answers a summary at resolution exactly: one
+    that nests inside the resolution and whose buckets line up with start/end.
+    Returns None when only the raw sensor_data rows can answer it.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    for name in ROLLUPS[ROLLUPS.index(RESOLUTIONS[resolution]):]:
+        if all(bound is None or _is_aligned(bound, name) for bound in (start, end)):
+            return name
+    return None
+
+
+def summary_query(resolution: str, start: int = None, end: int = None, archived: bool = False):
+    """
+    Builds the SQL answering a per-period summary for one household.
+
+    Returns (query, params_after_household, source) where source is the rollup
+    name used, or None for raw rows. With archived, raw rows also include
+    temp.archived_readings (see load_archived_readings); the rollups already
+    count archived readings.
+    """
+    rollup = choose_rollup(resolution, start, end)
+    if rollup is not None:
+        source = rollup_table(rollup)
+    else:
+        source = RAW_ARCHIVED_SOURCE if archived else RAW_SOURCE
+    period = BUCKETS[resolution].format('bucket')
+
+    conditions = ['household = ?']
+    params = []
+    if start is not None:
+        conditions.append('bucket >= ?')
+        params.append(start)
+    if end is not None:
+        conditions.append('bucket < ?')
+        params.append(end)
+
+    query = f'''
+        SELECT strftime('%d/%m/%Y %H:%M', {period}, 'unixepoch') AS datetime, household,
+               TOTAL(energy) AS energy,
+               TOTAL(temperature_sum) / NULLIF(SUM(temperature_count), 0) AS temperature,
+               TOTAL(person_sum) / NULLIF(SUM(readings), 0) AS person,
+               SUM(readings) AS readings
+        FROM {source}
+        WHERE {' AND '.join(conditions)}
+        GROUP BY {period}
+        ORDER BY {period};
+    '''
+    return query, params, rollup
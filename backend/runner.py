@@ -0,0 +1,126 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backend.archive import open_archive
+from backend.linear_regression import RegressionStats
+from backend.shards import connect_read_only, sensor_db_paths
+
+
+def _analyse_household(conn, archive, household: str, feature_columns, target_column) -> dict:
+    columns = [*feature_columns, target_column, 'ts']
+    rows = conn.execute(f"SELECT {', '.join(columns)} FROM sensor_data WHERE household = ? ORDER BY ts",
+                        (household,)).fetchall()
+    values = np.array(rows, dtype=float).reshape(-1, len(columns))
+    archived = archive.read_table(household, columns) if archive is not None else None
+    if archived is not None:
+        archived = np.column_stack([archived.column(column).to_numpy(zero_copy_only=False) for column in columns])
+        values = np.vstack([archived.astype(float), values])
+
+    result = {'household': household, 'rows': len(values)}
+    if not len(values):
+        return result
+
+    timestamps = values[:, -1]
+    timestamps = timestamps[~np.isnan(timestamps)]
+    values = values[:, :-1]
+    values = values[~np.isnan(values).any(axis=1)]
+    stats = RegressionStats(len(feature_columns))
+    if len(values):
+        stats.update(values[:, :-1], values[:, -1])
+    fit = stats.solve()
+
+    result.update({
+        # Rows whose datetime could not be parsed have no ts
+        'first_ts': int(timestamps.min()) if len(timestamps) else None,
+        'last_ts': int(timestamps.max()) if len(timestamps) else None,
+        f'{target_column}_total': float(values[:, -1].sum()),
+        f'{target_column}_mean': float(values[:, -1].mean()) if len(values) else float('nan'),
+    })
+    for position, column in enumerate(feature_columns):
+        result[f'{column}_mean'] = float(values[:, position].mean()) if len(values) else float('nan')
+        result[f'coef_{column}'] = float(fit['coef'][position]) if fit else float('nan')
+    result['intercept'] = fit['intercept'] if fit else float('nan')
+    result['r2'] = fit['r2'] if fit else float('nan')
+    return result
+
+
+def _run_shard(db_path: str, shard: int, households, feature_columns, target_column, archive_dir: str = None):
+    start = time.perf_counter()
+    archive = open_archive(db_path, archive_dir)
+    results = []
+    for path, names in sensor_db_paths(db_path, households).items():
+        conn = connect_read_only(path)
+        try:
+            results.extend(_analyse_household(conn, archive, household, feature_columns, target_column)
+                           for household in names)
+        finally:
+            conn.close()
+    return os.getpid(), shard, results, time.perf_counter() - start
+
+
+class AnalyticsRunner:
+    """
+    Refits and summarises many households in parallel worker processes.
+
+    Households are split into shards that are handed out to a ProcessPoolExecutor;
+    each worker opens its own read-only SQLite connection. Results are merged in
+    household order, so the output does not depend on scheduling.
+
+    Parameters:
+    - db_path: path of the records database.
+    - workers: int, number of processes (defaults to the CPU count).
+    - feature_columns: list of str, sensor_data columns used as features.
+    - target_column: str, sensor_data column to predict.
+    - shards_per_worker: int, shards per process, more shards balance uneven households better.
+    - archive_dir: Parquet archive directory, defaults to 'archive' next to db_path.
+    """
+
+    def __init__(self, db_path: str = 'exdata/records.db', workers: int = None, feature_columns=('temperature',),
+                 target_column: str = 'energy', shards_per_worker: int = 4, archive_dir: str = None):
+        self.db_path = db_path
+        self.workers = workers or os.cpu_count() or 1
+        self.feature_columns = list(feature_columns)
+        self.target_column = target_column
+        self.shards_per_worker = shards_per_worker
+        self.archive_dir = archive_dir
+
+    def run_registered(self, model):
+        """Runs every household registered in a LoggerModel."""
+        return self.run([household['name'] for household in model.get_registered_households()])
+
+    def run(self, households):
+        """
+        Returns (results, timings): one results row per household and one timings
+        row per worker process with the shards, households and seconds it spent.
+        """
+        households = sorted(set(households))
+        shard_count = max(1, min(len(households), self.workers * self.shards_per_worker))
+        shards = [households[index::shard_count] for index in range(shard_count)]
+
+        outputs = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(_run_shard, self.db_path, index, shard, self.feature_columns, self.target_column,
+                                self.archive_dir)
+                for index, shard in enumerate(shards) if shard
+            ]
+            for future in futures:
+                outputs.append(future.result())
+
+        rows = [result for _, _, results, _ in outputs for result in results]
+        results = pd.DataFrame(rows, columns=None if rows else ['household'])
+        results = results.sort_values('household', ignore_index=True)
+
+        timings = pd.DataFrame(
+            [{'pid': pid, 'shard': shard, 'households': len(shard_results), 'seconds': seconds}
+             for pid, shard, shard_results, seconds in outputs],
+            columns=['pid', 'shard', 'households', 'seconds'],
+        )
+        timings = timings.groupby('pid', as_index=False).agg(
+            shards=('shard', 'count'), households=('households', 'sum'), seconds=('seconds', 'sum')
+        )
+        return results, timings
@@ -0,0 +1,210 @@
+import calendar
+from datetime import datetime, timezone
+
+from backend.rollups import _merge_into_rollups, create_rollup_tables, rebuild_rollups
+
+
+DATETIME_FORMAT = "%d/%m/%Y %H:%M"
+
+# Column order of reading tuples passed to LoggerModel.insert_readings
+SENSOR_COLUMNS = ('temperature', 'energy', 'person', 'datetime', 'household')
+VALUE_COLUMNS = ('temperature', 'energy', 'person')
+
+
+def epoch_sql(column: str) -> str:
+    """
+    SQL expression turning a "dd/mm/YYYY HH:MM" column into the epoch seconds to_epoch
+    returns. Readings are naive local times; ts stores the same wall clock time
+    as if it were UTC. Like strptime, it accepts fields without zero padding
+    ("23/12/2023 0:00"); CAST keeps the leading number of each remaining piece.
+    """
+    month = f"substr({column}, instr({column}, '/') + 1)"
+    year = f"substr({month}, instr({month}, '/') + 1)"
+    clock = f"substr({year}, instr({year}, ' ') + 1)"
+    minute = f"substr({clock}, instr({clock}, ':') + 1)"
+    date = (f"printf('%04d-%02d-%02d', CAST({year} AS INTEGER), CAST({month} AS INTEGER), "
+            f"CAST({column} AS INTEGER))")
+    return (f"(CAST(strftime('%s', {date}) AS INTEGER) "
+            f"+ CAST({clock} AS INTEGER) * 3600 + CAST({minute} AS INTEGER) * 60)")
+
+
+def to_epoch(value) -> int:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.strptime(value, DATETIME_FORMAT)
+    return calendar.timegm(value.timetuple())
+
+
+def from_epoch(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(DATETIME_FORMAT)
+
+
+def _create_base_tables(conn, batch_size):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS households (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            household_name TEXT,
+            current_person INTEGER
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS active_household (
+            household_id INTEGER REFERENCES households(id),
+            name TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sensor_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            temperature REAL,
+            energy REAL,
+            person INTEGER,
+            datetime TEXT,
+            household TEXT
+        )
+    ''')
+    conn.commit()
+
+
+def _add_sensor_data_ts(conn, batch_size):
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(sensor_data)')]
+    if 'ts' not in columns:
+        conn.execute('ALTER TABLE sensor_data ADD COLUMN ts INTEGER')
+        conn.commit()
+
+    # Backfill in id ranges so the write lock is released between batches and an
+    # interrupted migration simply resumes where it stopped.
+    low, high = conn.execute('SELECT MIN(id), MAX(id) FROM sensor_data WHERE ts IS NULL').fetchone()
+    if low is not None:
+        expression = epoch_sql('datetime')
+        for start in range(low, high + 1, batch_size):
+            conn.execute(
+                f'UPDATE sensor_data SET ts = {expression} WHERE id >= ? AND id < ? AND ts IS NULL',
+                (start, start + batch_size)
+            )
+            conn.commit()
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sensor_data_household_ts ON sensor_data (household, ts)')
+    _create_fill_ts_trigger(conn)
+    conn.commit()
+
+
+def _create_fill_ts_trigger(conn):
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS sensor_data_fill_ts AFTER INSERT ON sensor_data
+        WHEN NEW.ts IS NULL AND NEW.datetime IS NOT NULL
+        BEGIN
+            UPDATE sensor_data SET ts = {epoch_sql('NEW.datetime')} WHERE id = NEW.id;
+        END
+    ''')
+
+
+def _add_rollup_tables(conn, batch_size):
+    create_rollup_tables(conn)
+    conn.commit()
+    rebuild_rollups(conn, batch_size=batch_size)
+
+
+def _add_regression_cache(conn, batch_size):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS regression_cache (
+            household TEXT NOT NULL,
+            features TEXT NOT NULL,
+            target TEXT NOT NULL,
+            test_size REAL NOT NULL,
+            random_state TEXT NOT NULL,
+            watermark INTEGER NOT NULL,
+            result TEXT NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (household, features, target, test_size, random_state)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_regression_cache_last_used ON regression_cache (last_used)')
+    conn.commit()
+
+
+def _add_sensor_shards(conn, batch_size):
+    # Households listed here keep their sensor_data (and rollups) in the given
+    # shard file, relative to this database's directory; see backend.shards
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sensor_shards (
+            household TEXT PRIMARY KEY,
+            path TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def _enable_incremental_vacuum(conn, batch_size):
+    # Kept so schema versions stay stable. New files get auto_vacuum from the
+    # connection pragmas; an existing file only switches on a VACUUM, which
+    # rewrites all of it, so that is left to enable_incremental_vacuum
+    pass
+
+
+def enable_incremental_vacuum(conn) -> bool:
+    """
+    Switches an existing database file to auto_vacuum=INCREMENTAL so purges can
+    return freed pages to the file system (see backend.purge).
+
+    This runs a full VACUUM: it rewrites the whole file, needs free disk space of
+    up to twice its size, and holds the write lock until done, so run it while
+    nothing else writes. conn must not be in a transaction. Returns False if the
+    file was already switched.
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        return False
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+    return True
+
+
+def _repair_unpadded_ts(conn, batch_size):
+    # Earlier versions parsed datetime at fixed offsets, leaving ts NULL for
+    # readings like "23/12/2023 0:00"; those rows were also missing from the
+    # rollups, so each repaired batch is folded in with its backfill
+    conn.execute('DROP TRIGGER IF EXISTS sensor_data_fill_ts')
+    _create_fill_ts_trigger(conn)
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS repaired_ts (id INTEGER PRIMARY KEY)')
+    conn.commit()
+
+    low, high = conn.execute('SELECT MIN(id), MAX(id) FROM sensor_data WHERE ts IS NULL').fetchone()
+    if low is not None:
+        expression = epoch_sql('datetime')
+        for start in range(low, high + 1, batch_size):
+            conn.execute('DELETE FROM repaired_ts')
+            conn.execute('INSERT INTO repaired_ts SELECT id FROM sensor_data WHERE id >= ? AND id < ? AND ts IS NULL',
+                         (start, start + batch_size))
+            conn.execute(f'UPDATE sensor_data SET ts = {expression} WHERE id IN (SELECT id FROM repaired_ts)')
+            _merge_into_rollups(conn, 'id IN (SELECT id FROM repaired_ts)', ())
+            conn.commit()
+    conn.execute('DROP TABLE repaired_ts')
+    conn.commit()
+
+
+MIGRATIONS = [
+    _create_base_tables,
+    _add_sensor_data_ts,
+    _add_rollup_tables,
+    _add_regression_cache,
+    _add_sensor_shards,
+    _enable_incremental_vacuum,
+    _repair_unpadded_ts,
+]
+
+
+def migrate(conn, batch_size: int = 50000) -> int:
+    """
+    Applies every migration newer than the database's PRAGMA user_version.
+
+    Returns the schema version the database ends up at.
+    """
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        migration(conn, batch_size)
+        conn.execute(f'PRAGMA user_version = {number}')
+        conn.commit()
+    return len(MIGRATIONS)
@@ -0,0 +1,231 @@
+import os
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+from backend.connection import ConnectionPool, WriteQueue
+from backend.schema import migrate
+
+
+def shard_file_name(db_path: str, household: str, shard_count: int = None) -> str:
+    """
+    Shard path relative to the catalog's directory: <catalog>-shards/<household>.db,
+    or <catalog>-shards/shard-NNN.db when households are hashed into shard_count files.
+    """
+    directory = f"{os.path.splitext(os.path.basename(db_path))[0]}-shards"
+    if shard_count:
+        return os.path.join(directory, f"shard-{zlib.crc32(household.encode()) % shard_count:03d}.db")
+    return os.path.join(directory, f"{quote(household, safe='')}.db")
+
+
+def _load_shard_map(conn, db_path: str) -> dict:
+    try:
+        rows = conn.execute('SELECT household, path FROM sensor_shards').fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    directory = os.path.dirname(os.path.abspath(db_path))
+    return {household: os.path.join(directory, path) for household, path in rows}
+
+
+def lookup_shard(conn, db_path: str, household: str) -> str:
+    """Path of household's shard read through an open catalog connection, or None if it has none."""
+    try:
+        row = conn.execute('SELECT path FROM sensor_shards WHERE household = ?', (household,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), row[0]) if row else None
+
+
+def sensor_db_paths(db_path: str, households=None) -> dict:
+    """
+    Returns {database path: households} saying which file holds whose sensor_data.
+
+    Households without a sensor_shards entry live in db_path itself. With
+    households=None every file is listed with None, meaning all its rows.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        shard_map = _load_shard_map(conn, db_path)
+    finally:
+        conn.close()
+    if households is None:
+        return dict.fromkeys([db_path, *sorted(set(shard_map.values()))])
+    grouped = {}
+    for household in households:
+        grouped.setdefault(shard_map.get(household, db_path), []).append(household)
+    return grouped
+
+
+def connect_read_only(db_path: str):
+    return sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+
+
+def sensor_db_path(db_path: str, household: str) -> str:
+    """The database file holding household's sensor_data."""
+    return next(iter(sensor_db_paths(db_path, [household])))
+
+
+def gather(futures) -> Future:
+    """Future that resolves to the list of results once every future has, or to the first error."""
+    futures = list(futures)
+    combined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] or combined.done():
+                return
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            combined.set_exception(errors[0])
+        else:
+            combined.set_result([future.result() for future in futures])
+
+    if not futures:
+        combined.set_result([])
+    for future in futures:
+        future.add_done_callback(done)
+    return combined
+
+
+class ShardSet:
+    """
+    Routes sensor_data access to the database file that holds each household.
+
+    The catalog database (db_path) keeps households, active_household and the
+    sensor_shards map. With sharded=True, households seen for the first time
+    get their own file in a <catalog>-shards directory (or one of shard_count
+    hashed files), each with its own connection pool and single writer, so ingest for
+    different shards no longer serialises on one lock. Households without a
+    map entry keep using the catalog file, so unsharded databases work unchanged.
+
+    Parameters:
+    - pool, writer: the catalog's ConnectionPool and WriteQueue.
+    - sharded: bool, place new households in shard files.
+    - shard_count: int, hash households into this many files instead of one each.
+    """
+
+    def __init__(self, pool: ConnectionPool, writer: WriteQueue, sharded: bool = False, shard_count: int = None):
+        self.pool = pool
+        self.writer = writer
+        self.sharded = sharded
+        self.shard_count = shard_count
+        self.directory = os.path.dirname(os.path.abspath(pool.db_path))
+        self._paths = None
+        self._pools = {pool.db_path: pool}
+        self._writers = {pool.db_path: writer}
+        self._lock = threading.RLock()
+
+    def _shard_map(self) -> dict:
+        with self._lock:
+            if self._paths is None:
+                self._paths = _load_shard_map(self.pool.get(), self.pool.db_path)
+            return self._paths
+
+    def path_for(self, household: str, create: bool = False) -> str:
+        """The file holding household's rows; with create, assigns a shard to a new household."""
+        with self._lock:
+            path = self._shard_map().get(household)
+            if path is not None:
+                return path
+            if not (create and self.sharded):
+                return self.pool.db_path
+            # Households logged before sharding was enabled keep their rows in the catalog
+            if self.pool.get().execute('SELECT 1 FROM sensor_data WHERE household = ? LIMIT 1', (household,)).fetchone():
+                self._paths[household] = self.pool.db_path
+                return self.pool.db_path
+            name = shard_file_name(self.pool.db_path, household, self.shard_count)
+            os.makedirs(os.path.dirname(os.path.join(self.directory, name)), exist_ok=True)
+            name = self.writer.execute(self._add_shard, household, name)
+            path = self._paths[household] = os.path.join(self.directory, name)
+            return path
+
+    def known_path(self, household: str) -> str:
+        """
+        The file holding household's rows as far as this ShardSet has seen, without
+        locking, so writer callbacks can call it while path_for waits on a writer.
+        """
+        return (self._paths or {}).get(household, self.pool.db_path)
+
+    @staticmethod
+    def _add_shard(conn, household, name):
+        # Another process may have placed the household first; its choice wins
+        conn.execute('INSERT OR IGNORE INTO sensor_shards (household, path) VALUES (?, ?)', (household, name))
+        return conn.execute('SELECT path FROM sensor_shards WHERE household = ?', (household,)).fetchone()[0]
+
+    def pool_at(self, path: str) -> ConnectionPool:
+        with self._lock:
+            pool = self._pools.get(path)
+            if pool is None:
+                pool = ConnectionPool(path, self.pool.pragmas, self.pool.instrumentation, self.pool.read_only)
+                if not pool.read_only:
+                    migrate(pool.get())
+                self._pools[path] = pool
+                self._writers[path] = WriteQueue(pool)
+            return pool
+
+    def pool_for(self, household: str, create: bool = False) -> ConnectionPool:
+        return self.pool_at(self.path_for(household, create))
+
+    def writer_for(self, household: str, create: bool = False) -> WriteQueue:
+        return self.writer_at(self.path_for(household, create))
+
+    def writer_at(self, path: str) -> WriteQueue:
+        self.pool_at(path)
+        return self._writers[path]
+
+    def paths(self) -> list:
+        """Every database file that may hold sensor_data, the catalog first."""
+        return [self.pool.db_path, *sorted(set(self._shard_map().values()) - {self.pool.db_path})]
+
+    def pools(self) -> list:
+        return [self.pool_at(path) for path in self.paths()]
+
+    def group(self, rows, household_position: int = -1, create: bool = True) -> dict:
+        """Splits rows by the file their household lives in: {path: rows}."""
+        grouped = {}
+        paths = {}
+        for row in rows:
+            household = row[household_position]
+            path = paths.get(household)
+            if path is None:
+                path = paths[household] = self.path_for(household, create)
+            grouped.setdefault(path, []).append(row)
+        return grouped
+
+    def write(self, rows, operation, household_position: int = -1, committed=None) -> Future:
+        """
+        Queues operation(conn, shard_rows) on the writer of every shard the rows touch.
+        committed(shard_rows), if given, runs on that shard's writer once its rows have committed.
+        """
+        futures = []
+        for path, shard_rows in self.group(rows, household_position).items():
+            writer = self.writer_at(path)
+            if committed is None:
+                futures.append(writer.submit(operation, shard_rows))
+            else:
+                futures.append(writer.submit_then(lambda _, shard_rows=shard_rows: committed(shard_rows),
+                                                  operation, shard_rows))
+        return futures[0] if len(futures) == 1 else gather(futures)
+
+    def fan_out(self, function, max_workers: int = None) -> list:
+        """Runs function(pool) for every shard in parallel threads and returns the results in paths() order."""
+        pools = self.pools()
+        if len(pools) == 1:
+            return [function(pools[0])]
+        with ThreadPoolExecutor(max_workers=max_workers or min(len(pools), 8)) as executor:
+            return list(executor.map(function, pools))
+
+    def close(self):
+        with self._lock:
+            for path, writer in self._writers.items():
+                if path != self.pool.db_path:
+                    writer.close()
+            for path, pool in self._pools.items():
+                if path != self.pool.db_path:
+                    pool.close()
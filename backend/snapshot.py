@@ -0,0 +1,142 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from backend.archive import default_archive_dir
+from backend.shards import sensor_db_paths
+
+
+class SnapshotManager:
+    """
+    Point-in-time copies of the records database for long-running analytics.
+
+    refresh() copies the catalog and every shard file with the SQLite online
+    backup API. Each file is copied in a single step, so the copy is one
+    consistent read transaction, which WAL writers never wait for. The copies
+    are switched to rollback journaling so they can be opened read-only. The
+    archive's Parquet files are hard-linked (copied where linking fails) into
+    the snapshot, so archived rows are point-in-time too.
+
+    Generations are built under root/.tmp-* and renamed to root/gen-<time>
+    once complete; db_path always points at the newest one and the newest
+    keep generations are kept, so readers of an older one are not cut off
+    by a refresh.
+
+    Parameters:
+    - db_path: path of the live records database.
+    - root: directory holding the generations, defaults to <db>-snapshots next to it.
+    - archive_dir: live archive directory, defaults to 'archive' next to db_path.
+    - keep: int, number of generations kept.
+    """
+
+    def __init__(self, db_path: str, root: str = None, archive_dir: str = None, keep: int = 2):
+        self.source = db_path
+        stem = os.path.splitext(os.path.basename(db_path))[0]
+        self.root = root or os.path.join(os.path.dirname(os.path.abspath(db_path)), f'{stem}-snapshots')
+        self.archive_dir = archive_dir or default_archive_dir(db_path)
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+        self._timer = None
+        self._stop = threading.Event()
+
+    def generations(self) -> list:
+        """Completed generation directories, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return [os.path.join(self.root, name) for name in sorted(os.listdir(self.root)) if name.startswith('gen-')]
+
+    def latest(self) -> str:
+        """Path of the newest snapshot's database, or None if there is none yet."""
+        generations = self.generations()
+        if not generations:
+            return None
+        return os.path.join(generations[-1], os.path.basename(self.source))
+
+    @property
+    def db_path(self) -> str:
+        """The newest snapshot's database, taking the first snapshot if needed."""
+        return self.latest() or self.refresh()['db_path']
+
+    def age(self) -> float:
+        """Seconds since the newest snapshot was taken, or None."""
+        latest = self.latest()
+        return time.time() - os.path.getmtime(os.path.dirname(latest)) if latest else None
+
+    def refresh(self) -> dict:
+        """Takes a new snapshot; returns its db_path, files, bytes and seconds."""
+        with self._lock:
+            start = time.perf_counter()
+            os.makedirs(self.root, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+            building = os.path.join(self.root, f'.tmp-{stamp}')
+            os.makedirs(building)
+            try:
+                source_dir = os.path.dirname(os.path.abspath(self.source))
+                files = 0
+                for path in sensor_db_paths(self.source):
+                    target = os.path.join(building, os.path.relpath(os.path.abspath(path), source_dir))
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    self._backup(path, target)
+                    files += 1
+                if os.path.isdir(self.archive_dir):
+                    self._link_tree(self.archive_dir, os.path.join(building, 'archive'))
+                generation = os.path.join(self.root, f'gen-{stamp}')
+                os.rename(building, generation)
+            except BaseException:
+                shutil.rmtree(building, ignore_errors=True)
+                raise
+
+            for old in self.generations()[:-self.keep]:
+                shutil.rmtree(old, ignore_errors=True)
+            size = sum(os.path.getsize(os.path.join(directory, name))
+                       for directory, _, names in os.walk(generation) for name in names if name.endswith('.db'))
+            return {
+                'db_path': os.path.join(generation, os.path.basename(self.source)),
+                'files': files,
+                'bytes': size,
+                'seconds': time.perf_counter() - start,
+            }
+
+    def _backup(self, path: str, target: str):
+        source = sqlite3.connect(path)
+        destination = sqlite3.connect(target)
+        try:
+            source.backup(destination)
+            destination.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            destination.close()
+            source.close()
+
+    def _link_tree(self, source: str, target: str):
+        for directory, _, names in os.walk(source):
+            relative = os.path.relpath(directory, source)
+            os.makedirs(os.path.join(target, relative), exist_ok=True)
+            for name in names:
+                if not name.endswith('.parquet'):
+                    continue
+                origin, copy = os.path.join(directory, name), os.path.join(target, relative, name)
+                try:
+                    os.link(origin, copy)
+                except OSError:
+                    shutil.copy2(origin, copy)
+
+    def start(self, interval: float):
+        """Refreshes every interval seconds on a background thread until stop()."""
+        self.stop()
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.refresh()
+
+        self._timer = threading.Thread(target=loop, name='snapshot-refresh', daemon=True)
+        self._timer.start()
+
+    def stop(self):
+        if self._timer is not None:
+            self._stop.set()
+            self._timer.join()
+            self._timer = None
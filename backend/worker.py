@@ -0,0 +1,117 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    progress = pyqtSignal(str)
+
+
+class Task:
+    """
+    Runs function(*args, **kwargs) on a TaskRunner thread and reports back
+    through signals, which Qt delivers on the thread that created the task.
+    """
+
+    def __init__(self, function, *args, **kwargs):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self.cancelled = False
+        self.future = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        # Always emit so the runner can account for the task; results of
+        # cancelled tasks are dropped on the receiving side.
+        if self.cancelled:
+            self.signals.finished.emit(None)
+            return
+        try:
+            result = self.function(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(e)
+            return
+        self.signals.finished.emit(result)
+
+
+class TaskRunner(QObject):
+    """
+    Submits controller work to a thread pool so the GUI thread never blocks.
+
+    The pool's threads are Python threads that live as long as the runner, so
+    each keeps its pooled SQLite connection (see backend.connection) across
+    tasks. QThreadPool threads are not Python threads: their Python thread state,
+    and with it every thread-local connection, is dropped after each task.
+
+    Tasks submitted with a key supersede each other: a new task under a key
+    cancels the previous one, which is dropped from the queue if it has not started and has
+    its result discarded if it has. Tasks without a key (writes) always
+    run to completion. status carries a message for the status bar
+    while anything is running and an empty string once everything is done.
+    """
+
+    status = pyqtSignal(str)
+
+    def __init__(self, max_workers: int = None):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1),
+                                           thread_name_prefix='task-runner')
+        self._latest = {}
+        self._running = {}
+
+    def submit(self, key, function, *args, on_result=None, on_error=None, message: str = None, **kwargs) -> Task:
+        if key is not None:
+            self.cancel(key)
+
+        task = Task(function, *args, **kwargs)
+        task.signals.finished.connect(lambda result: self._finish(task, on_result, result))
+        task.signals.failed.connect(lambda error: self._finish(task, on_error, error))
+        task.signals.progress.connect(self.status.emit)
+        if key is not None:
+            self._latest[key] = task
+        self._running[task] = message or "Working..."
+        self._report()
+        task.future = self.executor.submit(task.run)
+        return task
+
+    def cancel(self, key: str):
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+            if task.future.cancel():
+                self._done(task)
+
+    def pending(self) -> int:
+        return len(self._running)
+
+    def close(self):
+        """Drops queued tasks and waits for the running ones to finish."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def _finish(self, task: Task, callback, value):
+        self._done(task)
+        if callback is not None and not task.cancelled:
+            callback(value)
+
+    def _done(self, task: Task):
+        self._running.pop(task, None)
+        for key, latest in list(self._latest.items()):
+            if latest is task:
+                del self._latest[key]
+        self._report()
+
+    def _report(self):
+        if not self._running:
+            self.status.emit("")
+            return
+        message = next(reversed(self._running.values()))
+        if len(self._running) > 1:
+            message = f"{message} ({len(self._running)} tasks running)"
+        self.status.emit(message)
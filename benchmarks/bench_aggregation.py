@@ -0,0 +1,58 @@
+"""
+Compares LoggerModel.get_all_data aggregated in SQLite against the pandas groupby path.
+
+    python -m benchmarks.bench_aggregation --sizes 10000 1000000 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from backend.model import LoggerModel
+from benchmarks.synthetic import generate
+
+
+SENSORS = 3
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run(sizes, repeat: int = 3):
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            model = LoggerModel(os.path.join(directory, 'bench.db'))
+            household = generate(model, 1, size // SENSORS, sensors=SENSORS, prefix='BENCHMARK')[0]
+            for mode in ('sql', 'pandas'):
+                timings = []
+                for _ in range(repeat):
+                    data, elapsed, peak = measure(lambda: model.get_all_data(household, aggregate=mode))
+                    timings.append(elapsed)
+                results.append({
+                    'rows': size,
+                    'mode': mode,
+                    'groups': len(data),
+                    'seconds': min(timings),
+                    'peak_mb': peak / 2 ** 20,
+                })
+            model.close()
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(run(args.sizes, args.repeat).to_string(index=False))
@@ -0,0 +1,110 @@
+"""
+Stress test of concurrent writers and readers against one database.
+
+Writer threads log small batches of readings while reader threads query
+summaries and raw rows. "queue" routes every write through LoggerModel's
+single WriteQueue; "sharded" does the same with one shard file, and so one
+writer, per household; "direct" has each writer thread commit on its own
+pooled connection, the way writes were done before.
+
+    python -m benchmarks.bench_concurrency --writers 8 --readers 4 --seconds 5
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.model import LoggerModel
+
+
+def make_rows(writer: int, batch: int, sequence: int):
+    base = 1704067200 + sequence * batch * 60
+    return [(20.0 + i % 10, 50.0 + i % 30, 1 + i % 4,
+             time.strftime('%d/%m/%Y %H:%M', time.gmtime(base + i * 60)), f"HOUSEHOLD {writer}")
+            for i in range(batch)]
+
+
+def direct_write(model: LoggerModel, rows) -> None:
+    with model.pool.connection() as conn:
+        model.insert_readings(conn, rows)
+
+
+def run(mode: str, writers: int, readers: int, seconds: float, batch: int) -> list:
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'bench.db')
+        model = LoggerModel(db_path, sharded=mode == 'sharded')
+        stop = threading.Event()
+        latencies = {'write': [], 'read': []}
+        errors = {'write': 0, 'read': 0}
+        lock = threading.Lock()
+
+        def record(kind, function):
+            start = time.perf_counter()
+            try:
+                function()
+            except sqlite3.OperationalError:
+                with lock:
+                    errors[kind] += 1
+                return
+            with lock:
+                latencies[kind].append(time.perf_counter() - start)
+
+        def writer(number):
+            sequence = 0
+            while not stop.is_set():
+                rows = make_rows(number, batch, sequence)
+                if mode in ('queue', 'sharded'):
+                    record('write', lambda: model.log_readings(rows).result())
+                else:
+                    record('write', lambda: direct_write(model, rows))
+                sequence += 1
+
+        def reader(number):
+            household = f"HOUSEHOLD {number % max(writers, 1)}"
+            while not stop.is_set():
+                record('read', lambda: model.get_summary(household, 'day'))
+                record('read', lambda: model._get_temp_and_energy_data(household, limit=100))
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        model.close()
+
+    results = []
+    for kind, values in latencies.items():
+        values = np.array(values) * 1000
+        results.append({
+            'mode': mode,
+            'kind': kind,
+            'ops_per_sec': len(values) / seconds,
+            'rows_per_sec': len(values) * batch / seconds if kind == 'write' else None,
+            'p50_ms': np.percentile(values, 50) if len(values) else None,
+            'p99_ms': np.percentile(values, 99) if len(values) else None,
+            'errors': errors[kind],
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--batch', type=int, default=50, help="readings per write")
+    parser.add_argument('--modes', nargs='+', choices=['queue', 'sharded', 'direct'],
+                        default=['direct', 'queue', 'sharded'])
+    args = parser.parse_args()
+    results = []
+    for mode in args.modes:
+        results.extend(run(mode, args.writers, args.readers, args.seconds, args.batch))
+    print(pd.DataFrame(results).to_string(index=False))
@@ -0,0 +1,70 @@
+"""
+Compares BatchLinearRegression against fitting sklearn's LinearRegression once per household.
+
+    python -m benchmarks.bench_regression --households 100 500 --rows 2000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from backend.linear_regression import BatchLinearRegression
+from backend.model import LoggerModel
+from benchmarks.synthetic import generate
+
+
+FEATURES = ['temperature', 'person']
+
+
+def per_household_loop(db_path: str) -> pd.DataFrame:
+    results = []
+    with sqlite3.connect(db_path) as conn:
+        names = [row[0] for row in conn.execute('SELECT DISTINCT household FROM sensor_data')]
+        for name in names:
+            df = pd.read_sql_query('SELECT * FROM sensor_data WHERE household = ?;', conn, params=(name,))
+            lr = LinearRegression().fit(df[FEATURES], df['energy'])
+            results.append({'household': name, 'intercept': lr.intercept_, 'coefs': lr.coef_})
+    conn.close()
+    return pd.DataFrame(results).sort_values('household', ignore_index=True)
+
+
+def run(household_counts, rows: int):
+    results = []
+    for households in household_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, 'bench.db')
+            model = LoggerModel(db_path)
+            generate(model, households, rows)
+            model.close()
+
+            start = time.perf_counter()
+            batch = BatchLinearRegression(db_path, FEATURES).fit()
+            batch_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            loop = per_household_loop(db_path)
+            loop_seconds = time.perf_counter() - start
+
+            max_error = np.abs(batch['intercept'] - loop['intercept']).max()
+            results.append({
+                'households': households,
+                'rows_per_household': rows,
+                'batch_seconds': batch_seconds,
+                'sklearn_loop_seconds': loop_seconds,
+                'speedup': loop_seconds / batch_seconds,
+                'max_intercept_error': max_error,
+            })
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--households', type=int, nargs='+', default=[100, 500, 2000])
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+    print(run(args.households, args.rows).to_string(index=False))
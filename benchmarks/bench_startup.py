@@ -0,0 +1,90 @@
+"""
+Checks that launching the logger stays fast and free of heavy analytics imports.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, then times
+building and showing the main window, and exits non-zero when a budget is
+exceeded or pandas/sklearn/matplotlib are imported at startup.
+
+    python -m benchmarks.bench_startup --import-budget-ms 300 --window-budget-ms 1000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('pandas', 'sklearn', 'matplotlib')
+
+WINDOW_SNIPPET = '''
+import sys, time
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from main import HouseholdView, LoggerController, LoggerModel
+app = QApplication([])
+model = LoggerModel(sys.argv[1])
+view = HouseholdView(model, LoggerController(model))
+view.show()
+app.processEvents()
+print(time.perf_counter() - start)
+'''
+
+
+def import_times():
+    """Returns {module: cumulative microseconds} for `import main`."""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def window_seconds() -> float:
+    environment = dict(os.environ)
+    environment.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    with tempfile.TemporaryDirectory() as directory:
+        completed = subprocess.run(
+            [sys.executable, '-c', WINDOW_SNIPPET, os.path.join(directory, 'records.db')],
+            cwd=ROOT, capture_output=True, text=True, check=True, env=environment,
+        )
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def run(import_budget_ms: float, window_budget_ms: float) -> bool:
+    times = import_times()
+    import_ms = times['main'] / 1000
+    heavy = sorted({name for name in times if name.split('.')[0] in HEAVY_MODULES})
+    slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)[1:6]
+    window_ms = window_seconds() * 1000
+
+    print(f"import main: {import_ms:.0f} ms (budget {import_budget_ms:.0f} ms)")
+    for name, microseconds in slowest:
+        print(f"  {name}: {microseconds / 1000:.0f} ms")
+    print(f"window shown: {window_ms:.0f} ms (budget {window_budget_ms:.0f} ms)")
+
+    ok = True
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        ok = False
+    if import_ms > import_budget_ms:
+        print("FAIL: import budget exceeded")
+        ok = False
+    if window_ms > window_budget_ms:
+        print("FAIL: window budget exceeded")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--import-budget-ms', type=float, default=300)
+    parser.add_argument('--window-budget-ms', type=float, default=1000)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.import_budget_ms, args.window_budget_ms) else 1)
@@ -0,0 +1,88 @@
+"""
+Fake smart meters for load testing the live ingestion service.
+
+Each meter opens a connection and streams CSV readings for its own household.
+With --serve the service is started in-process against a temporary database,
+so a full run needs nothing else:
+
+    python -m benchmarks.fake_meter --serve --meters 50 --readings 20000
+    python -m benchmarks.fake_meter --port 8765 --meters 10 --rate 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from backend.ingest_service import IngestService
+from backend.model import LoggerModel
+from backend.schema import DATETIME_FORMAT
+
+
+async def run_meter(host: str, port: int, household: str, readings: int, rate: float = 0, seed: int = 0) -> None:
+    """Sends readings minute-by-minute; rate is readings/sec for this meter, 0 for as fast as possible."""
+    rng = random.Random(seed)
+    _, writer = await asyncio.open_connection(host, port)
+    start = datetime(2024, 1, 1)
+    lines = []
+    for i in range(readings):
+        temperature = 18 + rng.random() * 10
+        person = rng.randint(1, 6)
+        energy = 30 + 4 * temperature + 9 * person + rng.random() * 50
+        date_time = (start + timedelta(minutes=i)).strftime(DATETIME_FORMAT)
+        lines.append(f"{temperature:.2f},{energy:.2f},{person},{date_time},{household}\n")
+        if len(lines) >= 100 or i == readings - 1:
+            writer.write(''.join(lines).encode())
+            await writer.drain()
+            if rate:
+                await asyncio.sleep(len(lines) / rate)
+            lines = []
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(args) -> None:
+    service = None
+    if args.serve:
+        directory = tempfile.mkdtemp()
+        model = LoggerModel(os.path.join(directory, 'records.db'))
+        service = IngestService(model, args.host, 0, batch_size=args.batch_size, max_pending=args.max_pending)
+        await service.start()
+        args.port = service.port
+
+    start = time.perf_counter()
+    meters = [run_meter(args.host, args.port, f"METER {i}", args.readings, args.rate, seed=i)
+              for i in range(args.meters)]
+    sent = asyncio.gather(*meters)
+    while not sent.done():
+        await asyncio.sleep(1)
+        if service:
+            metrics = service.metrics()
+            print(f"queue={metrics['queue_depth']} written={metrics['written']} "
+                  f"rate={metrics['recent_ingest_rate']:.0f}/s waits={metrics['backpressure_waits']}")
+    await sent
+    if service:
+        await service.stop()
+    elapsed = time.perf_counter() - start
+    total = args.meters * args.readings
+    print(f"{args.meters} meters sent {total} readings in {elapsed:.2f}s ({total / elapsed:.0f} readings/sec)")
+    if service:
+        print(service.metrics())
+
+
+if __name__ == "__main__":
+    def main():
+        parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--serve', action='store_true', help="start the service in-process on a temporary database")
+        parser.add_argument('--meters', type=int, default=10)
+        parser.add_argument('--readings', type=int, default=10000, help="readings per meter")
+        parser.add_argument('--rate', type=float, default=0, help="readings/sec per meter, 0 for unthrottled")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--max-pending', type=int, default=100000)
+        asyncio.run(run(parser.parse_args()))
+
+    main()
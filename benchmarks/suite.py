@@ -0,0 +1,231 @@
+"""
+Benchmark suite over the model, controller and analytics entry points.
+
+Builds a synthetic database (see benchmarks.synthetic), times every case and
+writes the results as JSON. Given a baseline from an earlier run, it exits
+with status 1 when any case got slower than the threshold allows:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline results.json --threshold 0.25
+    python -m benchmarks.suite --cases model. --households 20 --readings 2000
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from backend.model import LoggerModel
+from benchmarks.synthetic import generate
+
+
+CASES = {}
+
+
+def case(name: str):
+    def register(function):
+        CASES[name] = function
+        return function
+    return register
+
+
+class Fixture:
+    """The generated database and the objects the cases run against."""
+
+    def __init__(self, directory: str, households: int, readings: int, seed: int):
+        self.directory = directory
+        self.db_path = os.path.join(directory, 'bench.db')
+        self.model = LoggerModel(self.db_path)
+        self.households = generate(self.model, households, readings, seed=seed)
+        self.household = self.households[0]
+        self._controller = None
+
+    @property
+    def controller(self):
+        if self._controller is None:
+            from main import LoggerController
+            self._controller = LoggerController(self.model)
+        return self._controller
+
+    def close(self):
+        self.model.close()
+
+
+@case('model.get_all_data.sql')
+def _(fixture):
+    fixture.model.get_all_data(fixture.household)
+
+
+@case('model.get_all_data.pandas')
+def _(fixture):
+    fixture.model.get_all_data(fixture.household, aggregate='pandas')
+
+
+@case('model.get_all_data.daily_buckets')
+def _(fixture):
+    fixture.model.get_all_data(fixture.household, bucket=86400)
+
+
+@case('model.get_temp_and_energy_data')
+def _(fixture):
+    fixture.model._get_temp_and_energy_data(fixture.household)
+
+
+@case('model.get_summary.day')
+def _(fixture):
+    fixture.model.get_summary(fixture.household, 'day')
+
+
+@case('model.get_summary.month')
+def _(fixture):
+    fixture.model.get_summary(fixture.household, 'month')
+
+
+@case('model.export.csv')
+def _(fixture):
+    fixture.model.export(os.path.join(fixture.directory, 'export.csv'), households=fixture.households[:5])
+
+
+@case('model.pandas_model.data')
+def _(fixture):
+    from PyQt5.QtCore import Qt
+    from backend.model import PandasModel
+
+    table = PandasModel(fixture.model.get_all_data(fixture.household, limit=5000))
+    for row in range(table.rowCount()):
+        for column in range(table.columnCount()):
+            table.data(table.index(row, column), Qt.DisplayRole)
+
+
+@case('model.sensor_table_model.scroll')
+def _(fixture):
+    from PyQt5.QtCore import QModelIndex, Qt
+
+    table = fixture.controller.get_sensor_table_model(fixture.household)
+    while table.canFetchMore(QModelIndex()) and table.rowCount() < 20000:
+        table.fetchMore(QModelIndex())
+    for row in range(0, table.rowCount(), 7):
+        for column in range(table.columnCount()):
+            table.data(table.index(row, column), Qt.DisplayRole)
+
+
+@case('controller.get_all_sensor_data')
+def _(fixture):
+    fixture.controller.get_all_sensor_data(fixture.household)
+
+
+@case('controller.register_activate_delete')
+def _(fixture):
+    controller = fixture.controller
+    for i in range(20):
+        controller.register_new_household(f"SUITE {i}", 1 + i % 6)
+    for i in range(20):
+        household_id = controller.get_household_id(f"SUITE {i}")
+        controller.activate_household({'id': household_id, 'name': f"SUITE {i}"})
+        controller.delete_household(household_id)
+
+
+@case('analytics.fit_household.uncached')
+def _(fixture):
+    from backend.linear_regression import DisplayLinearRegression
+
+    cache = fixture.model.regression_cache()
+    cache.clear()
+    DisplayLinearRegression(cache=cache, model=fixture.model).fit_household(
+        fixture.household, ['temperature', 'person'], 'energy', 0.2, 42
+    )
+    cache.close()
+
+
+@case('analytics.batch_regression')
+def _(fixture):
+    from backend.linear_regression import BatchLinearRegression
+
+    BatchLinearRegression(fixture.db_path, ['temperature', 'person']).fit()
+
+
+@case('analytics.incremental_rebuild')
+def _(fixture):
+    from backend.linear_regression import IncrementalLinearRegression
+
+    IncrementalLinearRegression(fixture.db_path, ('temperature', 'person')).rebuild()
+
+
+@case('analytics.runner')
+def _(fixture):
+    from backend.runner import AnalyticsRunner
+
+    AnalyticsRunner(fixture.db_path, workers=2, feature_columns=['temperature', 'person']).run(fixture.households)
+
+
+def run(names, households: int, readings: int, repeat: int, seed: int = 0) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        fixture = Fixture(directory, households, readings, seed)
+        try:
+            for name in names:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    CASES[name](fixture)
+                    timings.append(time.perf_counter() - start)
+                results[name] = {'seconds': min(timings), 'mean_seconds': sum(timings) / len(timings)}
+                print(f"{name:45s} {min(timings) * 1000:10.1f} ms")
+        finally:
+            fixture.close()
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'households': households, 'readings': readings, 'repeat': repeat, 'seed': seed},
+        'results': results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float, min_seconds: float = 0.005) -> list:
+    """Returns (name, baseline seconds, seconds, ratio) for every case slower than baseline * (1 + threshold)."""
+    if report['config'] != baseline['config']:
+        raise ValueError(f"Baseline was recorded with {baseline['config']}, this run used {report['config']}")
+    regressions = []
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        before, after = baseline['results'][name]['seconds'], result['seconds']
+        # Differences under min_seconds are timer noise, not regressions
+        if after > before * (1 + threshold) and after - before > min_seconds:
+            regressions.append((name, before, after, after / before))
+    return regressions
+
+
+if __name__ == "__main__":
+    def main():
+        parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+        parser.add_argument('--households', type=int, default=50)
+        parser.add_argument('--readings', type=int, default=24 * 90, help="hourly readings per household")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--cases', nargs='+', help="only run cases whose name starts with one of these")
+        parser.add_argument('--output', help="write the results JSON here")
+        parser.add_argument('--baseline', help="results JSON of an earlier run to compare against")
+        parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+        args = parser.parse_args()
+
+        names = [name for name in CASES if not args.cases or name.startswith(tuple(args.cases))]
+        report = run(names, args.households, args.readings, args.repeat, args.seed)
+        if args.output:
+            with open(args.output, 'w') as output:
+                json.dump(report, output, indent=2)
+
+        if args.baseline:
+            with open(args.baseline) as baseline_file:
+                regressions = compare(report, json.load(baseline_file), args.threshold)
+            for name, before, after, ratio in regressions:
+                print(f"REGRESSION {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({ratio:.2f}x)")
+            if regressions:
+                sys.exit(1)
+            print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}")
+
+    main()
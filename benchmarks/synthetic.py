@@ -0,0 +1,105 @@
+"""
+Deterministic synthetic sensor_data for benchmarks.
+
+Builds N households x M hourly readings in the real schema (dd/mm/YYYY HH:MM
+datetime strings, ts, rollups) inside SQLite, so the same arguments always
+produce the same database:
+
+    python -m benchmarks.synthetic exdata/synthetic.db --households 100 --readings 8760
+"""
+import argparse
+import json
+
+from backend.model import LoggerModel
+from backend.rollups import update_rollups
+
+
+START_TS = 1672531200  # 01/01/2023 00:00 UTC
+
+
+def household_names(households: int, prefix: str = 'HOUSEHOLD') -> list:
+    return [f"{prefix} {i}" for i in range(households)]
+
+
+def generate(model: LoggerModel, households: int, readings: int, sensors: int = 1, seed: int = 0,
+             prefix: str = 'HOUSEHOLD', register: bool = True) -> list:
+    """
+    Appends households * readings * sensors rows to sensor_data and returns the household names.
+
+    Parameters:
+    - households: int, number of households, named "<prefix> 0" .. "<prefix> N-1".
+    - readings: int, hourly readings per sensor, starting 01/01/2023 00:00.
+    - sensors: int, readings logged per household for the same hour.
+    - seed: int, varies the noise; the output is otherwise fixed.
+    - register: also add the households to the households table.
+
+    Temperature follows a daily cycle, person counts vary per hour and energy is
+    linear in both plus a per-household offset and noise, so regressions have
+    something to find. Rows are written hour by hour across households, the
+    order live meters would produce them in.
+    """
+    names = household_names(households, prefix)
+    if register:
+        model.writer.execute(_register, names)
+    # Each shard file generates its own households' rows on its writer, so the
+    # rows land where the model reads them and never race its other writes
+    houses = {}
+    for house, name in enumerate(names):
+        houses.setdefault(model.shards.path_for(name, create=True), []).append(house)
+    params = {'total': households * readings * sensors, 'sensors': sensors, 'households': households,
+              'start': START_TS, 'seed': seed, 'prefix': prefix}
+    for path, shard_houses in houses.items():
+        model.shards.writer_at(path).execute(_insert_readings, dict(params, houses=json.dumps(shard_houses)))
+    model.registry.invalidate()
+    return names
+
+
+def _register(conn, names):
+    conn.executemany('''
+        INSERT INTO households (household_name, current_person)
+        SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM households WHERE household_name = ?)
+    ''', [(name, 1 + i % 6, name) for i, name in enumerate(names)])
+
+
+def _insert_readings(conn, params):
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM sensor_data').fetchone()[0]
+    # noise is a multiplicative hash of (n, seed) in [0, 1), so no random() is involved
+    conn.execute('''
+        WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < :total),
+        readings AS (
+            SELECT n,
+                   (n / :sensors) % :households AS house,
+                   :start + (n / (:sensors * :households)) * 3600 AS ts,
+                   ((n + :seed * 1000003) * 2654435761 % 4294967296) / 4294967296.0 AS noise
+            FROM seq
+        ),
+        values_ AS (
+            SELECT house, ts, noise,
+                   round(26 - abs((ts / 3600) % 24 - 14) * 0.6 + house % 5 + noise * 2, 2) AS temperature,
+                   1 + CAST(noise * 7919 AS INTEGER) % 6 AS person
+            FROM readings
+            WHERE house IN (SELECT value FROM json_each(:houses))
+        )
+        INSERT INTO sensor_data (temperature, energy, person, datetime, household, ts)
+        SELECT temperature, round(30 + 4 * temperature + 9 * person + house % 23 + noise * 50, 2), person,
+               strftime('%d/%m/%Y %H:%M', ts, 'unixepoch'), :prefix || ' ' || house, ts
+        FROM values_
+    ''', params)
+    update_rollups(conn, last_id)
+
+
+if __name__ == "__main__":
+    def main():
+        parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+        parser.add_argument('db')
+        parser.add_argument('--households', type=int, default=100)
+        parser.add_argument('--readings', type=int, default=24 * 365, help="hourly readings per household")
+        parser.add_argument('--sensors', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0)
+        args = parser.parse_args()
+        model = LoggerModel(args.db)
+        generate(model, args.households, args.readings, args.sensors, args.seed)
+        model.close()
+        print(f"Wrote {args.households * args.readings * args.sensors} readings to {args.db}")
+
+    main()
@@ -1,7 +1,8 @@
 from PyQt5.QtWidgets import QMainWindow, QApplication
 from frontend.view import Ui_MainWindow
 
-from backend.model import LoggerModel
+from backend.model import LoggerModel, SensorTableModel
+from backend.worker import TaskRunner
 
 
 class Household:
@@ -17,15 +18,16 @@ class Household:
 
 
 class LoggerController:
-    def __init__(self, model: LoggerModel) -> None:
+    def __init__(self, model: LoggerModel, runner: TaskRunner = None) -> None:
         self.model = model
+        self.runner = runner or TaskRunner()
 
     def register_new_household(self, household_name: str, number_person: int) -> None:
         new_household = Household(household_name, number_person) 
         self.model.register_household(new_household)
 
-    def delete_household(self, household_id: int) -> None:
-        self.model.delete_household(household_id)
+    def delete_household(self, household_id: int, progress=None):
+        return self.model.delete_household(household_id, progress)
 
     def activate_household(self, active_household: dict) -> None:
         self.model.save_active_household(active_household)
@@ -42,6 +44,40 @@ class LoggerController:
     def get_all_sensor_data(self, household: str):
         return self.model.get_all_data(household)
 
+    def get_sensor_table_model(self, household: str) -> SensorTableModel:
+        return SensorTableModel(self.model, household)
+
+    # Background variants: run on the runner's thread pool and deliver the result
+    # (or the raised exception) to the callbacks on the GUI thread.
+
+    def register_new_household_async(self, household_name: str, number_person: int, on_result=None, on_error=None):
+        return self.runner.submit(None, self.register_new_household, household_name, number_person,
+                                  on_result=on_result, on_error=on_error, message=f"Registering {household_name}...")
+
+    def delete_household_async(self, household_id: int, on_result=None, on_error=None):
+        # The readings are purged on the model's purge thread after the task
+        # finishes; its progress goes to the status bar (signals are thread-safe)
+        def report(status):
+            if status['phase'] == 'done':
+                message = f"Purged {status['rows']} readings of {status['household']}"
+            elif status['phase'] == 'vacuuming':
+                message = f"Reclaiming space from {status['household']}: {status['freed_bytes'] / 2 ** 20:.0f} MB"
+            else:
+                message = f"Purging {status['household']}: {status['rows']}/{status['total']} readings"
+            self.runner.status.emit(message)
+
+        return self.runner.submit(None, self.delete_household, household_id, report,
+                                  on_result=on_result, on_error=on_error, message="Deleting household...")
+
+    def activate_household_async(self, active_household: dict, on_result=None, on_error=None):
+        return self.runner.submit(None, self.activate_household, active_household,
+                                  on_result=on_result, on_error=on_error, message=f"Activating {active_household['name']}...")
+
+    def get_all_sensor_data_async(self, household: str, on_result, on_error=None, **kwargs):
+        # Keyed on one slot so a newer selection cancels the stale request
+        return self.runner.submit('sensor-data', self.model.get_all_data, household, **kwargs,
+                                  on_result=on_result, on_error=on_error, message=f"Loading data for {household}...")
+
 
 class HouseholdView(QMainWindow, Ui_MainWindow):
     def __init__(self, model, controller):
@@ -50,6 +86,7 @@ class HouseholdView(QMainWindow, Ui_MainWindow):
 
         self.model = model
         self.controller = controller
+        self.controller.runner.status.connect(self._show_status)
 
         self.window_activate = ActivateTab(ui=self, controller=self.controller)
         self.window_activate.run()
@@ -60,6 +97,12 @@ class HouseholdView(QMainWindow, Ui_MainWindow):
         self.window_delete = RemoveTab(ui=self, controller=self.controller)
         self.window_delete.run()
 
+    def _show_status(self, message: str):
+        if message:
+            self.statusbar.showMessage(message)
+        else:
+            self.statusbar.clearMessage()
+
 
 class ComboboxUpdate:
 
@@ -68,10 +111,10 @@ class ComboboxUpdate:
         self.controller = controller
 
     def update_combobox(self):
+        names = [item["name"] for item in self.controller.get_registered_households()]
         for combo in self.comboboxes:
             combo.clear()
-            items = self.controller.get_registered_households()
-            combo.addItems([item["name"] for item in items])
+            combo.addItems(names)
 
 
 class ActivateTab:
@@ -114,8 +157,11 @@ class ActivateTab:
                 'id': self.ui.lineEdit_5.text(),
                 'name': self.ui.comboBox_2.currentText(),
             }
-            self.controller.activate_household(active_household)
-            self._update_active_household_lineedit()
+            self.controller.activate_household_async(
+                active_household,
+                on_result=lambda _: self._update_active_household_lineedit(),
+                on_error=lambda e: self.ui.statusbar.showMessage(str(e), 10000),
+            )
 
     def _update_active_household_lineedit(self):
         saved_active_household = self.controller.get_active_household()
@@ -151,11 +197,12 @@ class RegisterTab:
             self.ui.statusbar.showMessage("Household name cannot be empty.", 10000)
             return
         
-        try:
-            self.controller.register_new_household(household_name, self.ui.spinBox.value())
-            self.setup_update_combobox()
-        except ValueError as e:
-            self.ui.statusbar.showMessage(str(e), 10000)
+        self.controller.register_new_household_async(
+            household_name,
+            self.ui.spinBox.value(),
+            on_result=lambda _: self.setup_update_combobox(),
+            on_error=lambda e: self.ui.statusbar.showMessage(str(e), 10000),
+        )
 
     def setup_update_combobox(self):
         combobox = ComboboxUpdate([self.ui.comboBox_2, self.ui.comboBox_3], self.controller)
@@ -185,8 +232,11 @@ class RemoveTab:
 
     def delete_household(self):
         household_id = self.ui.lineEdit_4.text()
-        self.controller.delete_household(household_id)
-        self.setup_update_combobox()
+        self.controller.delete_household_async(
+            household_id,
+            on_result=lambda _: self.setup_update_combobox(),
+            on_error=lambda e: self.ui.statusbar.showMessage(str(e), 10000),
+        )
     
     def setup_lineedit(self):
         self.ui.comboBox_3.currentIndexChanged.connect(self._update_lineedit_id)
@@ -218,5 +268,6 @@ if __name__ == "__main__":
         view = HouseholdView(model, controller)
         view.show()
         app.exec_()
+        controller.runner.close()
 
     main()
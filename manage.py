@@ -0,0 +1,241 @@
+import argparse
+import time
+
+from backend.model import LoggerModel
+
+
+def import_command(model: LoggerModel, args) -> None:
+    def report(stats: dict) -> None:
+        print(f"{stats['path']}: {stats['rows']} rows in {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/sec)")
+
+    model.import_csv(args.path, chunk_size=args.chunk_size, callback=report)
+
+
+def rollups_command(model: LoggerModel, args) -> None:
+    model.rebuild_rollups(args.household)
+    print(f"Rebuilt rollups for {args.household or 'all households'}")
+
+
+def analytics_command(model: LoggerModel, args) -> None:
+    from backend.runner import AnalyticsRunner
+
+    runner = AnalyticsRunner(args.db, workers=args.workers, feature_columns=args.features,
+                             archive_dir=args.archive_dir)
+    start = time.perf_counter()
+    results, timings = runner.run_registered(model)
+    elapsed = time.perf_counter() - start
+    if args.output:
+        results.to_csv(args.output, index=False)
+    else:
+        print(results.to_string(index=False))
+    print(timings.to_string(index=False))
+    print(f"{len(results)} households in {elapsed:.2f}s")
+
+
+def plots_command(model: LoggerModel, args) -> None:
+    from backend.plots import render_households
+
+    households = args.households or [household['name'] for household in model.get_registered_households()]
+    start = time.perf_counter()
+    paths = render_households(args.db, households, args.output_dir, fmt=args.format, workers=args.workers,
+                              max_points=args.max_points, archive_dir=args.archive_dir)
+    print(f"Wrote {len(paths)} plots to {args.output_dir} in {time.perf_counter() - start:.2f}s")
+
+
+def archive_command(model: LoggerModel, args) -> None:
+    stats = model.archive_older_than(args.days, batch_size=args.batch_size)
+    print(f"Archived {stats['rows']} rows from {stats['households']} households into {stats['files']} files "
+          f"under {model.archive.root}")
+
+
+def vacuum_command(model: LoggerModel, args) -> None:
+    start = time.perf_counter()
+    switched = model.enable_incremental_vacuum()
+    print(f"Switched {len(switched)} database files to incremental vacuum in {time.perf_counter() - start:.2f}s")
+
+
+def column_store_command(model: LoggerModel, args) -> None:
+    from backend.colstore import ColumnStore
+
+    start = time.perf_counter()
+    ColumnStore(args.column_store_dir).rebuild(args.db, args.household, archive_dir=args.archive_dir)
+    print(f"Rebuilt column store {args.column_store_dir} in {time.perf_counter() - start:.2f}s")
+
+
+def export_command(model: LoggerModel, args) -> None:
+    stats = model.export(args.path, households=args.households, start=args.start, end=args.end,
+                         fmt=args.format, compress=args.gzip or None, chunk_size=args.chunk_size)
+    print(f"Exported {stats['rows']} rows ({stats['bytes'] / 2 ** 20:.1f} MB) to {stats['path']} "
+          f"in {stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/sec)")
+
+
+def serve_command(model: LoggerModel, args) -> None:
+    import asyncio
+
+    from backend.ingest_service import IngestService
+
+    service = IngestService(model, args.host, args.port, batch_size=args.batch_size,
+                            flush_interval=args.flush_interval, max_pending=args.max_pending)
+
+    async def report():
+        while True:
+            await asyncio.sleep(args.report_interval)
+            metrics = service.metrics()
+            print(f"written={metrics['written']} rate={metrics['recent_ingest_rate']:.0f}/s "
+                  f"queue={metrics['queue_depth']} rejected={metrics['rejected']} failed={metrics['failed']}")
+
+    async def serve():
+        await service.start()
+        print(f"Listening on {service.host}:{service.port}")
+        reporter = asyncio.create_task(report())
+        try:
+            await asyncio.Event().wait()
+        finally:
+            reporter.cancel()
+            await service.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def snapshot_command(model: LoggerModel, args) -> None:
+    snapshots = model.snapshots(args.snapshot_dir, keep=args.keep)
+
+    def refresh():
+        stats = snapshots.refresh()
+        print(f"Snapshot of {stats['files']} files ({stats['bytes'] / 2 ** 20:.1f} MB) at {stats['db_path']} "
+              f"in {stats['seconds']:.2f}s")
+
+    refresh()
+    try:
+        while args.interval:
+            time.sleep(args.interval)
+            refresh()
+    except KeyboardInterrupt:
+        pass
+
+
+def use_snapshot(args) -> None:
+    """Points args.db at a snapshot no older than args.snapshot_max_age, taking a new one if needed."""
+    from backend.snapshot import SnapshotManager
+
+    snapshots = SnapshotManager(args.db, args.snapshot_dir, archive_dir=args.archive_dir)
+    age = snapshots.age()
+    if age is None or age > args.snapshot_max_age:
+        snapshots.refresh()
+    args.db = snapshots.latest()
+    args.archive_dir = None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Energy Data Logger maintenance commands")
+    parser.add_argument('--db', default='exdata/records.db', help="path to the SQLite database")
+    parser.add_argument('--archive-dir', help="Parquet archive directory, defaults to 'archive' next to the database")
+    parser.add_argument('--sharded', action='store_true', help="keep new households' readings in per-household shard files")
+    parser.add_argument('--shard-count', type=int, help="hash new households into this many shard files instead")
+    parser.add_argument('--metrics', help="record query and method latencies and write them here in Prometheus format")
+    parser.add_argument('--slow-query-ms', type=float, default=100, help="log slower statements with their query plan")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="run analytics, plots, exports and column store rebuilds against a point-in-time snapshot")
+    parser.add_argument('--snapshot-max-age', type=float, default=300,
+                        help="seconds before --snapshot takes a fresh snapshot instead of reusing the newest")
+    parser.add_argument('--snapshot-dir', help="snapshot directory, defaults to '<db>-snapshots' next to the database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="bulk load sensor_data CSV files")
+    import_parser.add_argument('path', help="CSV file or glob pattern, e.g. 'exports/*.csv'")
+    import_parser.add_argument('--chunk-size', type=int, default=50000)
+    import_parser.set_defaults(handler=import_command)
+
+    rollups_parser = subparsers.add_parser('rebuild-rollups',
+                                           help="recompute hourly/daily/monthly rollups, archived months included")
+    rollups_parser.add_argument('--household', help="only rebuild this household")
+    rollups_parser.set_defaults(handler=rollups_command)
+
+    analytics_parser = subparsers.add_parser('analytics', help="refit and summarise every registered household")
+    analytics_parser.add_argument('--workers', type=int, help="worker processes, defaults to the CPU count")
+    analytics_parser.add_argument('--features', nargs='+', default=['temperature'])
+    analytics_parser.add_argument('--output', help="write the per-household results to this CSV file")
+    analytics_parser.set_defaults(handler=analytics_command, read_only=True)
+
+    plots_parser = subparsers.add_parser('plots', help="render regression plots off-screen, one file per household")
+    plots_parser.add_argument('output_dir')
+    plots_parser.add_argument('--households', nargs='+', help="defaults to every registered household")
+    plots_parser.add_argument('--format', choices=['png', 'svg', 'pdf'], default='png')
+    plots_parser.add_argument('--workers', type=int)
+    plots_parser.add_argument('--max-points', type=int, default=5000)
+    plots_parser.set_defaults(handler=plots_command, read_only=True)
+
+    archive_parser = subparsers.add_parser('archive', help="move old sensor_data rows into the Parquet archive")
+    archive_parser.add_argument('--days', type=int, default=365, help="archive rows older than this many days")
+    archive_parser.add_argument('--batch-size', type=int, default=100000)
+    archive_parser.set_defaults(handler=archive_command)
+
+    vacuum_parser = subparsers.add_parser(
+        'vacuum', help="rewrite existing database files once so purges return freed space to the disk; "
+                       "needs up to twice the file size free and blocks writes until done")
+    vacuum_parser.set_defaults(handler=vacuum_command)
+
+    store_parser = subparsers.add_parser('rebuild-column-store', help="rewrite the memory-mapped column store")
+    store_parser.add_argument('column_store_dir')
+    store_parser.add_argument('--household', help="only rebuild this household")
+    store_parser.set_defaults(handler=column_store_command, read_only=True)
+
+    export_parser = subparsers.add_parser('export', help="stream readings to a CSV or Parquet file")
+    export_parser.add_argument('path', help="output file, e.g. export.csv, export.csv.gz or export.parquet")
+    export_parser.add_argument('--households', nargs='+', help="defaults to every household with readings")
+    export_parser.add_argument('--start', help="first reading to include, 'dd/mm/YYYY HH:MM'")
+    export_parser.add_argument('--end', help="export readings before this time, 'dd/mm/YYYY HH:MM'")
+    export_parser.add_argument('--format', choices=['csv', 'parquet'], help="defaults to the file extension")
+    export_parser.add_argument('--gzip', action='store_true', help="compress with gzip (implied by a .gz path)")
+    export_parser.add_argument('--chunk-size', type=int, default=100000)
+    export_parser.set_defaults(handler=export_command, read_only=True)
+
+    serve_parser = subparsers.add_parser('serve', help="accept live readings over TCP, one reading per line")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--batch-size', type=int, default=5000)
+    serve_parser.add_argument('--flush-interval', type=float, default=0.5, help="seconds before a partial batch is written")
+    serve_parser.add_argument('--max-pending', type=int, default=100000, help="buffered readings before clients are paused")
+    serve_parser.add_argument('--report-interval', type=float, default=5.0)
+    serve_parser.set_defaults(handler=serve_command)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help="take a point-in-time copy for analytics")
+    snapshot_parser.add_argument('--interval', type=float, help="keep taking a snapshot every this many seconds")
+    snapshot_parser.add_argument('--keep', type=int, default=2, help="snapshots to keep")
+    snapshot_parser.set_defaults(handler=snapshot_command)
+
+    return parser
+
+
+if __name__ == "__main__":
+    def main():
+        parser = build_parser()
+        args = parser.parse_args()
+        if args.snapshot:
+            if not getattr(args, 'read_only', False):
+                parser.error(f"--snapshot cannot be used with {args.command}")
+            use_snapshot(args)
+        instrumentation = None
+        if args.metrics:
+            import logging
+
+            from backend.instrumentation import Instrumentation
+
+            logging.basicConfig()
+            instrumentation = Instrumentation(slow_query_seconds=args.slow_query_ms / 1000)
+        # A snapshot is opened read-only, so it is not migrated, switched to WAL or written to
+        model = LoggerModel(args.db, archive_dir=args.archive_dir, instrumentation=instrumentation,
+                            sharded=args.sharded or args.shard_count is not None, shard_count=args.shard_count,
+                            read_only=args.snapshot)
+        try:
+            args.handler(model, args)
+        finally:
+            model.close()
+            if instrumentation is not None:
+                with open(args.metrics, 'w') as metrics_file:
+                    metrics_file.write(instrumentation.prometheus())
+
+    main()
@@ -0,0 +1,169 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.archive import iter_sensor_rows
+from backend.colstore import ColumnStore
+from backend.linear_regression import BatchLinearRegression, DisplayLinearRegression
+from backend.model import LoggerModel
+from backend.runner import _run_shard
+from backend.schema import DATETIME_FORMAT, to_epoch
+
+pytest.importorskip('pyarrow')
+
+
+def _readings(household: str, start: datetime, count: int, step: timedelta = timedelta(minutes=1)):
+    return [(18 + i % 10, 40 + 4 * (i % 10) + i % 3, 1 + i % 4, (start + i * step).strftime(DATETIME_FORMAT),
+             household) for i in range(count)]
+
+
+@pytest.fixture
+def archived(tmp_path):
+    """A database whose old readings were moved to an archive outside the default location."""
+    db_path = str(tmp_path / 'records.db')
+    archive_dir = str(tmp_path / 'cold')
+    model = LoggerModel(db_path, archive_dir=archive_dir)
+    recent = datetime.now().replace(second=0, microsecond=0) - timedelta(days=1)
+    model.log_readings(_readings('H1', datetime(2020, 1, 31, 23), 120) + _readings('H1', recent, 30)).result()
+    assert model.archive_older_than(30)['rows'] == 120
+    yield model, db_path, archive_dir
+    model.close()
+
+
+def test_loaders_read_a_custom_archive_dir(archived, tmp_path):
+    model, db_path, archive_dir = archived
+    assert not os.path.isdir(tmp_path / 'archive')
+
+    rows = [row for chunk in iter_sensor_rows(db_path, ['energy'], archive_dir=archive_dir) for row in chunk]
+    assert len(rows) == 150
+    assert BatchLinearRegression(db_path, archive_dir=archive_dir).fit()['n'].tolist() == [150]
+    fit = DisplayLinearRegression(db_path, archive_dir=archive_dir).fit_household('H1', ['temperature'], 'energy',
+                                                                                  0.2, 0)
+    assert fit['train_rows'] + fit['test_rows'] == 150
+    # The last archived reading is 2020-02-01 00:59 UTC
+    assert model.archive.max_ts('H1') == 1580518740
+    assert fit['watermark'].endswith(':1580518740')
+    assert _run_shard(db_path, 0, ['H1'], ['temperature'], 'energy', archive_dir)[2][0]['rows'] == 150
+
+    store = ColumnStore(str(tmp_path / 'store'))
+    store.rebuild(db_path, archive_dir=archive_dir)
+    assert store.length('H1') == 150
+
+
+def test_archived_pages_read_only_the_months_they_need(tmp_path, monkeypatch):
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    try:
+        # Two meters per household, so every datetime groups two rows
+        rows = _readings('H1', datetime(2020, 1, 1), 4 * 180, timedelta(hours=6))
+        model.log_readings(rows + [(20, 1, 1, row[3], 'H1') for row in rows]).result()
+        model.archive_older_than(30)
+        everything = model.get_all_data('H1')
+        assert len(everything) == len(rows)
+
+        read = []
+        read_files = model.archive._read_files
+
+        def record(files, *args):
+            read.extend(files)
+            return read_files(files, *args)
+
+        monkeypatch.setattr(model.archive, '_read_files', record)
+
+        pages, after = [], None
+        while True:
+            read.clear()
+            page = model.get_all_data('H1', after=after, limit=100)
+            if page.empty:
+                break
+            # 100 datetimes, 25 days of readings, span at most two month partitions
+            assert len({os.path.dirname(path) for path in read}) <= 2
+            pages.append(page)
+            after = page['datetime'].iloc[-1]
+        assert [len(page) for page in pages[:-1]] == [100] * (len(pages) - 1)
+        assert sum(len(page) for page in pages) == len(everything)
+        assert [value for page in pages for value in page['energy']] == everything['energy'].tolist()
+
+        weekly = model.get_all_data('H1', bucket=7 * 86400, limit=3, offset=4)
+        assert weekly['energy'].tolist() == model.get_all_data('H1', bucket=7 * 86400)['energy'].tolist()[4:7]
+    finally:
+        model.close()
+
+
+@pytest.mark.parametrize('aggregate', ['sql', 'pandas'])
+def test_live_rows_older_than_the_archive_come_first(tmp_path, aggregate):
+    import pandas as pd
+
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    try:
+        model.log_readings(_readings('H1', datetime(2022, 1, 1), 48, timedelta(hours=1))).result()
+        model.archive_older_than(30)
+        # Backfilled after archiving, so these live rows predate every archived one
+        model.log_readings(_readings('H1', datetime(2021, 6, 1), 24, timedelta(hours=1))).result()
+
+        everything = model.get_all_data('H1', aggregate=aggregate)
+        times = pd.to_datetime(everything['datetime'], format='%d/%m/%Y %H:%M')
+        assert len(everything) == 72
+        assert times.is_monotonic_increasing
+        assert times.iloc[0] == datetime(2021, 6, 1)
+
+        first = model.get_all_data('H1', limit=3, aggregate=aggregate)
+        assert first['datetime'].tolist() == everything['datetime'].tolist()[:3]
+        assert model.get_all_data('H1', limit=3, offset=22, aggregate=aggregate)['datetime'].tolist() == \
+            everything['datetime'].tolist()[22:25]
+
+        pages, after = [], None
+        while True:
+            page = model.get_all_data('H1', after=after, limit=10, aggregate=aggregate)
+            if page.empty:
+                break
+            pages.append(page)
+            after = page['datetime'].iloc[-1]
+        assert [value for page in pages for value in page['datetime']] == everything['datetime'].tolist()
+
+        if aggregate == 'sql':
+            daily = model.get_all_data('H1', bucket=86400)
+            assert daily['datetime'].tolist() == ['01/06/2021 00:00', '01/01/2022 00:00', '02/01/2022 00:00']
+            assert daily['energy'].sum() == everything['energy'].sum()
+    finally:
+        model.close()
+
+
+@pytest.mark.parametrize('sharded', [False, True])
+def test_rebuilt_rollups_keep_archived_months(tmp_path, sharded):
+    model = LoggerModel(str(tmp_path / 'records.db'), sharded=sharded)
+    try:
+        recent = datetime.now().replace(second=0, microsecond=0) - timedelta(days=1)
+        for household in ('H1', 'H2'):
+            model.log_readings(_readings(household, datetime(2020, 1, 1), 24 * 90, timedelta(hours=1))
+                               + _readings(household, recent, 10)).result()
+        model.archive_older_than(30)
+        before = {household: model.get_summary(household, 'month') for household in ('H1', 'H2')}
+        assert before['H1']['readings'].sum() == 24 * 90 + 10
+
+        model.rebuild_rollups('H1')
+        assert model.get_summary('H1', 'month').equals(before['H1'])
+        model.rebuild_rollups()
+        for household in ('H1', 'H2'):
+            assert model.get_summary(household, 'month').equals(before[household])
+    finally:
+        model.close()
+
+
+def test_unaligned_summaries_include_archived_readings(tmp_path):
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    try:
+        rows = _readings('H1', datetime(2020, 1, 1), 24 * 90, timedelta(hours=1))
+        model.log_readings(rows).result()
+        model.archive_older_than(30)
+        start, end = to_epoch('01/01/2020 00:30'), to_epoch('01/03/2020 00:30')
+        expected = [row for row in rows if start <= to_epoch(row[3]) < end]
+
+        # Unaligned bounds are answered from raw rows, which now live in the archive
+        daily = model.get_summary('H1', 'day', start, end)
+        assert daily['readings'].sum() == len(expected) == 24 * 60
+        assert daily['energy'].sum() == pytest.approx(sum(row[1] for row in expected))
+        aligned = model.get_summary('H1', 'day', to_epoch('02/01/2020 00:00'), to_epoch('01/03/2020 00:00'))
+        assert daily.iloc[1:-1].reset_index(drop=True).equals(aligned)
+    finally:
+        model.close()
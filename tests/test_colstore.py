@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.colstore import ColumnStore
+from backend.model import LoggerModel
+from backend.schema import DATETIME_FORMAT, to_epoch
+
+COLUMNS = ('ts', 'temperature', 'energy', 'person')
+
+
+def _readings(household: str, count: int, start: datetime = datetime(2024, 1, 1)):
+    return [(18.0 + i % 9, 30.0 + i % 17, 1 + i % 4, (start + timedelta(minutes=10 * i)).strftime(DATETIME_FORMAT),
+             household) for i in range(count)]
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = LoggerModel(str(tmp_path / 'records.db'), column_store_dir=str(tmp_path / 'store'))
+    yield model
+    model.close()
+
+
+def _sql_arrays(db_path: str, household: str, start=None, end=None):
+    plain = LoggerModel(db_path)
+    try:
+        return plain.get_reading_arrays(household, COLUMNS, start, end)
+    finally:
+        plain.close()
+
+
+def test_appended_readings_read_back_as_memmap_views(model):
+    for offset in range(0, 600, 200):
+        model.log_readings(_readings('H1', 600)[offset:offset + 200] + _readings('H2', 30)[offset // 20:offset // 20 + 10]).result()
+    store = model.column_store
+    assert store.households() == ['H1', 'H2']
+    assert store.length('H1') == 600 and store.is_sorted('H1')
+    assert store.length('H2') == 30 and store.is_sorted('H2')
+
+    arrays = model.get_reading_arrays('H1')
+    expected = _sql_arrays(model.db_path, 'H1')
+    for column in COLUMNS:
+        assert isinstance(arrays[column], np.memmap)
+        np.testing.assert_array_equal(arrays[column], expected[column])
+
+    start, end = '01/01/2024 12:00', '02/01/2024 12:00'
+    window = model.get_reading_arrays('H1', ('ts', 'energy'), start, end)
+    assert window['ts'][0] == to_epoch(start) and window['ts'][-1] < to_epoch(end)
+    np.testing.assert_array_equal(window['energy'], _sql_arrays(model.db_path, 'H1', start, end)['energy'])
+
+    starts, sums = store.sum_by_bucket('H1', 'energy', 86400)
+    daily = model.get_all_data('H1', columns=['energy'], bucket=86400)
+    assert starts.tolist() == [to_epoch(value) for value in daily['datetime']]
+    np.testing.assert_allclose(sums, daily['energy'])
+
+
+def test_out_of_order_and_torn_appends(model, tmp_path):
+    model.log_readings(_readings('H1', 50, datetime(2024, 1, 2))).result()
+    model.log_readings(_readings('H1', 20)).result()
+    store = model.column_store
+    assert not store.is_sorted('H1')
+    window = store.read('H1', ('ts',), to_epoch('01/01/2024 00:00'), to_epoch('01/01/2024 01:00'))
+    assert window['ts'].tolist() == [to_epoch('01/01/2024 00:00') + 600 * i for i in range(6)]
+
+    # A crash between column files leaves one of them longer than the others
+    with open(store._path('H1', 'energy'), 'ab') as column_file:
+        column_file.write(np.zeros(3).tobytes())
+    assert store.length('H1') == 70
+    model.log_readings(_readings('H1', 5, datetime(2024, 2, 1))).result()
+    assert store.length('H1') == 75
+    tail = [row[1] for row in _readings('H1', 5)]
+    np.testing.assert_array_equal(store.read('H1', ('energy',))['energy'][-5:], tail)
+
+    rebuilt = ColumnStore(str(tmp_path / 'rebuilt'))
+    rebuilt.rebuild(model.db_path)
+    assert rebuilt.is_sorted('H1')
+    expected = _sql_arrays(model.db_path, 'H1')
+    for column in COLUMNS:
+        np.testing.assert_array_equal(rebuilt.read('H1', (column,))[column], expected[column])
@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+
+import pytest
+
+from backend.connection import ConnectionPool, WriteQueue
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'records.db'))
+    with pool.connection() as conn:
+        conn.execute('CREATE TABLE items (name TEXT UNIQUE)')
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def writer(pool):
+    writer = WriteQueue(pool)
+    yield writer
+    writer.close()
+
+
+def _insert(conn, name):
+    conn.execute('INSERT INTO items (name) VALUES (?)', (name,))
+    return name
+
+
+def _names(pool):
+    return sorted(row[0] for row in pool.get().execute('SELECT name FROM items'))
+
+
+def test_failed_operation_only_rolls_back_its_own_savepoint(pool, writer):
+    release = threading.Event()
+    blocker = writer.submit(lambda conn: release.wait())
+
+    def insert_twice(conn):
+        _insert(conn, 'c')
+        _insert(conn, 'a')
+
+    futures = [writer.submit(_insert, 'a'), writer.submit(insert_twice), writer.submit(_insert, 'b')]
+    release.set()
+    blocker.result()
+
+    assert futures[0].result() == 'a'
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result()
+    assert futures[2].result() == 'b'
+    # 'c' was inserted by the failed operation and is rolled back with it
+    assert _names(pool) == ['a', 'b']
+
+
+def test_submit_then_runs_callback_before_the_next_transaction(pool, writer):
+    seen = []
+    future = writer.submit_then(lambda name: seen.append((name, _names(pool))), _insert, 'a')
+    # The callback already sees the committed row, and has run when the future resolves
+    assert future.result() == 'a'
+    assert seen == [('a', ['a'])]
+
+    failed = writer.submit_then(seen.append, _insert, 'a')
+    with pytest.raises(sqlite3.IntegrityError):
+        failed.result()
+    assert len(seen) == 1
+
+
+def test_execute_from_the_writer_thread_is_refused(writer):
+    with pytest.raises(RuntimeError):
+        writer.execute(lambda conn: writer.execute(_insert, 'a'))
+
+
+def test_pool_keeps_one_connection_per_thread(pool):
+    main = pool.get()
+    assert pool.get() is main
+    others = []
+    thread = threading.Thread(target=lambda: others.append(pool.get()))
+    thread.start()
+    thread.join()
+    assert others[0] is not main
+    # The exited thread's connection is closed and no longer tracked
+    assert others[0] not in pool._connections
+    with pytest.raises(sqlite3.ProgrammingError):
+        others[0].execute('SELECT 1')
+
+
+def test_submit_alone_runs_between_transactions_in_queue_order(pool, writer):
+    release = threading.Event()
+    blocker = writer.submit(lambda conn: release.wait())
+    seen = []
+    first = writer.submit(_insert, 'a')
+    alone = writer.submit_alone(lambda conn: seen.append((conn.in_transaction, _names(pool))))
+    last = writer.submit(_insert, 'b')
+    release.set()
+
+    for future in (blocker, first, alone, last):
+        future.result()
+    # The operation queued before it has committed, the one after has not started
+    assert seen == [(False, ['a'])]
+    assert _names(pool) == ['a', 'b']
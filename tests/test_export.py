@@ -0,0 +1,69 @@
+import csv
+import gzip
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from backend.model import LoggerModel
+from backend.schema import DATETIME_FORMAT
+
+pytest.importorskip('pyarrow')
+
+
+def _readings(household: str, count: int, start: datetime, step: timedelta = timedelta(minutes=30)):
+    return [(17.5 + i % 8, 20.25 + i % 11, 1 + i % 3, (start + i * step).strftime(DATETIME_FORMAT), household)
+            for i in range(count)]
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    recent = datetime.now().replace(second=0, microsecond=0) - timedelta(days=2)
+    model.log_readings(_readings('H1', 300, datetime(2021, 3, 30)) + _readings('H1', 40, recent) +
+                       _readings('H2', 80, recent)).result()
+    assert model.archive_older_than(30)['rows'] == 300
+    yield model
+    model.close()
+
+
+def test_csv_export_imports_back_into_the_same_data(model, tmp_path):
+    path = str(tmp_path / 'export.csv')
+    stats = model.export(path, chunk_size=64)
+    assert stats['rows'] == 420
+
+    (tmp_path / 'copy').mkdir()
+    copy = LoggerModel(str(tmp_path / 'copy' / 'records.db'))
+    try:
+        assert copy.import_csv(path, chunk_size=100)[0]['rows'] == 420
+        for household in ('H1', 'H2'):
+            pd.testing.assert_frame_equal(copy.get_all_data(household), model.get_all_data(household))
+            pd.testing.assert_frame_equal(copy.get_summary(household, 'month'), model.get_summary(household, 'month'))
+    finally:
+        copy.close()
+
+
+def test_compressed_and_parquet_exports_hold_the_same_rows(model, tmp_path):
+    csv_path = str(tmp_path / 'export.csv')
+    model.export(csv_path, households=['H1'], start=datetime(2021, 4, 1), end=datetime(2021, 4, 5))
+    with open(csv_path, newline='') as csv_file:
+        rows = list(csv.reader(csv_file))
+    # 30 minute readings from 30/03 00:00, the window holds 01/04 00:00 up to 05/04 00:00
+    assert rows[0] == ['id', 'temperature', 'energy', 'person', 'datetime', 'household']
+    assert len(rows) == 1 + 4 * 48
+    assert rows[1][4] == '01/04/2021 00:00' and rows[-1][4] == '04/04/2021 23:30'
+
+    gz_path = str(tmp_path / 'export.csv.gz')
+    model.export(gz_path, households=['H1'], start=datetime(2021, 4, 1), end=datetime(2021, 4, 5))
+    with gzip.open(gz_path, 'rt', newline='') as gz_file:
+        assert list(csv.reader(gz_file)) == rows
+
+    parquet_path = str(tmp_path / 'export.parquet')
+    assert model.export(parquet_path, chunk_size=50)['rows'] == 420
+    table = pd.read_parquet(parquet_path)
+    assert table['household'].value_counts().to_dict() == {'H1': 340, 'H2': 80}
+    assert table['energy'].sum() == pytest.approx(model.get_all_data('H1')['energy'].sum() +
+                                                  model.get_all_data('H2')['energy'].sum())
+
+    with pytest.raises(ValueError):
+        model.export(str(tmp_path / 'export.json'))
@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from backend.ingest_service import IngestService, parse_reading
+from backend.model import LoggerModel
+
+
+def _lines(count: int, household: str = 'H1'):
+    return [f"20,{i},1,01/01/2024 {i // 60}:{i % 60:02d},{household}" for i in range(count)]
+
+
+async def _send(service, lines):
+    _, writer = await asyncio.open_connection(service.host, service.port)
+    writer.write(''.join(f'{line}\n' for line in lines).encode())
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+def _serve(model, lines, **options):
+    async def run():
+        service = IngestService(model, port=0, flush_interval=0.05, **options)
+        await service.start()
+        await _send(service, lines)
+        while service.metrics()['received'] + service.metrics()['rejected'] < len(lines):
+            await asyncio.sleep(0.01)
+        await service.stop()
+        return service.metrics()
+
+    return asyncio.run(run())
+
+
+def _count(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM sensor_data').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_parse_reading_rejects_bad_datetime():
+    assert parse_reading('20,1,1,1/1/2024 7:05,H1') == (20.0, 1.0, 1, '1/1/2024 7:05', 'H1')
+    with pytest.raises(ValueError):
+        parse_reading('20,1,1,not a date,H1')
+
+
+def test_malformed_line_does_not_stop_ingest(tmp_path):
+    db_path = str(tmp_path / 'records.db')
+    model = LoggerModel(db_path)
+    try:
+        metrics = _serve(model, ['20,1,1,not a date,H1', *_lines(105)], batch_size=10)
+    finally:
+        model.close()
+
+    assert metrics['rejected'] == 1
+    assert metrics['written'] == 105
+    assert metrics['failed'] == 0
+    assert _count(db_path) == 105
+
+
+def test_failed_batch_is_counted_and_later_batches_written(tmp_path):
+    db_path = str(tmp_path / 'records.db')
+    model = LoggerModel(db_path)
+    log_readings = model.log_readings
+    calls = []
+
+    def fail_first(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError('disk I/O error')
+        return log_readings(rows)
+
+    model.log_readings = fail_first
+    try:
+        metrics = _serve(model, _lines(30), batch_size=10)
+    finally:
+        model.close()
+
+    assert metrics['failed_batches'] == 1
+    assert metrics['failed'] + metrics['written'] == 30
+    assert _count(db_path) == metrics['written'] > 0
+
+
+def test_stop_closes_open_connections_after_writing_their_readings(tmp_path):
+    db_path = str(tmp_path / 'records.db')
+    model = LoggerModel(db_path)
+
+    async def run():
+        service = IngestService(model, port=0, flush_interval=0.05, batch_size=10)
+        await service.start()
+        reader, writer = await asyncio.open_connection(service.host, service.port)
+        writer.write(''.join(f'{line}\n' for line in _lines(25)).encode())
+        await writer.drain()
+        while service.metrics()['received'] < 25:
+            await asyncio.sleep(0.01)
+
+        # The client never disconnects on its own
+        await asyncio.wait_for(service.stop(), timeout=5)
+        assert await asyncio.wait_for(reader.read(), timeout=5) == b''
+        writer.close()
+        return service.metrics()
+
+    try:
+        metrics = asyncio.run(run())
+    finally:
+        model.close()
+
+    assert metrics['written'] == 25
+    assert metrics['queue_depth'] == 0
+    assert _count(db_path) == 25
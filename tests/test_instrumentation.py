@@ -0,0 +1,74 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from backend.instrumentation import Instrumentation, InstrumentedConnection, normalize_sql
+from backend.model import LoggerModel
+from backend.schema import DATETIME_FORMAT
+
+
+def _readings(household: str, count: int):
+    return [(20.0 + i % 5, 50.0 + i % 7, 1 + i % 3,
+             (datetime(2024, 1, 1) + timedelta(minutes=i)).strftime(DATETIME_FORMAT), household) for i in range(count)]
+
+
+def _connect(instrumentation):
+    conn = sqlite3.connect(':memory:', factory=InstrumentedConnection)
+    conn.instrumentation = instrumentation
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)')
+    conn.executemany('INSERT INTO t (name) VALUES (?)', [(f'name{i}',) for i in range(10)])
+    return conn
+
+
+def test_cursor_records_rows_and_bytes_across_fetches():
+    instrumentation = Instrumentation(slow_query_seconds=None)
+    conn = _connect(instrumentation)
+    cursor = conn.execute('SELECT name FROM t ORDER BY id')
+    assert len(cursor.fetchmany(4)) == 4
+    assert len(cursor.fetchall()) == 6
+    assert [row for row in conn.cursor().execute('SELECT id FROM t WHERE id <= 3')] == [(1,), (2,), (3,)]
+    conn.close()
+
+    queries = instrumentation.snapshot()['queries']
+    names = queries['SELECT name FROM t ORDER BY id']
+    assert names['count'] == 1
+    assert names['rows'] == 10
+    assert names['bytes'] == sum(len(f'name{i}') for i in range(10))
+    assert queries['SELECT id FROM t WHERE id <= 3']['rows'] == 3
+    assert queries['INSERT INTO t (name) VALUES (?)']['count'] == 1
+    assert 'energy_logger_query_seconds_count{query="SELECT name FROM t ORDER BY id"} 1' in \
+        instrumentation.prometheus()
+
+
+def test_slow_log_explains_only_queries_and_dml():
+    instrumentation = Instrumentation(slow_query_seconds=0)
+    conn = _connect(instrumentation)
+    conn.execute('SELECT name FROM t WHERE id = ?', (3,)).fetchall()
+    conn.execute('CREATE INDEX idx_t_name ON t (name)')
+    conn.executescript('CREATE TABLE u (x); CREATE TABLE v (y)')
+    conn.close()
+
+    plans = {entry['sql']: entry['plan'] for entry in instrumentation.snapshot()['slow_queries']}
+    assert plans['CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)'] == []
+    assert plans['CREATE INDEX idx_t_name ON t (name)'] == []
+    assert plans['CREATE TABLE u (x); CREATE TABLE v (y)'] == []
+    assert not any('unavailable' in detail for plan in plans.values() for detail in plan)
+    assert any('USING INTEGER PRIMARY KEY' in detail for detail in plans['SELECT name FROM t WHERE id = ?'])
+
+
+def test_model_methods_and_statements_are_recorded(tmp_path):
+    instrumentation = Instrumentation(slow_query_seconds=None)
+    model = LoggerModel(str(tmp_path / 'records.db'), instrumentation=instrumentation)
+    try:
+        model.log_readings(_readings('H1', 50)).result()
+        data = model.get_all_data('H1')
+    finally:
+        model.close()
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot['methods']['LoggerModel.get_all_data']['count'] == 1
+    assert snapshot['methods']['LoggerModel.log_readings']['count'] == 1
+    # The statement pandas ran returned every row it put in the frame
+    reads = [stats for sql, stats in snapshot['queries'].items()
+             if sql.startswith('SELECT') and 'FROM sensor_data' in sql and stats['rows'] == len(data)]
+    assert len(data) == 50 and reads
+    assert all(normalize_sql(sql) == sql for sql in snapshot['queries'])
@@ -0,0 +1,187 @@
+import csv
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.colstore import ColumnStore
+from backend.linear_regression import (BatchLinearRegression, DisplayLinearRegression, IncrementalLinearRegression,
+                                       RegressionCache)
+from backend.model import LoggerModel
+from backend.schema import DATETIME_FORMAT
+
+FEATURES = ['temperature', 'person']
+
+
+def _readings(household: str, count: int, start: datetime = datetime(2024, 1, 1), seed: int = 0,
+              noise: float = 5):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(count):
+        temperature = float(rng.uniform(15, 30))
+        person = int(rng.integers(1, 6))
+        energy = 30 + 4 * temperature + 9 * person + float(rng.normal(0, noise))
+        rows.append((temperature, energy, person, (start + timedelta(minutes=i)).strftime(DATETIME_FORMAT), household))
+    return rows
+
+
+def _least_squares(db_path: str, household: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        values = np.array(conn.execute('SELECT temperature, person, energy FROM sensor_data WHERE household = ?',
+                                       (household,)).fetchall(), dtype=float)
+    finally:
+        conn.close()
+    design = np.column_stack([np.ones(len(values)), values[:, :-1]])
+    beta = np.linalg.lstsq(design, values[:, -1], rcond=None)[0]
+    return {'coef': beta[1:], 'intercept': beta[0], 'n': len(values)}
+
+
+def _assert_fit(fit, expected):
+    assert fit['n'] == expected['n']
+    np.testing.assert_allclose(fit['coef'], expected['coef'], rtol=1e-6)
+    assert fit['intercept'] == pytest.approx(expected['intercept'], rel=1e-6)
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    model.log_readings(_readings('H1', 500) + _readings('H2', 300, seed=1)).result()
+    yield model
+    model.close()
+
+
+def test_rebuild_matches_batch_fit(model):
+    regression = IncrementalLinearRegression(model.db_path, FEATURES)
+    regression.rebuild()
+    batch = BatchLinearRegression(model.db_path, FEATURES).fit().set_index('household')
+    for household in ('H1', 'H2'):
+        fit = regression.fit(household)
+        _assert_fit(fit, _least_squares(model.db_path, household))
+        assert fit['n'] == batch.loc[household, 'n']
+        np.testing.assert_allclose(fit['coef'], batch.loc[household, ['coef_temperature', 'coef_person']].to_numpy(),
+                                   rtol=1e-6)
+
+
+def test_batch_fit_matches_per_household_fits(tmp_path):
+    model = LoggerModel(str(tmp_path / 'linear.db'))
+    # Without noise every train split fits the same coefficients as the whole household
+    model.log_readings(_readings('H1', 400, noise=0) + _readings('H2', 250, seed=1, noise=0) +
+                       _readings('H3', 120, seed=2)).result()
+    store = ColumnStore(str(tmp_path / 'store'))
+    store.rebuild(model.db_path)
+    display = DisplayLinearRegression(model=model)
+    try:
+        batch = BatchLinearRegression(model.db_path, FEATURES, chunk_size=100).fit(['H1', 'H2']).set_index('household')
+        assert sorted(batch.index) == ['H1', 'H2']
+        for household in ('H1', 'H2'):
+            fit = display.fit_household(household, FEATURES, 'energy', 0.2, 0)
+            np.testing.assert_allclose(batch.loc[household, ['coef_temperature', 'coef_person']].to_numpy(float),
+                                       fit['coef'], rtol=1e-6)
+            assert batch.loc[household, 'intercept'] == pytest.approx(fit['intercept'], rel=1e-6)
+            assert batch.loc[household, 'n'] == fit['train_rows'] + fit['test_rows']
+            assert batch.loc[household, 'r2'] == pytest.approx(1.0)
+
+        everything = BatchLinearRegression(model.db_path, FEATURES).fit().set_index('household')
+        from_store = BatchLinearRegression(model.db_path, FEATURES, column_store=store).fit().set_index('household')
+        for household in ('H1', 'H2', 'H3'):
+            _assert_fit({'n': everything.loc[household, 'n'],
+                         'coef': everything.loc[household, ['coef_temperature', 'coef_person']].to_numpy(float),
+                         'intercept': everything.loc[household, 'intercept']},
+                        _least_squares(model.db_path, household))
+        np.testing.assert_allclose(from_store.sort_index()[everything.columns].to_numpy(float),
+                                   everything.sort_index().to_numpy(float), rtol=1e-6)
+    finally:
+        display.cache.close()
+        model.close()
+
+
+def test_attached_fit_follows_logged_readings(model):
+    regression = IncrementalLinearRegression(model.db_path, FEATURES)
+    regression.attach(model)
+    regression.fit('H1')
+
+    model.log_readings(_readings('H1', 200, datetime(2024, 2, 1), seed=2)).result()
+    _assert_fit(regression.fit('H1'), _least_squares(model.db_path, 'H1'))
+
+
+@pytest.mark.parametrize('household', ['H1', None])
+def test_readings_logged_during_a_rebuild_are_counted_once(model, tmp_path, household):
+    regression = IncrementalLinearRegression(model.db_path, FEATURES)
+    regression.attach(model)
+    path = str(tmp_path / 'more.csv')
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'temperature', 'energy', 'person', 'datetime', 'household'])
+        writer.writerows((0, *row) for row in _readings('H1', 250, datetime(2024, 3, 1), seed=3))
+
+    read_stats = regression._read_stats
+
+    def read_while_logging(*args):
+        # Both arrive after the cutoff, so the rebuild must buffer them instead of reading them
+        model.log_readings(_readings('H1', 100, datetime(2024, 2, 1), seed=2)).result()
+        model.import_csv(path, chunk_size=100)
+        assert regression._pending
+        return read_stats(*args)
+
+    regression._read_stats = read_while_logging
+    regression.rebuild(household)
+    assert not regression._pending
+
+    _assert_fit(regression.fit('H1'), _least_squares(model.db_path, 'H1'))
+
+
+def test_cached_fit_is_reused_until_readings_change(model):
+    cache = RegressionCache(model.db_path)
+    regression = DisplayLinearRegression(model.db_path, cache)
+    try:
+        first = regression.fit_household('H1', FEATURES, 'energy', 0.2, 0)
+        assert first['watermark'] == cache.watermark('H1')
+        assert cache.get('H1', FEATURES, 'energy', 0.2, 0, cache.watermark('H1')) == first
+
+        model.log_readings(_readings('H1', 10, datetime(2024, 2, 1), seed=2)).result()
+        assert cache.get('H1', FEATURES, 'energy', 0.2, 0, cache.watermark('H1')) is None
+        second = regression.fit_household('H1', FEATURES, 'energy', 0.2, 0)
+        assert second['train_rows'] == 408
+
+        # Rows written around insert_readings (and the rollups) still move the watermark,
+        # as does replacing a row with another one
+        conn = sqlite3.connect(model.db_path)
+        with conn:
+            conn.execute("INSERT INTO sensor_data (temperature, energy, person, datetime, household, ts) "
+                         "VALUES (20, 100, 1, '01/01/2023 00:00', 'H1', 1672531200)")
+        assert cache.get('H1', FEATURES, 'energy', 0.2, 0, cache.watermark('H1')) is None
+        third = regression.fit_household('H1', FEATURES, 'energy', 0.2, 0)
+        with conn:
+            conn.execute("DELETE FROM sensor_data WHERE id = (SELECT MAX(id) FROM sensor_data WHERE household = 'H1')")
+            conn.execute("INSERT INTO sensor_data (temperature, energy, person, datetime, household, ts) "
+                         "VALUES (21, 90, 2, '01/01/2023 00:00', 'H1', 1672531200)")
+        conn.close()
+        assert cache.get('H1', FEATURES, 'energy', 0.2, 0, cache.watermark('H1')) is None
+        assert regression.fit_household('H1', FEATURES, 'energy', 0.2, 0)['watermark'] != third['watermark']
+
+        # The watermark is read from the (household, ts) index without touching table rows
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+        cache.watermark('H1')
+        cache._conn.set_trace_callback(None)
+        plan = cache._conn.execute(f'EXPLAIN QUERY PLAN {statements[-1]}').fetchall()
+        assert 'COVERING INDEX idx_sensor_data_household_ts' in str(plan)
+    finally:
+        cache.close()
+
+
+def test_cached_fits_are_written_through_a_writer(model):
+    regression = DisplayLinearRegression(model=model)
+    regression.fit_household('H1', FEATURES, 'energy', 0.2, 0)
+    assert regression.cache.writer is model.writer
+    regression.cache.close()
+
+    standalone = RegressionCache(model.db_path)
+    try:
+        result = DisplayLinearRegression(model.db_path, standalone).fit_household('H2', FEATURES, 'energy', 0.2, 0)
+        assert standalone.get('H2', FEATURES, 'energy', 0.2, 0, standalone.watermark('H2')) == result
+    finally:
+        standalone.close()
+    assert standalone.writer._thread is None
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from backend.model import LoggerModel, SensorTableModel
+from backend.schema import DATETIME_FORMAT
+
+
+def _readings(household: str, count: int, start: datetime = datetime(2024, 1, 1), meters: int = 2):
+    # Every datetime has one row per meter, so results are sums over several rows
+    return [(18.0 + i % 10 + meter, 40.0 + 3 * (i % 7) + meter, 1 + (i + meter) % 4,
+             (start + timedelta(minutes=15 * i)).strftime(DATETIME_FORMAT), household)
+            for i in range(count) for meter in range(meters)]
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    model.log_readings(_readings('H1', 200) + _readings('H2', 50)).result()
+    yield model
+    model.close()
+
+
+def test_pages_cover_the_whole_range(model):
+    everything = model.get_all_data('H1')
+    assert len(everything) == 200
+    assert everything['household'].unique().tolist() == ['H1']
+
+    pages = [model.get_all_data('H1', limit=30, offset=offset) for offset in range(0, 200, 30)]
+    assert [len(page) for page in pages] == [30] * 6 + [20]
+    pd.testing.assert_frame_equal(pd.concat(pages, ignore_index=True), everything)
+
+    # Keyset pages, resuming after the last datetime of the previous one
+    pages, after = [], None
+    while True:
+        page = model.get_all_data('H1', after=after, limit=45)
+        if page.empty:
+            break
+        pages.append(page)
+        after = page['datetime'].iloc[-1]
+    pd.testing.assert_frame_equal(pd.concat(pages, ignore_index=True), everything)
+
+
+def test_time_window_and_projection_match_the_full_result(model):
+    everything = model.get_all_data('H1')
+    start, end = datetime(2024, 1, 1, 10), datetime(2024, 1, 2)
+    window = model.get_all_data('H1', start=start, end=end)
+    # 10:00 up to midnight in 15 minute steps
+    assert len(window) == 56
+    pd.testing.assert_frame_equal(window, everything.iloc[40:96].reset_index(drop=True))
+    assert model.get_all_data('H1', start=start.strftime(DATETIME_FORMAT), end=end)['datetime'].tolist() == \
+        window['datetime'].tolist()
+
+    energy = model.get_all_data('H1', columns=['energy'], limit=20, offset=5)
+    assert energy.columns.tolist() == ['datetime', 'household', 'energy']
+    pd.testing.assert_frame_equal(energy, everything[['datetime', 'household', 'energy']].iloc[5:25]
+                                  .reset_index(drop=True))
+
+    with pytest.raises(ValueError):
+        model.get_all_data('H1', columns=['energy; DROP TABLE sensor_data'])
+
+
+@pytest.mark.parametrize('options', [{}, {'limit': 25, 'offset': 60}, {'start': datetime(2024, 1, 2)},
+                                     {'columns': ['person', 'temperature']}])
+def test_sql_and_pandas_aggregation_agree(model, options):
+    sql = model.get_all_data('H1', **options)
+    pandas = model.get_all_data('H1', aggregate='pandas', **options)
+    assert not sql.empty
+    pd.testing.assert_frame_equal(sql, pandas, check_dtype=False)
+
+
+def test_buckets_sum_every_reading_in_them(model):
+    raw = pd.DataFrame(_readings('H1', 200), columns=['temperature', 'energy', 'person', 'datetime', 'household'])
+    days = pd.to_datetime(raw['datetime'], format=DATETIME_FORMAT).dt.strftime('%d/%m/%Y 00:00')
+    expected = raw.groupby(days)[['temperature', 'energy', 'person']].sum()
+
+    daily = model.get_all_data('H1', bucket=86400)
+    assert daily['datetime'].tolist() == expected.index.tolist()
+    assert daily['energy'].tolist() == pytest.approx(expected['energy'].tolist())
+    assert daily['person'].tolist() == expected['person'].tolist()
+
+    with pytest.raises(ValueError):
+        model.get_all_data('H1', aggregate='pandas', bucket=86400)
+
+
+def test_table_model_fetches_pages_and_reloads_evicted_ones(model):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    everything = model.get_all_data('H1', columns=['energy'])
+    loads = []
+    get_all_data = model.get_all_data
+    model.get_all_data = lambda *args, **kwargs: loads.append(kwargs) or get_all_data(*args, **kwargs)
+
+    table = SensorTableModel(model, 'H1', columns=['energy'], page_size=30, max_pages=2, cache_size=10)
+    assert table.rowCount() == 0 and table.canFetchMore()
+    while table.canFetchMore():
+        table.fetchMore()
+    app.processEvents()
+    assert table.rowCount() == 200
+    assert table.columnCount() == 3
+    assert [table.headerData(column, Qt.Horizontal, Qt.DisplayRole) for column in range(3)] == \
+        ['datetime', 'household', 'energy']
+    # Seven pages, the last one short, each resuming after the previous page
+    assert len(loads) == 7
+    assert all(load['limit'] == 30 and load['start'] is None for load in loads)
+
+    loads.clear()
+    cells = [(table.data(table.index(row, 0)), table.data(table.index(row, 2))) for row in range(200)]
+    assert cells == [(row.datetime, str(row.energy)) for row in everything.itertuples()]
+    # Only two pages stay loaded, so reading from the top reloads each one from its first datetime
+    assert [load['start'] for load in loads] == everything['datetime'].iloc[::30].tolist()
+    assert len(table._pages) == 2
+
+    loads.clear()
+    assert table.data(table.index(199, 2)) == str(everything['energy'].iloc[199])
+    assert table.data(table.index(5, 0)) == everything['datetime'].iloc[5]
+    assert [load['start'] for load in loads] == [everything['datetime'].iloc[0]]
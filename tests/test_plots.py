@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from backend.plots import RegressionPlotter, sample_indices
+
+
+def test_headless_plotting_does_not_import_qt_or_pandas():
+    code = ("import sys; import backend.plots, backend.linear_regression; "
+            "print(sorted(name for name in ('PyQt5', 'pandas') if name in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.join(os.path.dirname(__file__), os.pardir)).stdout
+    assert output.strip() == '[]'
+
+
+def test_render_writes_downsampled_plot(tmp_path):
+    x = np.linspace(15, 30, 20000)
+    plotter = RegressionPlotter(max_points=500)
+    path = plotter.render(str(tmp_path / 'H1.png'), x, 4 * x + 30, 4.0, 30.0, title='H1')
+    assert open(path, 'rb').read(8) == b'\x89PNG\r\n\x1a\n'
+    assert len(plotter._axes.collections[0].get_offsets()) == 500
+
+
+def test_regression_display_draws_sampled_points_and_a_two_point_line(tmp_path, monkeypatch):
+    import pandas as pd
+    from matplotlib.figure import Figure
+
+    from backend.linear_regression import DisplayLinearRegression
+
+    saved = []
+    monkeypatch.setattr(Figure, 'savefig', lambda figure, path: saved.append(figure))
+    rng = np.random.default_rng(0)
+    x = rng.uniform(15, 30, 10000)
+    dataset = pd.DataFrame({'temperature': x, 'energy': 4 * x + 30 + rng.normal(0, 1, len(x))})
+    DisplayLinearRegression().display_linear_regression(dataset, ['temperature'], 'energy', 0.4, 0,
+                                                        output=str(tmp_path / 'plot.png'), max_points=300)
+
+    axes = saved[0].axes[0]
+    assert len(axes.collections[0].get_offsets()) == 300
+    line_x, line_y = axes.lines[0].get_data()
+    assert len(line_x) == 2 and line_x[0] < line_x[1]
+    np.testing.assert_allclose(np.diff(line_y) / np.diff(line_x), [4.0], rtol=0.01)
+
+    assert sample_indices(5, 10).tolist() == [0, 1, 2, 3, 4]
+    indices = sample_indices(1000, 10)
+    assert len(indices) == 10 and np.all(np.diff(indices) > 0)
@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.model import LoggerModel
+from backend.schema import DATETIME_FORMAT
+
+
+class Household:
+    def __init__(self, name: str):
+        self.name = name
+
+    def get_name(self):
+        return self.name
+
+    def get_num_person(self):
+        return 2
+
+
+def _readings(household: str, count: int, start: datetime = datetime(2024, 1, 1)):
+    return [(20.0 + i % 5, 50.0 + i % 7, 1 + i % 3, (start + timedelta(minutes=i)).strftime(DATETIME_FORMAT),
+             household) for i in range(count)]
+
+
+def _counts(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute('SELECT household, COUNT(*) FROM sensor_data GROUP BY household').fetchall())
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('sharded', [False, True])
+def test_purge_removes_only_the_deleted_households_readings(tmp_path, sharded):
+    db_path = str(tmp_path / 'records.db')
+    model = LoggerModel(db_path, sharded=sharded)
+    try:
+        for name in ('H1', 'H2'):
+            model.register_household(Household(name))
+        model.log_readings(_readings('H1', 3000) + _readings('H2', 500)).result()
+        cache = model.regression_cache()
+        cache.put('H1', ['temperature'], 'energy', 0.2, 0, cache.watermark('H1'), {'coef': [1.0]})
+        model.purger.chunk_size = 700
+
+        progress = []
+        stats = model.delete_household(model.get_registered_household_id('H1'), progress.append).result()
+
+        assert stats['rows'] == 3000
+        assert [status['rows'] for status in progress if status['phase'] == 'deleting'][-1] == 3000
+        assert progress[-1]['phase'] == 'done'
+        assert stats['freed_bytes'] > 0
+        assert model.get_all_data('H1').empty
+        assert model.get_summary('H1', 'day').empty
+        assert len(model.get_all_data('H2')) == 500
+        assert cache.watermark('H1') == '::'
+        assert cache.get('H1', ['temperature'], 'energy', 0.2, 0, '::') is None
+        cache.close()
+        if not sharded:
+            assert _counts(db_path) == {'H2': 500}
+    finally:
+        model.close()
+
+
+def test_purge_keeps_readings_of_a_household_registered_again(tmp_path):
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    gate = threading.Event()
+    try:
+        model.register_household(Household('H1'))
+        model.log_readings(_readings('H1', 1000)).result()
+        # The first progress report holds the purge until the new readings are in
+        purge = model.delete_household(model.get_registered_household_id('H1'), lambda status: gate.wait(5))
+        model.register_household(Household('H1'))
+        model.log_readings(_readings('H1', 10, datetime(2024, 2, 1))).result()
+        gate.set()
+
+        assert purge.result()['rows'] == 1000
+        assert len(model.get_all_data('H1')) == 10
+        assert model.get_summary('H1', 'day')['readings'].tolist() == [10]
+    finally:
+        gate.set()
+        model.close()
+
+
+def test_purge_keeps_archived_and_stored_readings_of_a_household_registered_again(tmp_path):
+    pytest.importorskip('pyarrow')
+    model = LoggerModel(str(tmp_path / 'records.db'), column_store_dir=str(tmp_path / 'store'))
+    gate = threading.Event()
+    try:
+        model.register_household(Household('H1'))
+        model.log_readings(_readings('H1', 1000)).result()
+        model.archive_older_than(30)
+        purge = model.delete_household(model.get_registered_household_id('H1'), lambda status: gate.wait(5))
+
+        # The new household's readings reach the archive and column store before the purge goes on
+        model.register_household(Household('H1'))
+        recent = datetime.now().replace(second=0, microsecond=0) - timedelta(days=1)
+        model.log_readings(_readings('H1', 10, datetime(2024, 2, 1)) + _readings('H1', 5, recent)).result()
+        model.archive_older_than(30)
+        gate.set()
+
+        purge.result()
+        assert len(model.get_all_data('H1')) == 15
+        assert model.get_summary('H1', 'month')['readings'].sum() == 15
+        assert model.column_store.length('H1') == 15
+        assert model.archive.read('H1', ['energy'])['energy'].tolist() == [row[1] for row in _readings('H1', 10)]
+    finally:
+        gate.set()
+        model.close()
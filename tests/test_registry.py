@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+from backend.model import LoggerModel
+
+
+class Household:
+    def __init__(self, name: str, persons: int = 2):
+        self.name = name
+        self.persons = persons
+
+    def get_name(self):
+        return self.name
+
+    def get_num_person(self):
+        return self.persons
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    yield model
+    model.close()
+
+
+def test_registry_follows_register_activate_and_delete(model):
+    model.register_household(Household('north'))
+    model.register_household(Household('South', 4))
+    north = model.get_registered_household_id('NORTH')
+    south = model.get_household_by_name('SOUTH')['id']
+    assert model.get_registered_households() == [{'id': north, 'name': 'NORTH'}, {'id': south, 'name': 'SOUTH'}]
+    with pytest.raises(ValueError):
+        model.register_household(Household('North'))
+    assert len(model.get_registered_households()) == 2
+
+    model.save_active_household({'id': south, 'name': 'SOUTH'})
+    assert model.get_active_household() == {'id': south, 'name': 'SOUTH'}
+    assert model.registry.get_by_id(str(south))['current_person'] == 4
+
+    # Ids from the UI can arrive as strings
+    model.delete_household(str(south)).result()
+    assert model.get_household_by_name('SOUTH') is None
+    assert model.get_active_household() is None
+    assert model.get_registered_households() == [{'id': north, 'name': 'NORTH'}]
+
+    # The cache agrees with a fresh load from the tables
+    model.registry.invalidate()
+    assert model.get_registered_households() == [{'id': north, 'name': 'NORTH'}]
+    assert model.get_active_household() is None
+
+
+def test_invalidate_picks_up_edits_from_another_connection(model):
+    model.register_household(Household('H1'))
+    assert model.get_registered_household_id('H1') is not None
+
+    conn = sqlite3.connect(model.db_path)
+    with conn:
+        conn.execute("INSERT INTO households (household_name, current_person) VALUES ('H2', 3)")
+        conn.execute("DELETE FROM households WHERE household_name = 'H1'")
+    conn.close()
+
+    # Lookups are served from memory until the cache is invalidated
+    assert model.get_registered_household_id('H1') is not None
+    assert model.get_household_by_name('H2') is None
+    model.registry.invalidate()
+    assert model.get_registered_household_id('H1') is None
+    assert model.get_household_by_name('H2')['name'] == 'H2'
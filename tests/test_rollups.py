@@ -0,0 +1,73 @@
+import csv
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from backend.model import LoggerModel
+from backend.rollups import BUCKETS, ROLLUPS, rollup_table
+from backend.schema import DATETIME_FORMAT
+
+
+def _readings(household: str, count: int, start: datetime, step: timedelta = timedelta(minutes=37)):
+    return [(15.0 + i % 11, 2.5 + i % 13, i % 4, (start + i * step).strftime(DATETIME_FORMAT), household)
+            for i in range(count)]
+
+
+def _rollup_and_raw(db_path: str, name: str):
+    bucket = BUCKETS[name].format('ts')
+    conn = sqlite3.connect(db_path)
+    try:
+        stored = conn.execute(f'''
+            SELECT household, bucket, energy, temperature_sum, temperature_count, person_sum, readings
+            FROM {rollup_table(name)} ORDER BY household, bucket
+        ''').fetchall()
+        raw = conn.execute(f'''
+            SELECT household, {bucket}, TOTAL(energy), TOTAL(temperature), COUNT(temperature), TOTAL(person), COUNT(*)
+            FROM sensor_data GROUP BY household, {bucket} ORDER BY household, {bucket}
+        ''').fetchall()
+    finally:
+        conn.close()
+    return stored, raw
+
+
+def test_rollups_match_raw_rows_after_every_kind_of_ingest(tmp_path):
+    db_path = str(tmp_path / 'records.db')
+    csv_path = tmp_path / 'backfill.csv'
+    with open(csv_path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['id', 'temperature', 'energy', 'person', 'datetime', 'household'])
+        writer.writerows((0, *row) for row in _readings('H2', 300, datetime(2024, 2, 27)))
+
+    model = LoggerModel(db_path)
+    try:
+        # Later batches add to buckets earlier ones already created
+        for offset in range(0, 900, 250):
+            batch = _readings('H1', 900, datetime(2024, 1, 30))[offset:offset + 250]
+            model.log_readings(batch).result()
+        model.import_csv(str(csv_path), chunk_size=70)
+        model.log_readings(_readings('H2', 40, datetime(2024, 2, 28, 3), timedelta(minutes=5))).result()
+
+        for name in ROLLUPS:
+            stored, raw = _rollup_and_raw(db_path, name)
+            assert [row[:2] for row in stored] == [row[:2] for row in raw]
+            for stored_row, raw_row in zip(stored, raw):
+                assert stored_row[2:] == pytest.approx(raw_row[2:])
+
+        rows = pd.DataFrame(_readings('H1', 900, datetime(2024, 1, 30)),
+                            columns=['temperature', 'energy', 'person', 'datetime', 'household'])
+        days = pd.to_datetime(rows['datetime'], format=DATETIME_FORMAT).dt.floor('D')
+        expected = rows.groupby(days).agg(energy=('energy', 'sum'), temperature=('temperature', 'mean'),
+                                          person=('person', 'mean'), readings=('energy', 'size'))
+        daily = model.get_summary('H1', 'day')
+        assert daily['datetime'].tolist() == expected.index.strftime(DATETIME_FORMAT).tolist()
+        for column in ('energy', 'temperature', 'person'):
+            assert daily[column].tolist() == pytest.approx(expected[column].tolist())
+        assert daily['readings'].tolist() == expected['readings'].tolist()
+
+        monthly = model.get_summary('H2', 'month')
+        assert monthly['datetime'].tolist() == ['01/02/2024 00:00', '01/03/2024 00:00']
+        assert monthly['readings'].sum() == 340
+    finally:
+        model.close()
@@ -0,0 +1,62 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.linear_regression import DisplayLinearRegression
+from backend.model import LoggerModel
+from backend.runner import AnalyticsRunner
+from backend.schema import DATETIME_FORMAT
+
+FEATURES = ['temperature', 'person']
+
+
+def _readings(household: str, count: int, offset: float, seed: int):
+    # Exactly linear, so every subset of the rows fits the same coefficients
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(count):
+        temperature = float(rng.uniform(15, 30))
+        person = int(rng.integers(1, 6))
+        rows.append((temperature, offset + 4 * temperature + 9 * person, person,
+                     (datetime(2024, 1, 1) + timedelta(minutes=i)).strftime(DATETIME_FORMAT), household))
+    return rows
+
+
+@pytest.fixture
+def model(tmp_path):
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    model.log_readings(_readings('H1', 400, 30, 0) + _readings('H2', 250, 55, 1)).result()
+    yield model
+    model.close()
+
+
+def test_runner_matches_per_household_fits(model):
+    results, timings = AnalyticsRunner(model.db_path, workers=2, feature_columns=FEATURES).run(['H2', 'H1'])
+    assert results['household'].tolist() == ['H1', 'H2']
+    assert timings['households'].sum() == 2
+
+    display = DisplayLinearRegression(model=model)
+    for row in results.itertuples():
+        fit = display.fit_household(row.household, FEATURES, 'energy', 0.2, 0)
+        np.testing.assert_allclose([row.coef_temperature, row.coef_person], fit['coef'], rtol=1e-6)
+        assert row.intercept == pytest.approx(fit['intercept'], rel=1e-6)
+        assert row.rows == fit['train_rows'] + fit['test_rows']
+        assert row.r2 == pytest.approx(1.0)
+    display.cache.close()
+
+
+def test_runner_reports_households_without_timestamps(model):
+    # Rows whose datetime could not be parsed are stored with a NULL ts
+    conn = sqlite3.connect(model.db_path)
+    with conn:
+        conn.executemany("INSERT INTO sensor_data (temperature, energy, person, datetime, household, ts) "
+                         "VALUES (?, ?, ?, 'not a date', 'H3', NULL)", [(20, 100, 1), (25, 120, 2)])
+    conn.close()
+
+    results, _ = AnalyticsRunner(model.db_path, workers=2, feature_columns=FEATURES).run(['H1', 'H3'])
+    h3 = results.set_index('household').loc['H3']
+    assert h3['rows'] == 2
+    assert np.isnan(h3['first_ts']) and np.isnan(h3['last_ts'])
+    assert h3['energy_total'] == 220
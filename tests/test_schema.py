@@ -0,0 +1,89 @@
+import csv
+import os
+import sqlite3
+
+from backend.connection import ConnectionPool
+from backend.schema import enable_incremental_vacuum, migrate, to_epoch
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), os.pardir, 'exdata', 'sample_3_day.csv')
+
+
+def _baseline_db(path):
+    # sensor_data as it was before ts, rollups and migrations existed
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE sensor_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            temperature REAL,
+            energy REAL,
+            person INTEGER,
+            datetime TEXT,
+            household TEXT
+        )
+    ''')
+    with open(SAMPLE_CSV, newline='') as file:
+        rows = [(row['temperature'], row['energy'], row['person'], row['datetime'], row['household'])
+                for row in csv.DictReader(file)]
+    conn.executemany('INSERT INTO sensor_data (temperature, energy, person, datetime, household) VALUES (?, ?, ?, ?, ?)',
+                     rows)
+    conn.commit()
+    return conn, rows
+
+
+def test_migrate_backfills_ts_for_sample_csv(tmp_path):
+    conn, rows = _baseline_db(str(tmp_path / 'records.db'))
+    # the sample mixes "22/12/2023 10:00" with unpadded hours like "23/12/2023 0:00"
+    assert any(len(row[3].split(' ')[1]) == 4 for row in rows)
+
+    migrate(conn)
+
+    stored = conn.execute('SELECT datetime, ts FROM sensor_data ORDER BY id').fetchall()
+    assert len(stored) == len(rows)
+    assert [ts for _, ts in stored] == [to_epoch(value) for value, _ in stored]
+    readings = conn.execute('SELECT SUM(readings) FROM sensor_rollup_hour').fetchone()[0]
+    assert readings == len(rows)
+
+
+def test_trigger_fills_ts_for_unpadded_inserts(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'records.db'))
+    migrate(conn)
+
+    for value in ('25/12/2023 7:00', '5/1/2024 07:05', '25/12/2023 23:59'):
+        ts = conn.execute('INSERT INTO sensor_data (datetime, household) VALUES (?, ?) RETURNING id',
+                          (value, 'H')).fetchone()[0]
+        assert conn.execute('SELECT ts FROM sensor_data WHERE id = ?', (ts,)).fetchone()[0] == to_epoch(value)
+
+
+def test_repair_migration_fixes_rows_left_null(tmp_path):
+    conn, rows = _baseline_db(str(tmp_path / 'records.db'))
+    migrate(conn)
+    conn.execute("UPDATE sensor_data SET ts = NULL WHERE datetime LIKE '% _:__'")
+    conn.execute('DELETE FROM sensor_rollup_hour')
+    conn.execute('INSERT INTO sensor_rollup_hour (household, bucket, readings) '
+                 'SELECT household, ts / 3600 * 3600, COUNT(*) FROM sensor_data WHERE ts IS NOT NULL '
+                 'GROUP BY household, ts / 3600 * 3600')
+    conn.execute('PRAGMA user_version = 6')
+    conn.commit()
+
+    migrate(conn)
+
+    assert conn.execute('SELECT COUNT(*) FROM sensor_data WHERE ts IS NULL').fetchone()[0] == 0
+    assert conn.execute('SELECT SUM(readings) FROM sensor_rollup_hour').fetchone()[0] == len(rows)
+
+
+def test_new_files_get_incremental_vacuum_without_a_rewrite(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'records.db'))
+    migrate(pool.get())
+    assert pool.get().execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    pool.close()
+
+
+def test_existing_files_switch_to_incremental_vacuum_only_on_request(tmp_path):
+    conn, _ = _baseline_db(str(tmp_path / 'records.db'))
+    migrate(conn)
+    assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+
+    conn.isolation_level = None
+    assert enable_incremental_vacuum(conn)
+    assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    assert not enable_incremental_vacuum(conn)
@@ -0,0 +1,71 @@
+import os
+import sqlite3
+
+import pytest
+
+from backend.model import LoggerModel
+from benchmarks.synthetic import generate
+from backend.shards import sensor_db_path, sensor_db_paths, shard_file_name
+
+
+def _readings(household: str, count: int):
+    return [(20.0, float(i), 1, f"01/01/2024 {i // 60}:{i % 60:02d}", household) for i in range(count)]
+
+
+def _count(path: str, household: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM sensor_data WHERE household = ?', (household,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('shard_count', [None, 2])
+def test_households_are_routed_to_their_shard(tmp_path, shard_count):
+    db_path = str(tmp_path / 'records.db')
+    model = LoggerModel(db_path, sharded=True, shard_count=shard_count)
+    try:
+        model.log_readings(_readings('H1', 30) + _readings('H/2', 20)).result()
+        for household, count in (('H1', 30), ('H/2', 20)):
+            path = sensor_db_path(db_path, household)
+            assert path == str(tmp_path / shard_file_name(db_path, household, shard_count))
+            assert _count(path, household) == count
+            assert _count(db_path, household) == 0
+            assert len(model.get_all_data(household)) == count
+            assert model.get_summary(household, 'day')['readings'].tolist() == [count]
+        assert model.get_logged_households() == {'H1', 'H/2'}
+        assert list(sensor_db_paths(db_path))[0] == db_path
+    finally:
+        model.close()
+
+
+def test_synthetic_readings_are_written_to_their_shards(tmp_path):
+    db_path = str(tmp_path / 'records.db')
+    model = LoggerModel(db_path, sharded=True)
+    try:
+        names = generate(model, households=3, readings=24)
+        for name in names:
+            assert _count(sensor_db_path(db_path, name), name) == 24
+            assert _count(db_path, name) == 0
+            assert model.get_summary(name, 'day')['readings'].tolist() == [24]
+        assert model.get_registered_household_id(names[0]) is not None
+    finally:
+        model.close()
+
+
+def test_unsharded_households_stay_in_the_catalog(tmp_path):
+    db_path = str(tmp_path / 'records.db')
+    model = LoggerModel(db_path)
+    try:
+        model.log_readings(_readings('H1', 10)).result()
+    finally:
+        model.close()
+
+    sharded = LoggerModel(db_path, sharded=True)
+    try:
+        sharded.log_readings(_readings('H1', 5) + _readings('H2', 5)).result()
+        assert _count(db_path, 'H1') == 15
+        assert sensor_db_path(db_path, 'H2') != db_path
+        assert os.path.exists(sensor_db_path(db_path, 'H2'))
+    finally:
+        sharded.close()
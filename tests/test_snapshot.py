@@ -0,0 +1,70 @@
+import csv
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.model import LoggerModel
+from backend.schema import DATETIME_FORMAT
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _readings(household: str, count: int, start: datetime = datetime(2024, 1, 1)):
+    return [(20.0 + i % 5, 50.0 + i % 7, 1 + i % 3, (start + timedelta(minutes=i)).strftime(DATETIME_FORMAT),
+             household) for i in range(count)]
+
+
+def _journal_mode(path: str) -> str:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA journal_mode').fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def live(tmp_path):
+    model = LoggerModel(str(tmp_path / 'records.db'))
+    model.log_readings(_readings('H1', 100)).result()
+    yield model
+    model.close()
+
+
+def test_snapshot_keeps_its_point_in_time(live):
+    snapshots = live.snapshots()
+    path = snapshots.refresh()['db_path']
+    live.log_readings(_readings('H1', 50, datetime(2024, 2, 1)) + _readings('H2', 10)).result()
+
+    snapshot = LoggerModel(path, read_only=True)
+    try:
+        assert len(snapshot.get_all_data('H1')) == 100
+        assert snapshot.get_all_data('H2').empty
+        assert snapshot.get_summary('H1', 'day')['readings'].tolist() == [100]
+        with pytest.raises(sqlite3.OperationalError):
+            snapshot.log_readings(_readings('H1', 1)).result()
+    finally:
+        snapshot.close()
+    assert len(live.get_all_data('H1')) == 150
+
+    # Opening it read-only leaves the copy in rollback journaling, with no WAL next to it
+    assert _journal_mode(path) == 'delete'
+    assert not os.path.exists(path + '-wal')
+
+    assert snapshots.refresh()['db_path'] != path
+    assert len(snapshots.generations()) == 2
+
+
+def test_manage_exports_from_a_snapshot(live, tmp_path):
+    output = str(tmp_path / 'export.csv')
+    subprocess.run([sys.executable, 'manage.py', '--db', live.db_path, '--snapshot', 'export', output],
+                   cwd=ROOT, check=True, capture_output=True)
+    with open(output, newline='') as export_file:
+        assert len(list(csv.reader(export_file))) == 101
+
+    path = live.snapshots().latest()
+    assert _journal_mode(path) == 'delete'
+    assert not os.path.exists(path + '-wal')
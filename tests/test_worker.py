@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+from backend.connection import ConnectionPool
+from backend.worker import TaskRunner
+
+
+@pytest.fixture
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def _wait(app, runner, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while runner.pending() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    assert not runner.pending()
+
+
+def test_tasks_reuse_their_thread_connection(app, tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'records.db'))
+    runner = TaskRunner(max_workers=2)
+    connections = []
+    try:
+        for _ in range(20):
+            runner.submit(None, lambda: id(pool.get()), on_result=connections.append)
+        _wait(app, runner)
+    finally:
+        runner.close()
+        pool.close()
+    assert len(connections) == 20
+    assert len(set(connections)) <= 2
+
+
+def test_newer_task_under_a_key_supersedes_a_queued_one(app):
+    runner = TaskRunner(max_workers=1)
+    release = threading.Event()
+    results = []
+    try:
+        runner.submit(None, release.wait)
+        runner.submit('data', lambda: 'stale', on_result=results.append)
+        runner.submit('data', lambda: 'fresh', on_result=results.append)
+        release.set()
+        _wait(app, runner)
+    finally:
+        runner.close()
+    assert results == ['fresh']